@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-token of POST /chat versus the streaming POST /chat/stream.
+
+The Gemini call is replaced by a stub that waits --first-token-seconds, then
+emits --tokens chunks --token-seconds apart, like a streamed completion.
+The app runs under uvicorn on a local port so responses are really streamed.
+Also checks that a client disconnecting after the first token stops the
+generation.
+
+Usage:
+    python benchmarks/bench_chat_ttft.py --requests 10
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+import httpx
+import uvicorn
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import main
+import chatLLM as chat_module
+import database
+from memory_store import AssessmentStore
+
+class StubLLM:
+    def __init__(self, first_token: float, tokens: int, token_seconds: float):
+        self.first_token = first_token
+        self.tokens = tokens
+        self.token_seconds = token_seconds
+        self.generated = 0
+
+    def chatLLM(self, PHI, prompt):
+        return "".join(self.chatLLM_stream(PHI, prompt))
+
+    def chatLLM_stream(self, PHI, prompt):
+        time.sleep(self.first_token)
+        for i in range(self.tokens):
+            if i:
+                time.sleep(self.token_seconds)
+            self.generated += 1
+            yield f"token{i} "
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def time_full(client: httpx.AsyncClient):
+    start = time.perf_counter()
+    response = await client.post("/chat", json={"question": "why is my grass yellow?", "phi": 0.3})
+    response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+async def time_stream(client: httpx.AsyncClient):
+    start = time.perf_counter()
+    first = None
+    async with client.stream("POST", "/chat/stream", json={"question": "why is my grass yellow?", "phi": 0.3}) as response:
+        async for line in response.aiter_lines():
+            if first is None and line.startswith("event: token"):
+                first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+async def check_cancellation(client: httpx.AsyncClient, stub: StubLLM):
+    stub.generated = 0
+    async with client.stream("POST", "/chat/stream", json={"question": "q", "phi": 0.5}) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("event: token"):
+                break
+    # Leave time for the rest of the generation had it not been stopped
+    await asyncio.sleep(stub.tokens * stub.token_seconds + 0.5)
+    print(f"disconnect after first token: {stub.generated} of {stub.tokens} chunks generated")
+
+def summarize(label, samples):
+    ttft = [s[0] * 1000 for s in samples]
+    total = [s[1] * 1000 for s in samples]
+    print(f"{label:12s} TTFT p50 {statistics.median(ttft):7.0f} ms  max {max(ttft):7.0f} ms  "
+          f"complete p50 {statistics.median(total):7.0f} ms")
+
+async def run(requests: int, stub: StubLLM, port: int):
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+        full = [await time_full(client) for _ in range(requests)]
+        streamed = [await time_stream(client) for _ in range(requests)]
+        summarize("/chat", full)
+        summarize("/chat/stream", streamed)
+        await check_cancellation(client, stub)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--first-token-seconds", type=float, default=0.3)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-seconds", type=float, default=0.05)
+    args = parser.parse_args()
+
+    stub = StubLLM(args.first_token_seconds, args.tokens, args.token_seconds)
+    chat_module.chatLLM = stub.chatLLM
+    chat_module.chatLLM_stream = stub.chatLLM_stream
+
+    database.MONGODB_AVAILABLE = False
+    database.memory_store = AssessmentStore()
+    port = free_port()
+    server = start_server(port)
+    try:
+        asyncio.run(run(args.requests, stub, port))
+    finally:
+        server.should_exit = True
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Throughput and peak memory of the streaming document pipeline in
+model/documentPipeline against the old sequential path.
+
+  sequential - every page OCR'd, then rendered, one after another, with all
+               rendered pages kept and saved as one multi-page TIFF at the end
+  streaming  - process_document: OCR of later pages overlaps rendering, and
+               pages are appended to the output as they finish
+
+Runs on a synthetic multi-page TIFF of --pages pages, then again on one
+--scale times longer to show how peak memory grows with the document
+length. Each run is a fresh subprocess and memory is its peak RSS (page
+buffers live in Pillow's allocator, which tracemalloc doesn't see).
+Requires the tesseract binary.
+
+Usage:
+    python benchmarks/bench_document.py --pages 8 --scale 4 --workers 2
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(BACKEND_DIR, "model"))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+import documentPipeline
+from bench_ocr import synthetic_page
+from imageGenerator import render_page
+from textReader import ocr_page
+
+def sequential(source: str, output_path: str, workers: int):
+    rendered = [render_page(page, ocr_page(page).paragraphs) for page in documentPipeline.iter_pages(source)]
+    rendered[0].save(output_path, save_all=True, append_images=rendered[1:], compression="tiff_deflate")
+
+def streaming(source: str, output_path: str, workers: int):
+    documentPipeline.process_document(source, output_path, workers=workers)
+
+MODES = {"sequential": sequential, "streaming": streaming}
+
+def run_child(mode: str, source: str, output_path: str, workers: int):
+    start = time.perf_counter()
+    MODES[mode](source, output_path, workers)
+    # VmHWM (KiB) is this process's own peak; ru_maxrss would also include
+    # the parent's peak from before the exec
+    with open("/proc/self/status") as status:
+        peak = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+    print(time.perf_counter() - start, peak / 1024)
+
+def measure(mode: str, source: str, pages: int, workdir: str, workers: int):
+    output_path = os.path.join(workdir, f"{mode}.tiff")
+    result = subprocess.run(
+        [sys.executable, __file__, "--child", mode, source, output_path, "--workers", str(workers)],
+        check=True, capture_output=True, text=True
+    )
+    elapsed, rss = map(float, result.stdout.split()[-2:])
+    print(f"{mode:10s} {pages:4d} pages  {pages / elapsed:6.2f} pages/s   peak {rss:7.1f} MiB (VmHWM)")
+
+def main(pages: int, scale: int, workers: int):
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in (pages, pages * scale):
+            source = os.path.join(workdir, f"doc{count}.tiff")
+            frames = (synthetic_page(i) for i in range(1, count))
+            synthetic_page(0).save(source, save_all=True, append_images=list(frames), compression="tiff_deflate")
+            for mode in MODES:
+                measure(mode, source, count, workdir, workers)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--scale", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=documentPipeline.PIPELINE_OCR_WORKERS)
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "SOURCE", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(*args.child, args.workers)
+    else:
+        main(args.pages, args.scale, args.workers)
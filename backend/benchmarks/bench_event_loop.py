@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Load test: /health and /risk latency while /chat is saturated.
+
+The Gemini call is replaced by a stub that sleeps synchronously for
+--llm-seconds, like the real blocking SDK. The app is driven in-process
+through httpx's ASGI transport in two modes:
+
+  blocking  - /chat calls chatLLM directly on the event loop (old behaviour)
+  pooled    - /chat goes through chatLLM_async and the bounded LLM pool
+
+Usage:
+    python benchmarks/bench_event_loop.py --chat-requests 16 --probes 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import main
+import chatLLM as chat_module
+import database
+from memory_store import AssessmentStore
+
+def stub_llm(seconds: float):
+    def chatLLM(PHI, prompt):
+        time.sleep(seconds)
+        return f"stub answer for PHI {PHI}"
+    return chatLLM
+
+async def probe(client: httpx.AsyncClient, path: str, count: int, interval: float):
+    """
+    Send requests on a fixed schedule and time each from its scheduled start,
+    so time spent waiting for a blocked event loop is counted.
+    """
+    latencies = []
+    t0 = time.perf_counter()
+    for i in range(count):
+        scheduled = t0 + i * interval
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        await client.get(path)
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+    return latencies
+
+async def chat_load(client: httpx.AsyncClient, delay: float):
+    await asyncio.sleep(delay)
+    return await client.post("/chat", json={"question": "why is my grass yellow?", "phi": 0.3})
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50 {statistics.median(ordered):8.1f} ms  p99 {p99:8.1f} ms  max {ordered[-1]:8.1f} ms"
+
+async def run_mode(mode: str, chat_requests: int, probes: int, llm_seconds: float):
+    sync_stub = stub_llm(llm_seconds)
+    chat_module.chatLLM = sync_stub
+    if mode == "blocking":
+        async def chatLLM_async(PHI, prompt):
+            return sync_stub(PHI, prompt)
+        main.chatLLM_async = chatLLM_async
+    else:
+        main.chatLLM_async = chat_module.chatLLM_async
+
+    database.MONGODB_AVAILABLE = False
+    database.memory_store = AssessmentStore()
+    assessment_id = await database.save_assessment({
+        "risk_assessment": main.calculate_risk(60.0, {})
+    })
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Stagger chats across the probe window so the loop stays saturated
+        interval = llm_seconds / 4
+        window = probes * interval
+        chats = [
+            chat_load(client, window * i / chat_requests)
+            for i in range(chat_requests)
+        ]
+        results = await asyncio.gather(
+            asyncio.gather(*chats),
+            probe(client, "/health", probes, interval),
+            probe(client, f"/risk/{assessment_id}", probes, interval),
+        )
+
+    _, health, risk = results
+    print(f"[{mode}]")
+    print(f"  /health: {summarize(health)}")
+    print(f"  /risk:   {summarize(risk)}")
+
+async def main_async(args):
+    for mode in ("blocking", "pooled"):
+        await run_mode(mode, args.chat_requests, args.probes, args.llm_seconds)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chat-requests", type=int, default=16)
+    parser.add_argument("--probes", type=int, default=20)
+    parser.add_argument("--llm-seconds", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark outbound HTTP throughput with and without the shared pooled client.
+
+Starts a local keep-alive stub server and fires the same number of requests
+through a fresh AsyncClient per request (the old behaviour) and through
+http_client.get_http_client().
+
+Usage:
+    python benchmarks/bench_http_pool.py --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from http_client import get_http_client, close_http_client
+
+BODY = b'{"current": {"temperature_2m": 21.5, "relative_humidity_2m": 40, "precipitation": 0}}'
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Answer HTTP/1.1 requests on one connection until the client closes it."""
+    try:
+        while True:
+            headers = await reader.readuntil(b"\r\n\r\n")
+            if not headers:
+                break
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/json\r\n"
+                b"Content-Length: " + str(len(BODY)).encode() + b"\r\n"
+                b"Connection: keep-alive\r\n\r\n" + BODY
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+async def run_unpooled(url: str, total: int, concurrency: int) -> float:
+    """Open a new client (and connection) for every request."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(url)
+                response.json()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(total)])
+    return time.perf_counter() - start
+
+async def run_pooled(url: str, total: int, concurrency: int) -> float:
+    """Reuse the shared pooled client for every request."""
+    semaphore = asyncio.Semaphore(concurrency)
+    client = get_http_client()
+
+    async def one():
+        async with semaphore:
+            response = await client.get(url)
+            response.json()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(total)])
+    elapsed = time.perf_counter() - start
+    await close_http_client()
+    return elapsed
+
+async def main(total: int, concurrency: int):
+    server = await asyncio.start_server(handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/v1/forecast"
+
+    async with server:
+        for name, runner in (("unpooled", run_unpooled), ("pooled", run_pooled)):
+            elapsed = await runner(url, total, concurrency)
+            print(f"{name:>9}: {total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Per-call client setup overhead: building Gemini clients per request versus
+reusing the ones in the llm_clients registry.
+
+No requests are sent; this times only what each call did before reaching
+the network:
+
+  chatLLM / image_processor - genai.configure + GenerativeModel per call, plus
+                              the gRPC client configure() discards and the
+                              next generate_content rebuilds
+  valuesLLM                 - parse .env.example + genai.Client per call
+
+A rebuilt client also drops its open connections, so the real per-call cost
+additionally includes a fresh TLS handshake that this does not measure.
+
+Usage:
+    python benchmarks/bench_llm_clients.py --calls 2000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("GEMINI_API_KEY", "bench-key")
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+from google import genai as genai_sdk
+import llm_clients
+
+def per_call_model(model_name: str):
+    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+    model = genai.GenerativeModel(model_name)
+    genai_client.get_default_generative_client()
+    return model
+
+def registry_model(model_name: str):
+    model = llm_clients.get_model(model_name)
+    genai_client.get_default_generative_client()
+    return model
+
+def per_call_client(env_path: str):
+    env = {}
+    with open(env_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            key, value = line.split("=", 1)
+            env[key] = value
+    return genai_sdk.Client(api_key=env["GEMINI_API_KEY"])
+
+def time_calls(func, calls: int, *args) -> float:
+    """Mean microseconds per call, after one warm-up call."""
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(*args)
+    return (time.perf_counter() - start) / calls * 1e6
+
+def main(calls: int):
+    with tempfile.NamedTemporaryFile("w", suffix=".env", delete=False) as env_file:
+        env_file.write("# Example configuration\nGEMINI_API_KEY=bench-key\nMONGODB_URL=mongodb://localhost:27017\n")
+    try:
+        rows = [
+            # Client construction is heavy, so fewer iterations for the per-call paths
+            ("GenerativeModel", time_calls(per_call_model, max(1, calls // 10), llm_clients.CHAT_MODEL),
+             time_calls(registry_model, calls, llm_clients.CHAT_MODEL)),
+            ("genai.Client", time_calls(per_call_client, max(1, calls // 10), env_file.name),
+             time_calls(llm_clients.get_genai_client, calls)),
+        ]
+    finally:
+        os.unlink(env_file.name)
+
+    for label, per_call, cached in rows:
+        print(f"{label:16s} per call {per_call:9.1f} us   registry {cached:6.2f} us   ({per_call / cached:,.0f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.calls)
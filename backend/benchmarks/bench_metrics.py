@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Overhead of the metrics instrumentation in metrics.py.
+
+  timed            - one stage timer outside a sampled request
+  timed (sampled)  - the same inside a sampled request, which also appends
+                     a span to its trace
+  counter          - one labelled Counter.inc
+  request          - a trivial ASGI app with and without MetricsMiddleware,
+                     per request
+  render           - one /metrics scrape of the populated registry
+
+Usage:
+    python benchmarks/bench_metrics.py --calls 200000 --requests 20000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import metrics
+
+def per_call_us(func, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+def stage():
+    with metrics.timed("bench"):
+        pass
+
+def count():
+    metrics.upstream_errors.inc(upstream="bench", kind="error")
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+async def per_request_us(asgi, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/bench"}
+    start = time.perf_counter()
+    for _ in range(requests):
+        await asgi(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+def main(calls: int, requests: int):
+    print(f"timed            {per_call_us(stage, calls):6.2f} us/call")
+    token = metrics._current_trace.set(metrics.Trace("GET", "/bench"))
+    print(f"timed (sampled)  {per_call_us(stage, calls):6.2f} us/call")
+    metrics._current_trace.reset(token)
+    print(f"counter          {per_call_us(count, calls):6.2f} us/call")
+
+    bare = asyncio.run(per_request_us(app, requests))
+    wrapped = asyncio.run(per_request_us(metrics.MetricsMiddleware(app, sample_rate=0), requests))
+    sampled = asyncio.run(per_request_us(metrics.MetricsMiddleware(app, sample_rate=1), requests))
+    print(f"request          {bare:6.2f} us bare, {wrapped:6.2f} us with middleware, {sampled:6.2f} us sampled")
+
+    start = time.perf_counter()
+    body = metrics.registry.render()
+    print(f"render           {(time.perf_counter() - start) * 1000:6.2f} ms for {len(body.splitlines())} lines")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.calls, args.requests)
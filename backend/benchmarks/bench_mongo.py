@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark MongoDB writes and reads against a local mongod.
+
+Compares concurrent insert_one calls with the write-behind WriteBatcher, then
+reads the documents back by id with and without the risk_assessment
+projection used by GET /risk. Uses a throwaway database that is dropped at
+the end.
+
+Usage:
+    MONGODB_URL=mongodb://localhost:27017 python benchmarks/bench_mongo.py --docs 5000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime
+import motor.motor_asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from risk_engine import calculate_risk
+from write_batcher import WriteBatcher
+
+def make_document():
+    lat, lon = random.uniform(30, 40), random.uniform(-125, -115)
+    env = {
+        'weather': {'temperature': random.uniform(0, 40), 'humidity': random.uniform(5, 95), 'precipitation': 0},
+        'drought': {'index': random.uniform(-4, 4), 'category': 'Moderate'},
+        'vegetation': {'ndvi': random.uniform(0, 100)},
+        'fire_weather': {'fwi': random.uniform(0, 30), 'category': 'Low'},
+        'hourly': [random.random() for _ in range(168)],
+    }
+    veg = random.uniform(0, 100)
+    return {
+        'latitude': lat,
+        'longitude': lon,
+        'location': {'type': 'Point', 'coordinates': [lon, lat]},
+        'vegetation_health': veg,
+        'environmental_data': env,
+        'risk_assessment': calculate_risk(veg, env),
+        'timestamp': datetime.utcnow(),
+    }
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def bench_inserts(collection, docs: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def insert_one():
+        async with semaphore:
+            await collection.insert_one(make_document())
+
+    start = time.perf_counter()
+    await asyncio.gather(*[insert_one() for _ in range(docs)])
+    single = docs / (time.perf_counter() - start)
+
+    batcher = WriteBatcher(collection, max_batch=100, flush_interval=0.05)
+    start = time.perf_counter()
+    ids = [batcher.add(make_document()) for _ in range(docs)]
+    await batcher.close()
+    batched = docs / (time.perf_counter() - start)
+
+    print(f"inserts: insert_one {single:,.0f}/s, batched insert_many {batched:,.0f}/s")
+    return ids
+
+async def bench_reads(collection, ids, reads: int):
+    from bson import ObjectId
+    sample = [ObjectId(random.choice(ids)) for _ in range(reads)]
+    for label, projection in (("full document", None), ("risk_assessment projection", {'risk_assessment': 1})):
+        latencies = []
+        for object_id in sample:
+            start = time.perf_counter()
+            await collection.find_one({'_id': object_id}, projection)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"reads ({label}): p50 {percentile(latencies, 0.5):.2f} ms, p99 {percentile(latencies, 0.99):.2f} ms")
+
+async def main(docs: int, reads: int, concurrency: int):
+    client = motor.motor_asyncio.AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client.drought_fire_bench
+    try:
+        ids = await bench_inserts(db.assessments, docs, concurrency)
+        await bench_reads(db.assessments, ids, reads)
+    finally:
+        await client.drop_database("drought_fire_bench")
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.docs, args.reads, args.concurrency))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+OCR throughput: pages per second and per-stage timing for model/textReader.
+
+Runs the same pages through
+
+  sequential - ocr_page in this process, one page after another
+  pipeline   - documentPipeline.ocr_pages, pages OCR'd on its thread pool
+
+and, if BeautifulSoup is installed, the old hOCR + html.parser path for
+comparison. Without page paths, synthetic text pages are rendered.
+Requires the tesseract binary.
+
+Usage:
+    python benchmarks/bench_ocr.py --pages 16 --workers 4
+    python benchmarks/bench_ocr.py scan1.png scan2.png
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(BACKEND_DIR, "model"))
+
+import pytesseract
+from PIL import Image, ImageDraw, ImageFont
+from imageGenerator import FONT_DIR
+from documentPipeline import ocr_pages
+from textReader import ocr_page
+
+FONT_PATH = os.path.join(FONT_DIR, "OpenDyslexic-Regular.otf")
+WORDS = "soil moisture drought vegetation canopy wildfire humidity rainfall index stress leaf root".split()
+
+def synthetic_page(seed: int, size=(1240, 1754), paragraphs: int = 6) -> Image.Image:
+    """A white A4 page at 150 dpi with a few paragraphs of random words."""
+    rng = random.Random(seed)
+    page = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.truetype(FONT_PATH, 22)
+    y = 80
+    for _ in range(paragraphs):
+        for _ in range(rng.randint(3, 6)):
+            draw.text((80, y), " ".join(rng.choice(WORDS) for _ in range(10)), fill="black", font=font)
+            y += 34
+        y += 70
+    return page
+
+def legacy_hocr(image: Image.Image):
+    from bs4 import BeautifulSoup
+    start = time.perf_counter()
+    hocr = pytesseract.image_to_pdf_or_hocr(image, extension="hocr").decode("utf-8")
+    ocr_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    soup = BeautifulSoup(hocr, "html.parser")
+    count = len(soup.find_all("p", class_="ocr_par"))
+    return count, {"ocr_ms": ocr_ms, "parse_ms": (time.perf_counter() - start) * 1000}
+
+def report(label: str, elapsed: float, pages: int, timings):
+    stages = {}
+    for page_timings in timings:
+        for stage, ms in page_timings.items():
+            stages[stage] = stages.get(stage, 0.0) + ms
+    per_stage = "  ".join(f"{stage[:-3]} {ms / pages:7.1f}" for stage, ms in sorted(stages.items()))
+    print(f"{label:10s} {pages / elapsed:6.2f} pages/s   ms/page: {per_stage}")
+
+def main(pages, workers: int):
+    count = len(pages)
+    print(f"{count} pages, {workers} workers")
+
+    try:
+        import bs4  # noqa: F401
+        start = time.perf_counter()
+        results = [legacy_hocr(page) for page in pages]
+        report("hocr+bs4", time.perf_counter() - start, count, [r[1] for r in results])
+    except ImportError:
+        print("hocr+bs4   skipped (beautifulsoup4 not installed)")
+
+    start = time.perf_counter()
+    results = [ocr_page(page) for page in pages]
+    report("sequential", time.perf_counter() - start, count, [r.timings for r in results])
+
+    start = time.perf_counter()
+    # Two pages in flight per worker, the pipeline's default ratio
+    results = [result for _, result in ocr_pages(iter(pages), workers=workers, queue_size=2 * workers)]
+    report("pipeline", time.perf_counter() - start, count, [r.timings for r in results])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--pages", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    pages = [Image.open(path) for path in args.paths] or [synthetic_page(i) for i in range(args.pages)]
+    main(pages, args.workers)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Page throughput and memory of the dyslexia re-rendering in model/imageGenerator.
+
+Renders synthetic pages, each with --paragraphs text boxes:
+
+  legacy   - old replace_text: ImageFont.truetype per paragraph, one line
+             at a fixed size with no wrapping or fitting (less work, for
+             reference)
+  uncached - render_page with the font and layout caches cleared before
+             every page, i.e. fitting without the caches
+  cold     - render_page with the caches starting empty
+  warm     - render_page again with the caches populated (repeat pages)
+  batch    - render_pages on a process pool of --workers
+
+Throughput and memory are measured in separate passes. Memory is the
+tracemalloc peak for in-process modes and the largest worker RSS for the
+batch mode. Glyph rasterization and PNG encoding dominate page time, so the
+pool only helps with more than one CPU.
+
+Usage:
+    python benchmarks/bench_render.py --pages 50 --workers 4
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model"))
+
+from PIL import Image, ImageDraw, ImageFont
+import imageGenerator
+
+WORDS = "soil moisture drought vegetation canopy wildfire humidity rainfall index stress leaf root".split()
+
+def make_paragraphs(seed: int, count: int, size=(1240, 1754)):
+    rng = random.Random(seed)
+    band = size[1] // count
+    return [
+        ((60, i * band + 20, size[0] - 60, (i + 1) * band - 20),
+         " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 80))))
+        for i in range(count)
+    ]
+
+def legacy_render(image_path: str, paragraphs, output_path: str):
+    image = Image.open(image_path)
+    draw = ImageDraw.Draw(image)
+    for (x1, y1, x2, y2), text in paragraphs:
+        draw.rectangle([x1, y1, x2, y2], fill="white")
+        font = ImageFont.truetype(os.path.join(imageGenerator.FONT_DIR, "OpenDyslexic-Regular.otf"), 20)
+        draw.text((x1, y1), text, fill="black", font=font)
+    image.save(output_path)
+
+def engine_render(image_path: str, paragraphs, output_path: str):
+    with Image.open(image_path) as image:
+        imageGenerator.render_page(image, paragraphs).save(output_path)
+
+def clear_caches():
+    imageGenerator.get_font.cache_clear()
+    imageGenerator.wrap_text.cache_clear()
+    imageGenerator.fit_text.cache_clear()
+
+def uncached_render(image_path: str, paragraphs, output_path: str):
+    clear_caches()
+    engine_render(image_path, paragraphs, output_path)
+
+def run_in_process(label: str, render, jobs, before=None):
+    if before:
+        before()
+    start = time.perf_counter()
+    for job in jobs:
+        render(*job)
+    elapsed = time.perf_counter() - start
+
+    if before:
+        before()
+    tracemalloc.start()
+    for job in jobs:
+        render(*job)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:8s} {len(jobs) / elapsed:7.1f} pages/s   peak {peak / 2**20:7.1f} MiB (tracemalloc)")
+
+def main(pages: int, paragraphs: int, workers: int):
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, "page.png")
+        Image.new("RGB", (1240, 1754), "white").save(source)
+        jobs = [
+            (source, make_paragraphs(i, paragraphs), os.path.join(workdir, f"out{i}.png"))
+            for i in range(pages)
+        ]
+
+        run_in_process("legacy", legacy_render, jobs)
+        run_in_process("uncached", uncached_render, jobs)
+        run_in_process("cold", engine_render, jobs, before=clear_caches)
+        run_in_process("warm", engine_render, jobs)
+        print(f"         fonts {imageGenerator.get_font.cache_info()}")
+        print(f"         layouts {imageGenerator.fit_text.cache_info()}")
+
+        start = time.perf_counter()
+        imageGenerator.render_pages(jobs, workers=workers)
+        elapsed = time.perf_counter() - start
+        # ru_maxrss is in KiB on Linux
+        child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        print(f"batch    {pages / elapsed:7.1f} pages/s   peak {child_rss:7.1f} MiB (largest worker RSS, {workers} workers)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--paragraphs", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    main(args.pages, args.paragraphs, args.workers)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark scalar calculate_risk against calculate_risk_batch.
+
+Generates random assessments, scores them through both paths, checks the
+results agree exactly and prints rows per second for each.
+
+Usage:
+    python benchmarks/bench_risk_batch.py --rows 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from risk_engine import (
+    calculate_risk,
+    calculate_risk_batch,
+    calculate_risk_many,
+    RISK_CATEGORIES,
+    RECOMMENDATION_TABLE,
+)
+
+def main(rows: int, seed: int):
+    rng = np.random.default_rng(seed)
+    veg = np.round(rng.uniform(0, 100, rows), 2)
+    drought = np.round(rng.uniform(-6, 6, rows), 2)
+    fwi = np.round(rng.uniform(0, 40, rows), 2)
+    temp = np.round(rng.uniform(-10, 45, rows), 1)
+    humidity = np.round(rng.uniform(5, 100, rows), 1)
+
+    veg_list = veg.tolist()
+    env_list = [
+        {
+            'weather': {'temperature': t, 'humidity': h},
+            'drought': {'index': d, 'category': 'Moderate'},
+            'fire_weather': {'fwi': f, 'category': 'Low'}
+        }
+        for d, f, t, h in zip(drought.tolist(), fwi.tolist(), temp.tolist(), humidity.tolist())
+    ]
+
+    start = time.perf_counter()
+    scalar = [calculate_risk(v, env) for v, env in zip(veg_list, env_list)]
+    scalar_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = calculate_risk_batch(veg, drought, fwi, temp, humidity)
+    batch_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    many = calculate_risk_many(veg_list, env_list)
+    many_elapsed = time.perf_counter() - start
+
+    mismatches = 0
+    for i, expected in enumerate(scalar):
+        if (
+            batch['overall_risk_score'][i] != expected['overall_risk_score']
+            or RISK_CATEGORIES[batch['risk_category_code'][i]] != expected['risk_category']
+            or RECOMMENDATION_TABLE[batch['recommendation_code'][i]] != expected['recommendation']
+            or many[i] != expected
+        ):
+            mismatches += 1
+
+    print(f"rows: {rows}, mismatches: {mismatches}")
+    print(f"  scalar calculate_risk: {rows / scalar_elapsed:>12,.0f} rows/s")
+    print(f"  calculate_risk_batch:  {rows / batch_elapsed:>12,.0f} rows/s")
+    print(f"  calculate_risk_many:   {rows / many_elapsed:>12,.0f} rows/s")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.rows, args.seed)
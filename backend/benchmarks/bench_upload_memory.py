@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Measure peak memory of ingesting one upload, buffered vs streamed.
+
+The buffered path mirrors the old /upload handler (await file.read() then a
+temp file write); the streamed path uses upload_stream.read_upload. Peak
+Python allocations are measured with tracemalloc.
+
+Usage:
+    python benchmarks/bench_upload_memory.py --size-mb 32
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from fastapi import UploadFile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from upload_stream import read_upload
+
+async def ingest_buffered(upload: UploadFile):
+    file_path = os.path.join(tempfile.gettempdir(), f"temp_{upload.filename}")
+    with open(file_path, "wb") as buffer:
+        content = await upload.read()
+        buffer.write(content)
+    os.remove(file_path)
+
+async def ingest_streamed(upload: UploadFile):
+    buffer, _, _ = await read_upload(upload)
+    buffer.close()
+
+async def measure(name: str, ingest, source_path: str):
+    with open(source_path, "rb") as source:
+        upload = UploadFile(file=source, filename="survey.png")
+        tracemalloc.start()
+        start = time.perf_counter()
+        await ingest(upload)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(f"{name:>9}: peak {peak / 1024 / 1024:8.1f} MiB, {elapsed * 1000:8.1f} ms")
+
+async def main(size_mb: int):
+    fd, source_path = tempfile.mkstemp(suffix=".bin")
+    with os.fdopen(fd, "wb") as out:
+        for _ in range(size_mb):
+            out.write(os.urandom(1024 * 1024))
+    try:
+        print(f"upload size: {size_mb} MiB")
+        await measure("buffered", ingest_buffered, source_path)
+        await measure("streamed", ingest_streamed, source_path)
+    finally:
+        os.remove(source_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.size_mb))
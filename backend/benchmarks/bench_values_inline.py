@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Latency of plant attribute requests: File API upload versus inline bytes.
+
+Runs against the real Gemini API (needs GEMINI_API_KEY) in three modes:
+
+  upload  - old path: files.upload, then generate_content, per image
+  inline  - chatLLM_image: one request per image with the bytes inline
+  batch   - chatLLM_images: every image in one multi-part request
+
+Usage:
+    GEMINI_API_KEY=... python benchmarks/bench_values_inline.py input.png test.png --rounds 3
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import valuesLLM
+from llm_clients import get_genai_client, VALUES_MODEL
+
+def upload_then_generate(path: str):
+    client = get_genai_client()
+    image_bytes = valuesLLM.prepare_image_bytes(path)
+    uploaded = client.files.upload(file=io.BytesIO(image_bytes), config={'mime_type': 'image/jpeg'})
+    return client.models.generate_content(
+        model=VALUES_MODEL,
+        contents=[uploaded, f"You are an expert agronomist.\n{valuesLLM.ATTRIBUTES_PROMPT}\nProvide the output as raw JSON only."]
+    )
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+def main(paths, rounds: int):
+    results = {"upload": [], "inline": [], "batch": []}
+    for _ in range(rounds):
+        results["upload"].append(sum(timed(upload_then_generate, path) for path in paths))
+        results["inline"].append(sum(timed(valuesLLM.chatLLM_image, path) for path in paths))
+        results["batch"].append(timed(valuesLLM.chatLLM_images, paths))
+
+    print(f"{len(paths)} images, {rounds} rounds (total ms for all images)")
+    for mode, samples in results.items():
+        print(f"{mode:8s} p50 {statistics.median(samples):8.0f} ms  min {min(samples):8.0f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="+")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    if not os.getenv("GEMINI_API_KEY"):
+        sys.exit("GEMINI_API_KEY is required")
+    main(args.images, args.rounds)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Compare the local vegetation index with the Gemini score on sample images.
+
+Prints per-image local indices, score, confidence and latency. When
+GEMINI_API_KEY is set, also scores each image through the LLM path and
+reports the difference.
+
+Usage:
+    python benchmarks/bench_vegetation_index.py input.png test.png
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from vegetation_index import compute_vegetation_indices
+import image_processor
+from vision_cache import VisionCache
+
+async def llm_score(path: str) -> float:
+    """Score through Gemini with the local fast path and cache disabled."""
+    image_processor.LOCAL_INDEX_ENABLED = False
+    image_processor.vision_cache = VisionCache()
+    return await image_processor.analyze_vegetation_health(path)
+
+async def main(paths, repeat: int):
+    use_llm = bool(os.getenv("GEMINI_API_KEY"))
+    if not use_llm:
+        print("GEMINI_API_KEY not set, skipping LLM comparison")
+
+    for path in paths:
+        image = Image.open(path)
+        image.load()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            indices = compute_vegetation_indices(image)
+        local_ms = (time.perf_counter() - start) * 1000 / repeat
+
+        line = (
+            f"{os.path.basename(path):>16} {image.size[0]}x{image.size[1]}: "
+            f"local {indices['score']:5.1f} (conf {indices['confidence']:.2f}, "
+            f"ExG {indices['exg']:.2f}, VARI {indices['vari']:.2f}, GLI {indices['gli']:.2f}, "
+            f"green {indices['green_fraction']:.2f}) in {local_ms:.2f} ms"
+        )
+        if use_llm:
+            start = time.perf_counter()
+            score = await llm_score(path)
+            llm_ms = (time.perf_counter() - start) * 1000
+            line += f" | LLM {score:5.1f} in {llm_ms:.0f} ms, diff {indices['score'] - score:+.1f}"
+        print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=["input.png", "test.png"])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.paths, args.repeat))
@@ -1,14 +1,23 @@
 from celery import Celery
+from kombu import Queue
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Run tasks in-process with an in-memory result store (local testing without Redis)
+CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'false').lower() == 'true'
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
+# Gemini calls allowed per LLM worker, in Celery rate-limit syntax ("" disables)
+LLM_RATE_LIMIT = os.getenv('CELERY_LLM_RATE_LIMIT', '60/m') or None
+# Retries of the persistence stage after a transient MongoDB error
+PERSIST_MAX_RETRIES = int(os.getenv('CELERY_PERSIST_MAX_RETRIES', '5'))
+
 # Celery configuration
 celery_app = Celery(
     'drought_fire_tasks',
-    broker=os.getenv('REDIS_URL', 'redis://localhost:6379'),
-    backend=os.getenv('REDIS_URL', 'redis://localhost:6379'),
+    broker='memory://' if CELERY_TASK_ALWAYS_EAGER else REDIS_URL,
+    backend='cache+memory://' if CELERY_TASK_ALWAYS_EAGER else REDIS_URL,
     include=['tasks']
 )
 
@@ -19,7 +28,45 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    task_always_eager=CELERY_TASK_ALWAYS_EAGER,
+    task_store_eager_result=True,
+    # Report STARTED so /tasks/{id} can tell queued from running work
+    task_track_started=True,
+    result_expires=int(os.getenv('CELERY_RESULT_EXPIRES', '86400')),
+    # Tasks spend most of their time waiting on Gemini and HTTP, so run more
+    # worker processes than CPUs and keep the prefetch buffer small to avoid
+    # parking work behind a slow LLM call
+    worker_concurrency=int(os.getenv('CELERY_CONCURRENCY', '8')),
+    worker_prefetch_multiplier=int(os.getenv('CELERY_PREFETCH_MULTIPLIER', '1')),
+    # Acknowledge after completion so a crashed worker's task is redelivered
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # LLM-bound image analysis gets its own queue so slow Gemini calls never
+    # occupy the workers fetching environmental data or writing to MongoDB;
+    # run one worker per queue (see start_celery.sh) and size each separately
+    task_queues=(Queue('io'), Queue('llm')),
+    task_default_queue='io',
+    task_routes={
+        'tasks.analyze_image': {'queue': 'llm'},
+        'tasks.fetch_environment': {'queue': 'io'},
+        'tasks.score_risk': {'queue': 'io'},
+        'tasks.persist_assessment': {'queue': 'io'},
+    },
+    broker_transport_options={
+        'visibility_timeout': int(os.getenv('CELERY_VISIBILITY_TIMEOUT', '3600'))
+    },
 )
 
+def queue_depths():
+    """Messages waiting in each task queue, read from the broker."""
+    with celery_app.connection_for_read() as connection:
+        with connection.channel() as channel:
+            # A non-passive declare is a no-op for existing queues and, unlike
+            # a passive one, doesn't fail on Redis when the queue is empty
+            return {
+                queue.name: channel.queue_declare(queue=queue.name).message_count
+                for queue in celery_app.conf.task_queues
+            }
+
 if __name__ == '__main__':
     celery_app.start()
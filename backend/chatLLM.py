@@ -1,23 +1,16 @@
-import os
-import google.generativeai as genai
 from dotenv import load_dotenv
+from llm_pool import run_llm, stream_llm
+from llm_clients import get_model, call_with_retry, CHAT_MODEL
+from metrics import timed, fallbacks
 
 # Load environment variables
 load_dotenv()
 
-def chatLLM(PHI, prompt):
-    try:
-        # Get API key from environment
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
-        
-        # Configure the client
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-
-        response = model.generate_content(
-            f"""You are an educational AI assistant that provides information about environmental science and plant health.
+# Start of the reply chatLLM returns when generation fails
+CHAT_ERROR_PREFIX = "I'm experiencing technical difficulties."
+
+def build_chat_prompt(PHI, prompt):
+    return f"""You are an educational AI assistant that provides information about environmental science and plant health.
             
             Context: Plant Health Index (PHI) using NDVI: {PHI}
             (0.0-0.2 = Poor health, 0.2-0.4 = Fair, 0.4-0.6 = Good, 0.6-0.8 = Very good, 0.8-1.0 = Excellent)
@@ -25,10 +18,41 @@ def chatLLM(PHI, prompt):
             User Question: {prompt}
             
             Please provide a concise but informative educational response that helps the user learn about environmental science, plant health, or related topics."""
-        )
+
+def chatLLM(PHI, prompt):
+    try:
+        # Shared, already-configured client from the registry
+        model = get_model(CHAT_MODEL)
+
+        with timed("llm_chat"):
+            response = call_with_retry(model.generate_content, build_chat_prompt(PHI, prompt))
 
         return response.text
             
     except Exception as e:
         print(f"Error in chatLLM: {str(e)}")
-        return f"I'm experiencing technical difficulties. Please try again later. Error: {str(e)}"
\ No newline at end of file
+        fallbacks.inc(component="chat", reason="error")
+        return f"{CHAT_ERROR_PREFIX} Please try again later. Error: {str(e)}"
+
+async def chatLLM_async(PHI, prompt):
+    """Run chatLLM on the bounded LLM pool so the event loop stays free."""
+    return await run_llm(chatLLM, PHI, prompt)
+
+def chatLLM_stream(PHI, prompt):
+    """
+    Yield the Gemini answer in chunks as they are generated.
+
+    Unlike chatLLM, errors are raised rather than returned as text, so the
+    caller can tell a failure apart from a partial answer.
+    """
+    model = get_model(CHAT_MODEL)
+    
+    response = call_with_retry(model.generate_content, build_chat_prompt(PHI, prompt), stream=True)
+    for chunk in response:
+        # Chunks without text parts (e.g. the final safety metadata) are skipped
+        if chunk.parts:
+            yield chunk.text
+
+def chatLLM_stream_async(PHI, prompt):
+    """Stream chatLLM_stream from the bounded LLM pool; closing it stops generation."""
+    return stream_llm(chatLLM_stream, PHI, prompt)
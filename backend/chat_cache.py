@@ -0,0 +1,161 @@
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Set, Tuple
+
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "10000"))
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", "21600"))
+# Minimum trigram Jaccard similarity for a paraphrase to count as a hit. Off by
+# default: trigrams can't see negation ("why is my grass not yellow" scores
+# 0.78 against "why is my grass yellow"), so enable it with a high threshold
+CHAT_CACHE_SIMILARITY = float(os.getenv("CHAT_CACHE_SIMILARITY", "0"))
+
+# PHI bands used by the chat prompt: 0.0-0.2 Poor, 0.2-0.4 Fair, ... 0.8-1.0 Excellent
+PHI_BAND_WIDTH = 0.2
+PHI_BANDS = 5
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+def phi_bucket(phi: float) -> int:
+    """Index of the prompt's PHI band (0-4) that a value falls in."""
+    return min(PHI_BANDS - 1, max(0, int(phi / PHI_BAND_WIDTH)))
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Character trigrams of a normalized question, padded at word boundaries."""
+    padded = f" {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+class ChatResponseCache:
+    """
+    TTL + LRU cache of chat answers keyed by (PHI band, normalized question).
+
+    Answers depend on the question and only on which band the PHI falls in,
+    so nearby PHI values share entries. When similarity is enabled, a miss
+    on the exact question falls back to the most similar cached question in
+    the same band (trigram Jaccard), found through an inverted trigram index.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CHAT_CACHE_MAX_ENTRIES,
+        ttl: float = CHAT_CACHE_TTL,
+        similarity: float = CHAT_CACHE_SIMILARITY
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        # (bucket, question) -> (response, expires_at, trigrams)
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[str, float, FrozenSet[str]]]" = OrderedDict()
+        # (bucket, trigram) -> keys of questions containing it
+        self._index: Dict[Tuple[int, str], Set[Tuple[int, str]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def get(self, question: str, phi: float) -> Optional[str]:
+        """Return a cached answer for the question, or None."""
+        key = (phi_bucket(phi), normalize_question(question))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
+            if self.similarity > 0:
+                similar = self._most_similar(key, now)
+                if similar is not None:
+                    self.similar_hits += 1
+                    return self._entries[similar][0]
+            self.misses += 1
+            return None
+
+    def set(self, question: str, phi: float, response: str) -> None:
+        key = (phi_bucket(phi), normalize_question(question))
+        grams = trigrams(key[1])
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (response, time.monotonic() + self.ttl, grams)
+            for gram in grams:
+                self._index.setdefault((key[0], gram), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, question: Optional[str] = None, phi: Optional[float] = None) -> int:
+        """
+        Drop entries and return how many were removed.
+
+        With a question, removes that question (in the PHI's band, or in every
+        band if no PHI is given); with only a PHI, clears that band; with
+        neither, clears everything.
+        """
+        bucket = phi_bucket(phi) if phi is not None else None
+        normalized = normalize_question(question) if question is not None else None
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if (bucket is None or key[0] == bucket) and (normalized is None or key[1] == normalized)
+            ]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def _live_entry(self, key: Tuple[int, str], now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _most_similar(self, key: Tuple[int, str], now: float) -> Optional[Tuple[int, str]]:
+        grams = trigrams(key[1])
+        overlaps: Counter = Counter()
+        for gram in grams:
+            overlaps.update(self._index.get((key[0], gram), ()))
+        best, best_score = None, self.similarity
+        expired = []
+        for candidate, overlap in overlaps.items():
+            _, expires_at, candidate_grams = self._entries[candidate]
+            if expires_at <= now:
+                # An expired near-match must not hide a live one behind it
+                expired.append(candidate)
+                continue
+            score = overlap / (len(grams) + len(candidate_grams) - overlap)
+            if score >= best_score:
+                best, best_score = candidate, score
+        for candidate in expired:
+            self._remove(candidate)
+        if best is not None:
+            self._entries.move_to_end(best)
+        return best
+
+    def _remove(self, key: Tuple[int, str]) -> None:
+        _, _, grams = self._entries.pop(key)
+        for gram in grams:
+            bucket = self._index.get((key[0], gram))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._index[(key[0], gram)]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        total = self.hits + self.similar_hits + self.misses
+        return {
+            'hits': self.hits,
+            'similar_hits': self.similar_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.similar_hits) / total if total else 0.0,
+            'entries': len(self._entries),
+        }
+
+# Process-wide cache of /chat answers
+chat_cache = ChatResponseCache()
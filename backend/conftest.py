@@ -0,0 +1,17 @@
+"""
+Test environment shared by every test module; conftest is imported before
+any of them, so this runs before celery_app, task_events and upload_stream
+read their settings.
+
+Celery runs eagerly (tasks execute inside the API process against an
+in-memory broker and result store), so the tests need no Redis.
+"""
+
+import os
+import tempfile
+
+os.environ["CELERY_TASK_ALWAYS_EAGER"] = "true"
+os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="drought_fire_test_uploads_"))
+
+# test_api.py is a manual smoke test against a running server, not a pytest module
+collect_ignore = ["test_api.py"]
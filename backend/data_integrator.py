@@ -1,69 +1,124 @@
 import httpx
 import os
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 import asyncio
+import time
 from loguru import logger
+from http_client import get_http_client
+from geo_cache import env_cache
+from metrics import env_source_duration, upstream_errors, fallbacks, record_span
 
 # API Keys
 # Note: Open-Meteo and NASA POWER don't require API keys for basic usage
 NASA_API_KEY = os.getenv("NASA_API_KEY", "")  # Optional for POWER API
 
+# Per-source timeout in seconds for the concurrent fan-out
+SOURCE_TIMEOUT = float(os.getenv("ENV_SOURCE_TIMEOUT", "5.0"))
+
+# Default/mock data used when a single source fails or times out
+FALLBACK_DATA = {
+    'weather': {'temperature': 25, 'humidity': 50, 'precipitation': 0},
+    'drought': {'index': 2.0, 'category': 'Moderate'},
+    'vegetation': {'ndvi': 0.6},
+    'fire_weather': {'fwi': 5.0, 'category': 'Low'}
+}
+
 async def get_environmental_data(latitude: float, longitude: float) -> Dict[str, Any]:
     """
     Fetch environmental data from various APIs.
     
-    Returns dict with weather, drought, vegetation indices, and fire data.
+    All sources are fetched concurrently, each with its own timeout and
+    fallback, so one slow source no longer discards the others.
+    
+    Returns dict with weather, drought, vegetation indices, and fire data,
+    plus a 'sources' entry mapping each source to "live", "cached" or "fallback".
     """
+    fetchers = {
+        'weather': get_weather_data,
+        'drought': get_drought_data,
+        'vegetation': get_vegetation_data,
+        'fire_weather': get_fire_weather_data,
+    }
+    
+    results = await asyncio.gather(*[
+        _fetch_source(name, fetcher, latitude, longitude)
+        for name, fetcher in fetchers.items()
+    ])
+    
     data = {}
+    sources = {}
+    for name, (value, status) in zip(fetchers, results):
+        data[name] = value
+        sources[name] = status
+    data['sources'] = sources
     
-    try:
-        # Fetch weather data
-        weather_data = await get_weather_data(latitude, longitude)
-        data['weather'] = weather_data
-        
-        # Fetch drought data
-        drought_data = await get_drought_data(latitude, longitude)
-        data['drought'] = drought_data
-        
-        # Fetch vegetation indices
-        veg_data = await get_vegetation_data(latitude, longitude)
-        data['vegetation'] = veg_data
-        
-        # Fetch fire weather data
-        fire_data = await get_fire_weather_data(latitude, longitude)
-        data['fire_weather'] = fire_data
-        
+    fallback_sources = [name for name, status in sources.items() if status == "fallback"]
+    if fallback_sources:
+        logger.warning(f"Environmental data for {latitude}, {longitude} used fallback for: {', '.join(fallback_sources)}")
+    else:
         logger.info(f"Successfully fetched environmental data for {latitude}, {longitude}")
-        return data
-        
+    return data
+
+async def _fetch_source(name: str, fetcher, lat: float, lon: float) -> Tuple[Dict[str, Any], str]:
+    """
+    Run one source fetcher through the geo tile cache with a timeout.
+    
+    Returns (data, status) where status is "live", "cached" or "fallback".
+    """
+    start = time.perf_counter()
+    try:
+        value, cached = await asyncio.wait_for(
+            env_cache.get_or_fetch(name, lat, lon, lambda: fetcher(lat, lon)),
+            timeout=SOURCE_TIMEOUT
+        )
+        status = "cached" if cached else "live"
+        _record_source(name, status, start)
+        return value, status
+    except asyncio.TimeoutError:
+        logger.error(f"Timed out fetching {name} data after {SOURCE_TIMEOUT}s")
+        reason = "timeout"
     except Exception as e:
-        logger.error(f"Error fetching environmental data: {str(e)}")
-        # Return default/mock data
-        return {
-            'weather': {'temperature': 25, 'humidity': 50, 'precipitation': 0},
-            'drought': {'index': 2.0, 'category': 'Moderate'},
-            'vegetation': {'ndvi': 0.6},
-            'fire_weather': {'fwi': 5.0, 'category': 'Low'}
-        }
+        logger.error(f"Error fetching {name} data: {str(e)}")
+        reason = "error"
+    _record_source(name, "fallback", start)
+    upstream_errors.inc(upstream=name, kind=reason)
+    fallbacks.inc(component=name, reason=reason)
+    return dict(FALLBACK_DATA[name]), "fallback"
+
+def _record_source(name: str, status: str, start: float) -> None:
+    elapsed = time.perf_counter() - start
+    env_source_duration.observe(elapsed, source=name, status=status)
+    record_span(f"env_{name}", start, elapsed)
+
+def _json_payload(response, provider: str) -> Dict[str, Any]:
+    """
+    Return a provider's JSON body, raising for anything else.
+
+    Fetchers must raise rather than return None, or the geo cache would
+    store the gap as a live result.
+    """
+    if not response.is_success:
+        logger.warning(f"{provider} API error: {response.status_code}")
+    response.raise_for_status()
+    data = response.json()
+    if not isinstance(data, dict):
+        raise ValueError(f"{provider} API returned {type(data).__name__}, expected a JSON object")
+    return data
 
 async def get_weather_data(lat: float, lon: float) -> Dict[str, Any]:
     """Get weather data from Open-Meteo (free, no API key required)."""
     url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,precipitation&hourly=temperature_2m,relative_humidity_2m,precipitation&timezone=auto"
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            current = data.get('current', {})
-            return {
-                'temperature': current.get('temperature_2m', 25),
-                'humidity': current.get('relative_humidity_2m', 50),
-                'precipitation': current.get('precipitation', 0)
-            }
-        else:
-            logger.warning(f"Open-Meteo API error: {response.status_code}")
-            return {'temperature': 25, 'humidity': 50, 'precipitation': 0}
+    client = get_http_client()
+    response = await client.get(url)
+    data = _json_payload(response, "Open-Meteo")
+    current = data.get('current', {})
+    return {
+        'temperature': current.get('temperature_2m', 25),
+        'humidity': current.get('relative_humidity_2m', 50),
+        'precipitation': current.get('precipitation', 0)
+    }
 
 async def get_drought_data(lat: float, lon: float) -> Dict[str, Any]:
     """Get drought data from US Drought Monitor."""
@@ -79,27 +134,23 @@ async def get_vegetation_data(lat: float, lon: float) -> Dict[str, Any]:
     # NASA POWER API provides meteorological data including some vegetation-related parameters
     url = f"https://power.larc.nasa.gov/api/temporal/daily/point?start=20240101&end=20240102&latitude={lat}&longitude={lon}&community=RE&parameters=T2M,RH2M,PRECTOTCORR,ALLSKY_SFC_SW_DWN&format=json"
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            properties = data.get('properties', {})
-            parameter_data = properties.get('parameter', {})
-            
-            # Extract some relevant parameters
-            # Note: POWER API doesn't provide direct NDVI, but we can use solar radiation as proxy
-            solar_radiation = parameter_data.get('ALLSKY_SFC_SW_DWN', {})
-            if solar_radiation:
-                # Use solar radiation as a proxy for vegetation health (higher radiation = healthier vegetation)
-                latest_value = list(solar_radiation.values())[0] if solar_radiation else 200
-                # Convert to 0-1 scale roughly
-                ndvi_proxy = min(1.0, max(0.0, latest_value / 300))
-                return {'ndvi': ndvi_proxy * 100}  # Convert to 0-100 scale
-            
-            return {'ndvi': 0.6}
-        else:
-            logger.warning(f"NASA POWER API error: {response.status_code}")
-            return {'ndvi': 0.6}
+    client = get_http_client()
+    response = await client.get(url)
+    data = _json_payload(response, "NASA POWER")
+    properties = data.get('properties', {})
+    parameter_data = properties.get('parameter', {})
+    
+    # Extract some relevant parameters
+    # Note: POWER API doesn't provide direct NDVI, but we can use solar radiation as proxy
+    solar_radiation = parameter_data.get('ALLSKY_SFC_SW_DWN', {})
+    if solar_radiation:
+        # Use solar radiation as a proxy for vegetation health (higher radiation = healthier vegetation)
+        latest_value = list(solar_radiation.values())[0] if solar_radiation else 200
+        # Convert to 0-1 scale roughly
+        ndvi_proxy = min(1.0, max(0.0, latest_value / 300))
+        return {'ndvi': ndvi_proxy * 100}  # Convert to 0-100 scale
+    
+    return {'ndvi': 0.6}
 
 async def get_fire_weather_data(lat: float, lon: float) -> Dict[str, Any]:
     """Get fire weather data."""
@@ -1,41 +1,121 @@
 import os
-from typing import Dict, Any, Optional
+import asyncio
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from loguru import logger
+from memory_store import AssessmentStore
+from risk_cache import risk_cache
+from metrics import timed, fallbacks
 
 # Try to import motor, fallback to in-memory storage if not available
 try:
     import motor.motor_asyncio
+    from bson import ObjectId
+    from write_batcher import WriteBatcher, is_transient
     MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-    client = motor.motor_asyncio.AsyncIOMotorClient(MONGODB_URL)
+    MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+    MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+    client = motor.motor_asyncio.AsyncIOMotorClient(
+        MONGODB_URL,
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE
+    )
     db = client.drought_fire_db
     assessments_collection = db.assessments
     MONGODB_AVAILABLE = True
+    
+    # Write-behind batching of single inserts into insert_many
+    MONGO_WRITE_BATCHING = os.getenv("MONGO_WRITE_BATCHING", "true").lower() == "true"
+    MONGO_BATCH_SIZE = int(os.getenv("MONGO_BATCH_SIZE", "100"))
+    MONGO_BATCH_INTERVAL_MS = int(os.getenv("MONGO_BATCH_INTERVAL_MS", "50"))
+    # Transient insert failures are retried with backoff up to this many times per
+    # document; documents that fail permanently or run out of attempts are logged
+    # and appended to the dead-letter file, if set
+    MONGO_WRITE_MAX_ATTEMPTS = int(os.getenv("MONGO_WRITE_MAX_ATTEMPTS", "8"))
+    MONGO_DEAD_LETTER_PATH = os.getenv("MONGO_DEAD_LETTER_PATH", "")
+    write_batcher = WriteBatcher(
+        assessments_collection,
+        max_batch=MONGO_BATCH_SIZE,
+        flush_interval=MONGO_BATCH_INTERVAL_MS / 1000,
+        max_attempts=MONGO_WRITE_MAX_ATTEMPTS,
+        dead_letter_path=MONGO_DEAD_LETTER_PATH
+    ) if MONGO_WRITE_BATCHING else None
 except ImportError:
     MONGODB_AVAILABLE = False
     logger.warning("MongoDB not available, using in-memory storage")
-    # In-memory storage fallback
-    in_memory_storage = {}
+    # Embedded, bounded and indexed storage fallback
+    memory_store = AssessmentStore()
+
+def _add_location(assessment_data: Dict[str, Any]) -> None:
+    """Attach a GeoJSON point for the 2dsphere index when coordinates are present."""
+    latitude = assessment_data.get('latitude')
+    longitude = assessment_data.get('longitude')
+    if latitude is not None and longitude is not None:
+        assessment_data['location'] = {'type': 'Point', 'coordinates': [longitude, latitude]}
+
+async def ensure_indexes() -> None:
+    """
+    Create MongoDB indexes used by location and history queries.
+    
+    Safe to call on every startup; existing indexes are left untouched.
+    """
+    if not MONGODB_AVAILABLE:
+        return
+    try:
+        # Backfill GeoJSON points on documents written before the location field existed
+        await assessments_collection.update_many(
+            {"location": {"$exists": False}, "latitude": {"$type": "number"}, "longitude": {"$type": "number"}},
+            [{"$set": {"location": {"type": "Point", "coordinates": ["$longitude", "$latitude"]}}}]
+        )
+        await assessments_collection.create_index([("location", "2dsphere")])
+        await assessments_collection.create_index([("timestamp", -1)])
+        logger.info("Ensured MongoDB indexes on assessments")
+    except Exception as e:
+        logger.error(f"Error creating MongoDB indexes: {str(e)}")
+
+async def flush_writes() -> None:
+    """Write any assessments still queued in the write-behind batcher or the embedded store's log."""
+    if MONGODB_AVAILABLE and write_batcher is not None:
+        await write_batcher.close()
+    elif not MONGODB_AVAILABLE:
+        await asyncio.to_thread(memory_store.flush)
 
-async def save_assessment(assessment_data: Dict[str, Any]) -> str:
+def is_transient_write_error(error: Exception) -> bool:
+    """Whether a failed save_assessment may succeed if simply retried."""
+    return MONGODB_AVAILABLE and is_transient(error)
+
+async def save_assessment(assessment_data: Dict[str, Any], batched: bool = True) -> str:
     """
     Save assessment data to database.
     
-    Returns the assessment ID.
+    Returns the assessment ID. With batched=False the document is written
+    before this returns and a failed write raises, instead of going through
+    the write-behind batcher; Celery tasks use this so they never report an
+    id that was not written.
     """
     try:
         # Add timestamp
         assessment_data['timestamp'] = datetime.utcnow()
+        _add_location(assessment_data)
         
-        if MONGODB_AVAILABLE:
-            # Insert document
-            result = await assessments_collection.insert_one(assessment_data)
-            assessment_id = str(result.inserted_id)
-        else:
-            # Use in-memory storage
-            import uuid
-            assessment_id = str(uuid.uuid4())
-            in_memory_storage[assessment_id] = assessment_data
+        with timed("db_write"):
+            if MONGODB_AVAILABLE:
+                if write_batcher is not None and batched:
+                    # Queue for the next insert_many; the id is assigned client-side
+                    assessment_id = write_batcher.add(assessment_data)
+                else:
+                    # Insert document
+                    result = await assessments_collection.insert_one(assessment_data)
+                    assessment_id = str(result.inserted_id)
+            else:
+                # Use in-memory storage
+                assessment_id = memory_store.insert(assessment_data)
+                fallbacks.inc(component="database", reason="memory_store")
+        
+        # Assessments are immutable, so the result can be cached at write time
+        # (in the writing process only; the API warms its own from task results)
+        if assessment_data.get('risk_assessment') is not None:
+            risk_cache.set(assessment_id, assessment_data['risk_assessment'])
         
         logger.info(f"Saved assessment with ID: {assessment_id}")
         return assessment_id
@@ -44,14 +124,55 @@ async def save_assessment(assessment_data: Dict[str, Any]) -> str:
         logger.error(f"Error saving assessment: {str(e)}")
         raise
 
-async def get_assessment(assessment_id: str) -> Optional[Dict[str, Any]]:
+async def save_assessments(assessments: List[Dict[str, Any]]) -> List[str]:
+    """
+    Save many assessments with a single bulk insert.
+    
+    Returns the assessment IDs in input order.
+    """
+    if not assessments:
+        return []
+    
+    try:
+        timestamp = datetime.utcnow()
+        for assessment_data in assessments:
+            assessment_data['timestamp'] = timestamp
+            _add_location(assessment_data)
+        
+        with timed("db_write"):
+            if MONGODB_AVAILABLE:
+                result = await assessments_collection.insert_many(assessments, ordered=True)
+                assessment_ids = [str(inserted_id) for inserted_id in result.inserted_ids]
+            else:
+                assessment_ids = memory_store.insert_many(assessments)
+                fallbacks.inc(component="database", reason="memory_store")
+        
+        for assessment_id, assessment_data in zip(assessment_ids, assessments):
+            if assessment_data.get('risk_assessment') is not None:
+                risk_cache.set(assessment_id, assessment_data['risk_assessment'])
+        
+        logger.info(f"Saved {len(assessment_ids)} assessments in bulk")
+        return assessment_ids
+        
+    except Exception as e:
+        logger.error(f"Error saving assessments: {str(e)}")
+        raise
+
+async def get_assessment(assessment_id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
     """
     Retrieve assessment by ID.
+    
+    If fields is given only those top-level fields (plus _id) are fetched.
     """
     try:
         if MONGODB_AVAILABLE:
-            from bson import ObjectId
-            assessment = await assessments_collection.find_one({"_id": ObjectId(assessment_id)})
+            object_id = ObjectId(assessment_id)
+            assessment = write_batcher.get_pending(object_id) if write_batcher is not None else None
+            if assessment is not None:
+                assessment = {key: assessment[key] for key in ['_id', *(fields or assessment.keys())] if key in assessment}
+            else:
+                projection = {field: 1 for field in fields} if fields else None
+                assessment = await assessments_collection.find_one({"_id": object_id}, projection)
             
             if assessment:
                 # Convert ObjectId to string
@@ -60,7 +181,7 @@ async def get_assessment(assessment_id: str) -> Optional[Dict[str, Any]]:
                 return assessment
         else:
             # Check in-memory storage
-            assessment = in_memory_storage.get(assessment_id)
+            assessment = memory_store.get(assessment_id, fields)
             if assessment:
                 logger.info(f"Retrieved assessment from memory: {assessment_id}")
                 return assessment
@@ -72,24 +193,46 @@ async def get_assessment(assessment_id: str) -> Optional[Dict[str, Any]]:
         logger.error(f"Error retrieving assessment: {str(e)}")
         raise
 
-async def get_assessments_by_location(latitude: float, longitude: float, radius_km: float = 10) -> list:
+async def get_assessments_by_location(
+    latitude: float,
+    longitude: float,
+    radius_km: float = 10,
+    sort_by: str = "distance",
+    limit: int = 50
+) -> list:
     """
-    Get historical assessments for a location within radius.
+    Get historical assessments within radius_km of a location.
+    
+    Uses $geoNear on the 2dsphere index (or the in-memory geohash index) for a
+    true great-circle radius. Results carry 'distance_km' and are sorted by
+    distance, or newest first when sort_by="time".
     """
     try:
-        # Calculate radius in degrees (approximate)
-        radius_deg = radius_km / 111  # 1 degree ≈ 111 km
-        
-        query = {
-            "latitude": {"$gte": latitude - radius_deg, "$lte": latitude + radius_deg},
-            "longitude": {"$gte": longitude - radius_deg, "$lte": longitude + radius_deg}
-        }
-        
-        assessments = await assessments_collection.find(query).sort("timestamp", -1).to_list(length=50)
-        
-        # Convert ObjectIds to strings
-        for assessment in assessments:
-            assessment['_id'] = str(assessment['_id'])
+        if MONGODB_AVAILABLE:
+            pipeline = [
+                {
+                    "$geoNear": {
+                        "near": {"type": "Point", "coordinates": [longitude, latitude]},
+                        "distanceField": "distance_m",
+                        "maxDistance": radius_km * 1000,
+                        "spherical": True
+                    }
+                }
+            ]
+            # The nested environmental data is never needed by location queries
+            pipeline.append({"$project": {"environmental_data": 0}})
+            if sort_by == "time":
+                pipeline.append({"$sort": {"timestamp": -1}})
+            pipeline.append({"$limit": limit})
+            
+            assessments = await assessments_collection.aggregate(pipeline).to_list(length=limit)
+            
+            # Convert ObjectIds to strings
+            for assessment in assessments:
+                assessment['_id'] = str(assessment['_id'])
+                assessment['distance_km'] = assessment.pop('distance_m') / 1000
+        else:
+            assessments = memory_store.query_radius(latitude, longitude, radius_km, sort_by=sort_by, limit=limit)
         
         return assessments
         
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from loguru import logger
+
+# Optional Redis tier
+try:
+    import redis.asyncio as aioredis
+    REDIS_CLIENT_AVAILABLE = True
+except ImportError:
+    REDIS_CLIENT_AVAILABLE = False
+
+# Tile size in degrees used to quantize coordinates (0.01 deg ~ 1.1 km)
+GEO_CACHE_TILE_DEG = float(os.getenv("GEO_CACHE_TILE_DEG", "0.01"))
+GEO_CACHE_MAX_ENTRIES = int(os.getenv("GEO_CACHE_MAX_ENTRIES", "10000"))
+GEO_CACHE_USE_REDIS = os.getenv("GEO_CACHE_USE_REDIS", "false").lower() == "true"
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+# Per-source TTL in seconds; current weather goes stale much faster than daily POWER values
+SOURCE_TTLS = {
+    'weather': int(os.getenv("GEO_CACHE_TTL_WEATHER", "600")),
+    'drought': int(os.getenv("GEO_CACHE_TTL_DROUGHT", "21600")),
+    'vegetation': int(os.getenv("GEO_CACHE_TTL_VEGETATION", "86400")),
+    'fire_weather': int(os.getenv("GEO_CACHE_TTL_FIRE_WEATHER", "3600")),
+}
+DEFAULT_TTL = 600
+
+def tile_key(source: str, latitude: float, longitude: float) -> str:
+    """Build the cache key for a source and the tile containing the coordinates."""
+    tile_lat = int(latitude // GEO_CACHE_TILE_DEG)
+    tile_lon = int(longitude // GEO_CACHE_TILE_DEG)
+    return f"env:{source}:{tile_lat}:{tile_lon}"
+
+class GeoTileCache:
+    """
+    Two-tier TTL cache for environmental lookups keyed by geo tile and source.
+
+    The in-process tier is a bounded LRU; the Redis tier is optional and shared
+    between the API and Celery workers. Concurrent misses for the same key share
+    one in-flight fetch.
+    """
+
+    def __init__(self, max_entries: int = GEO_CACHE_MAX_ENTRIES, use_redis: bool = GEO_CACHE_USE_REDIS):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._redis = None
+        self.use_redis = use_redis and REDIS_CLIENT_AVAILABLE
+        if use_redis and not REDIS_CLIENT_AVAILABLE:
+            logger.warning("redis package not available, geo cache running in-process only")
+        self.hits = 0
+        self.misses = 0
+
+    def get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return an unexpired in-process entry, refreshing its LRU position."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set_local(self, key: str, value: Dict[str, Any], ttl: int) -> None:
+        """Store an in-process entry, evicting the least recently used when full."""
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get_redis(self):
+        if self._redis is None:
+            self._redis = aioredis.from_url(REDIS_URL)
+        return self._redis
+
+    async def _get_remote(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.use_redis:
+            return None
+        try:
+            raw = await self._get_redis().get(key)
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Geo cache Redis read failed: {str(e)}")
+            return None
+
+    async def _set_remote(self, key: str, value: Dict[str, Any], ttl: int) -> None:
+        if not self.use_redis:
+            return
+        try:
+            await self._get_redis().set(key, json.dumps(value), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Geo cache Redis write failed: {str(e)}")
+
+    async def get_or_fetch(
+        self,
+        source: str,
+        latitude: float,
+        longitude: float,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return (value, cached) for the source at the given coordinates.
+
+        Only successful fetches are cached; exceptions propagate to every
+        caller waiting on the same in-flight request.
+        """
+        key = tile_key(source, latitude, longitude)
+        value = self.get_local(key)
+        if value is not None:
+            self.hits += 1
+            return dict(value), True
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(key, source, fetch))
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._finish(key, f))
+
+        # Shield so a caller timing out does not cancel the fetch for other waiters
+        value, cached = await asyncio.shield(future)
+        return dict(value), cached
+
+    def _finish(self, key: str, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        # Mark the exception retrieved in case every waiter already timed out
+        if not future.cancelled():
+            future.exception()
+
+    async def _load(self, key: str, source: str, fetch) -> Tuple[Dict[str, Any], bool]:
+        ttl = SOURCE_TTLS.get(source, DEFAULT_TTL)
+        value = await self._get_remote(key)
+        if value is not None:
+            self.hits += 1
+            self.set_local(key, value, ttl)
+            return value, True
+
+        self.misses += 1
+        value = await fetch()
+        self.set_local(key, value, ttl)
+        await self._set_remote(key, value, ttl)
+        return value, False
+
+    def clear(self) -> None:
+        """Drop all in-process entries."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+        }
+
+# Process-wide cache instance
+env_cache = GeoTileCache()
@@ -0,0 +1,134 @@
+import math
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Finest geohash precision kept by GeohashIndex (6 chars ~ 1.2 km x 0.6 km)
+MAX_PRECISION = 6
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def geohash_encode(latitude: float, longitude: float, precision: int = MAX_PRECISION) -> str:
+    """Encode coordinates as a base32 geohash of the given length."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            bounds[0] = mid
+        else:
+            bits <<= 1
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """Return (lat_degrees, lon_degrees) spanned by a geohash cell."""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+def covering_cells(latitude: float, longitude: float, radius_km: float) -> Tuple[int, Set[str]]:
+    """
+    Return (precision, cells) whose union covers the circle around a point.
+
+    Picks the finest precision whose cells are at least as large as the radius
+    (accounting for longitude shrinking with latitude), then takes the cell
+    containing the point and its eight neighbours. Precision 0 means the
+    radius is too large to cover with cells and the caller should scan.
+    """
+    radius_lat = radius_km / 111.32
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    radius_lon = radius_km / (111.32 * cos_lat)
+
+    precision = MAX_PRECISION
+    while precision > 0:
+        cell_lat, cell_lon = geohash_cell_size(precision)
+        if cell_lat >= radius_lat and cell_lon >= radius_lon:
+            break
+        precision -= 1
+    if precision == 0:
+        return 0, set()
+
+    cells = set()
+    for dlat in (-cell_lat, 0.0, cell_lat):
+        for dlon in (-cell_lon, 0.0, cell_lon):
+            lat = min(90.0, max(-90.0, latitude + dlat))
+            lon = (longitude + dlon + 180.0) % 360.0 - 180.0
+            cells.add(geohash_encode(lat, lon, precision))
+    return precision, cells
+
+class GeohashIndex:
+    """
+    Spatial index mapping geohash prefixes to record keys.
+
+    Each record is registered under its geohash at every precision from 1 to
+    MAX_PRECISION, so a radius query only touches the nine cells at the
+    precision that matches the radius.
+    """
+
+    def __init__(self):
+        self._cells: List[Dict[str, Set[Hashable]]] = [dict() for _ in range(MAX_PRECISION + 1)]
+        self._points: Dict[Hashable, Tuple[float, float, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def add(self, key: Hashable, latitude: float, longitude: float) -> str:
+        """Index a record's location and return its full-precision geohash."""
+        if key in self._points:
+            self.remove(key)
+        geohash = geohash_encode(latitude, longitude, MAX_PRECISION)
+        self._points[key] = (latitude, longitude, geohash)
+        for precision in range(1, MAX_PRECISION + 1):
+            self._cells[precision].setdefault(geohash[:precision], set()).add(key)
+        return geohash
+
+    def remove(self, key: Hashable) -> None:
+        """Drop a record from the index if present."""
+        entry = self._points.pop(key, None)
+        if entry is None:
+            return
+        geohash = entry[2]
+        for precision in range(1, MAX_PRECISION + 1):
+            bucket = self._cells[precision].get(geohash[:precision])
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._cells[precision][geohash[:precision]]
+
+    def query_radius(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[Hashable, float]]:
+        """Return (key, distance_km) for every record within radius_km, nearest first."""
+        precision, cells = covering_cells(latitude, longitude, radius_km)
+        if precision == 0:
+            candidates: Iterable[Hashable] = self._points.keys()
+        else:
+            candidates = set()
+            for cell in cells:
+                candidates.update(self._cells[precision].get(cell, ()))
+
+        results = []
+        for key in candidates:
+            lat, lon, _ = self._points[key]
+            distance = haversine_km(latitude, longitude, lat, lon)
+            if distance <= radius_km:
+                results.append((key, distance))
+        results.sort(key=lambda item: item[1])
+        return results
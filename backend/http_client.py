@@ -0,0 +1,68 @@
+import asyncio
+import importlib.util
+import os
+from typing import Optional
+import httpx
+from loguru import logger
+
+# Connection pool settings for outbound provider calls
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10.0"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5.0"))
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def build_http_client() -> httpx.AsyncClient:
+    """Create a pooled AsyncClient using the configured limits and timeouts."""
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared pooled client for the running event loop.
+
+    Connections are bound to the loop that opened them, so a new client is
+    created if the caller is running on a different loop than the last one;
+    the previous client is closed on its own loop, or dropped if that loop
+    is no longer running.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is not None and not _client.is_closed and _client_loop is not loop:
+        _discard_client(_client, _client_loop)
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = build_http_client()
+        _client_loop = loop
+        logger.info(f"Created shared HTTP client (http2={HTTP2_AVAILABLE}, max_connections={HTTP_MAX_CONNECTIONS})")
+    return _client
+
+def _discard_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Release a client left behind by a different event loop."""
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        logger.warning("Event loop changed, closing the previous shared HTTP client on its own loop")
+    else:
+        # Its connections can only be closed from the loop that opened them
+        logger.warning("Event loop changed, dropping the previous shared HTTP client; its loop is no longer running")
+
+async def close_http_client() -> None:
+    """Close the shared client and release its pooled connections."""
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("Closed shared HTTP client")
+    _client = None
+    _client_loop = None
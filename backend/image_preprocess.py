@@ -0,0 +1,123 @@
+import io
+import os
+import time
+from typing import Any, BinaryIO, Dict, List, Tuple, Union
+from PIL import Image, ImageOps
+from loguru import logger
+
+# Longest edge an image (or tile) is reduced to before analysis
+IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", "1024"))
+# Images with an edge above this are split into tiles and scored per tile
+IMAGE_TILE_THRESHOLD = int(os.getenv("IMAGE_TILE_THRESHOLD", "4096"))
+IMAGE_TILE_SIZE = int(os.getenv("IMAGE_TILE_SIZE", "2048"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+
+class PreparedImage:
+    """
+    A decoded, downsampled, metadata-free image plus per-stage statistics.
+
+    `tiles` holds (box, image) pairs when the source was large enough to be
+    tiled; otherwise it is empty and `image` is the whole downsampled picture.
+    """
+
+    __slots__ = ("image", "tiles", "stats")
+
+    def __init__(self, image: Image.Image, tiles: List[Tuple[Tuple[int, int, int, int], Image.Image]], stats: Dict[str, Any]):
+        self.image = image
+        self.tiles = tiles
+        self.stats = stats
+
+def _source_size(source: Union[str, BinaryIO]) -> int:
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    position = source.tell()
+    source.seek(0, io.SEEK_END)
+    size = source.tell()
+    source.seek(position)
+    return size
+
+def downsample(image: Image.Image, max_edge: int = IMAGE_MAX_EDGE) -> Image.Image:
+    """
+    Reduce an image so its longest edge is at most max_edge, dropping metadata.
+
+    Uses Image.reduce for the cheap integer-factor part and a final resample
+    for the remainder. The result is a fresh RGB image without EXIF/ICC info.
+    """
+    image = image.convert("RGB")
+    longest = max(image.size)
+    if longest > max_edge:
+        factor = longest // max_edge
+        if factor >= 2:
+            image = image.reduce(factor)
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    clean = Image.new("RGB", image.size)
+    clean.paste(image)
+    return clean
+
+def split_tiles(image: Image.Image, tile_size: int = IMAGE_TILE_SIZE) -> List[Tuple[Tuple[int, int, int, int], Image.Image]]:
+    """Split an image into a grid of (box, tile) crops no larger than tile_size."""
+    width, height = image.size
+    tiles = []
+    for top in range(0, height, tile_size):
+        for left in range(0, width, tile_size):
+            box = (left, top, min(left + tile_size, width), min(top + tile_size, height))
+            tiles.append((box, image.crop(box)))
+    return tiles
+
+def preprocess_image(source: Union[str, BinaryIO], max_edge: int = IMAGE_MAX_EDGE) -> PreparedImage:
+    """
+    Decode an image lazily, downsample it and tile it if it is very large.
+
+    For JPEG sources Image.draft lets the decoder skip straight to a reduced
+    scale. Stats record source bytes, dimensions and time per stage in ms.
+    """
+    stats: Dict[str, Any] = {'source_bytes': _source_size(source)}
+
+    start = time.perf_counter()
+    image = Image.open(source)
+    stats['source_size'] = image.size
+    stats['format'] = image.format
+    if image.format == "JPEG" and max(image.size) <= IMAGE_TILE_THRESHOLD:
+        # Let the JPEG decoder downscale by a power of two while decoding
+        image.draft("RGB", (max_edge, max_edge))
+    image.load()
+    # Apply EXIF orientation before the metadata is dropped
+    image = ImageOps.exif_transpose(image)
+    stats['decode_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    tiles = []
+    if max(image.size) > IMAGE_TILE_THRESHOLD:
+        tiles = [(box, downsample(tile, max_edge)) for box, tile in split_tiles(image)]
+    prepared = downsample(image, max_edge)
+    stats['resize_ms'] = (time.perf_counter() - start) * 1000
+    stats['output_size'] = prepared.size
+    stats['tiles'] = len(tiles)
+
+    return PreparedImage(prepared, tiles, stats)
+
+def encode_image(image: Image.Image, stats: Dict[str, Any] = None, quality: int = IMAGE_JPEG_QUALITY) -> bytes:
+    """
+    Encode a prepared image as JPEG for sending to a model.
+
+    If stats are given, records the encoded size, bytes saved against the
+    source and encode time.
+    """
+    start = time.perf_counter()
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    data = buffer.getvalue()
+    if stats is not None:
+        stats['encode_ms'] = (time.perf_counter() - start) * 1000
+        stats['encoded_bytes'] = len(data)
+        stats['bytes_saved'] = stats.get('source_bytes', len(data)) - len(data)
+    return data
+
+def log_preprocess_stats(label: str, stats: Dict[str, Any]) -> None:
+    """Log one line summarizing a preprocessing run."""
+    logger.info(
+        f"{label}: {stats.get('source_size')} -> {stats.get('output_size')}, "
+        f"{stats.get('tiles', 0)} tiles, source {stats.get('source_bytes', 0)} B, "
+        f"saved {stats.get('bytes_saved', 0)} B, decode {stats.get('decode_ms', 0):.1f} ms, "
+        f"resize {stats.get('resize_ms', 0):.1f} ms, encode {stats.get('encode_ms', 0):.1f} ms"
+    )
@@ -1,28 +1,28 @@
-import google.generativeai as genai
 import os
+import re
 from PIL import Image
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO, Optional, Union
 import asyncio
 from loguru import logger
+from llm_pool import run_llm
+from llm_clients import get_model, call_with_retry, VISION_MODEL
+from vision_cache import vision_cache, image_fingerprint
+from vegetation_index import compute_vegetation_indices
+from image_preprocess import preprocess_image, encode_image, log_preprocess_stats
+from metrics import timed, fallbacks
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Prompt for vegetation analysis; bump PROMPT_VERSION whenever it changes so
+# cached results from the old prompt are not reused
+PROMPT_VERSION = "1"
 
-async def analyze_vegetation_health(image_path: str) -> float:
-    """
-    Analyze vegetation health from image using Gemini Vision.
-    
-    Returns a health score from 0-100.
-    """
-    try:
-        # Load image
-        image = Image.open(image_path)
-        
-        # Create model
-        model = genai.GenerativeModel('gemini-pro-vision')
-        
-        # Prompt for vegetation analysis
-        prompt = """
+# Local index fast path: skip the LLM when the local score is this confident
+LOCAL_INDEX_ENABLED = os.getenv("LOCAL_INDEX_ENABLED", "true").lower() == "true"
+LOCAL_INDEX_MIN_CONFIDENCE = float(os.getenv("LOCAL_INDEX_MIN_CONFIDENCE", "0.6"))
+# ...and at least this much of the frame is green. Dead grass and a photo of
+# something other than vegetation both score near 0, and only the LLM can
+# tell them apart
+LOCAL_INDEX_MIN_GREEN_FRACTION = float(os.getenv("LOCAL_INDEX_MIN_GREEN_FRACTION", "0.25"))
+VEGETATION_PROMPT = """
         Analyze this vegetation/grass image and provide a health assessment.
         Consider:
         - Color and greenness (healthy green vs. yellow/brown)
@@ -40,36 +40,126 @@ async def analyze_vegetation_health(image_path: str) -> float:
         Score: [number]
         Explanation: [brief text]
         """
+
+async def analyze_vegetation_health(image_source: Union[str, BinaryIO]) -> float:
+    """
+    Analyze vegetation health from image using Gemini Vision.
+    
+    Accepts a file path or a seekable file object (e.g. an upload buffer).
+    The image goes through the shared preprocessor first; very large images
+    are tiled, scored in parallel and combined as an area-weighted mean.
+    Returns a health score from 0-100.
+    """
+    try:
+        with timed("image_decode"):
+            prepared = await asyncio.to_thread(preprocess_image, image_source)
         
-        # Generate response
-        response = model.generate_content([prompt, image])
-        response_text = response.text
+        if prepared.tiles:
+            scores = await asyncio.gather(*[_score_image(tile) for _, tile in prepared.tiles])
+            areas = [(x2 - x1) * (y2 - y1) for (x1, y1, x2, y2), _ in prepared.tiles]
+            score = round(sum(s * a for s, a in zip(scores, areas)) / sum(areas), 1)
+            logger.info(f"Vegetation health score over {len(scores)} tiles: {score}")
+        else:
+            score = await _score_image(prepared.image, prepared.stats)
         
-        # Parse score from response
-        score_line = [line for line in response_text.split('\n') if line.startswith('Score:')]
-        if score_line:
-            score_str = score_line[0].replace('Score:', '').strip()
-            try:
-                score = float(score_str)
-                score = max(0, min(100, score))  # Clamp to 0-100
-                logger.info(f"Vegetation health score: {score}")
-                return score
-            except ValueError:
-                logger.warning(f"Could not parse score from response: {score_str}")
+        log_preprocess_stats("Vegetation image", prepared.stats)
+        return score
         
-        # Fallback: try to extract any number
-        import re
-        numbers = re.findall(r'\d+\.?\d*', response_text)
-        if numbers:
-            score = float(numbers[0])
-            score = max(0, min(100, score))
-            logger.info(f"Extracted vegetation health score: {score}")
-            return score
+    except Exception as e:
+        logger.error(f"Error analyzing vegetation health: {str(e)}")
+        fallbacks.inc(component="vision", reason="error")
+        return 50.0  # Default neutral score
+
+async def _score_image(image: Image.Image, stats: Optional[Dict[str, Any]] = None) -> float:
+    """
+    Score one preprocessed image or tile.
+    
+    Results are cached by image fingerprint, so resubmitted photos skip the
+    model call, and a local vegetation index answers directly when it is
+    confident enough about a mostly green scene; its answers are cached the
+    same way. Low-green images always go to the LLM.
+    """
+    try:
+        fingerprint = await asyncio.to_thread(image_fingerprint, image)
+        # The near-match scan and the SQLite tier are blocking work
+        cached = await asyncio.to_thread(vision_cache.get, fingerprint, PROMPT_VERSION)
+        if cached is not None:
+            logger.info(f"Vegetation health score (cached): {cached['score']}")
+            return cached['score']
+        
+        if LOCAL_INDEX_ENABLED:
+            indices = await asyncio.to_thread(compute_vegetation_indices, image)
+            if local_index_decides(indices):
+                logger.info(f"Vegetation health score (local index, confidence {indices['confidence']}): {indices['score']}")
+                await asyncio.to_thread(vision_cache.set, fingerprint, PROMPT_VERSION, {
+                    'score': indices['score'],
+                    'explanation': f"Local vegetation index (confidence {indices['confidence']})",
+                })
+                return indices['score']
+        
+        # Shared model client from the registry
+        model = get_model(VISION_MODEL)
+        
+        # Send the downsampled JPEG rather than the original upload
+        image_bytes = await asyncio.to_thread(encode_image, image, stats)
+        
+        # Generate response
+        # Run the blocking SDK call on the bounded LLM pool
+        with timed("llm_vision"):
+            response = await run_llm(
+                call_with_retry,
+                model.generate_content,
+                [VEGETATION_PROMPT, {'mime_type': 'image/jpeg', 'data': image_bytes}]
+            )
+        
+        result = parse_vegetation_response(response.text)
+        if result is not None:
+            await asyncio.to_thread(vision_cache.set, fingerprint, PROMPT_VERSION, result)
+            logger.info(f"Vegetation health score: {result['score']}")
+            return result['score']
         
         # Default fallback
         logger.warning("Could not extract health score, using default")
+        fallbacks.inc(component="vision", reason="unparsed")
         return 50.0
         
     except Exception as e:
-        logger.error(f"Error analyzing vegetation health: {str(e)}")
-        return 50.0  # Default neutral score
+        logger.error(f"Error scoring vegetation image: {str(e)}")
+        fallbacks.inc(component="vision", reason="error")
+        return 50.0
+
+def local_index_decides(indices: Dict[str, Any]) -> bool:
+    """Whether the local index result is trusted without asking the LLM."""
+    return (
+        indices['confidence'] >= LOCAL_INDEX_MIN_CONFIDENCE
+        and indices['green_fraction'] >= LOCAL_INDEX_MIN_GREEN_FRACTION
+    )
+
+def parse_vegetation_response(response_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse the model's "Score: / Explanation:" reply.
+    
+    Returns {'score': float clamped to 0-100, 'explanation': str}, or None if
+    no score can be found.
+    """
+    lines = [line.strip() for line in response_text.split('\n')]
+    explanation_line = [line for line in lines if line.startswith('Explanation:')]
+    explanation = explanation_line[0].replace('Explanation:', '').strip() if explanation_line else ""
+    
+    # Parse score from response
+    score_line = [line for line in lines if line.startswith('Score:')]
+    if score_line:
+        score_str = score_line[0].replace('Score:', '').strip()
+        try:
+            score = max(0, min(100, float(score_str)))  # Clamp to 0-100
+            return {'score': score, 'explanation': explanation}
+        except ValueError:
+            logger.warning(f"Could not parse score from response: {score_str}")
+    
+    # Fallback: try to extract any number
+    numbers = re.findall(r'\d+\.?\d*', response_text)
+    if numbers:
+        score = max(0, min(100, float(numbers[0])))
+        return {'score': score, 'explanation': explanation}
+    
+    return None
@@ -0,0 +1,118 @@
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import google.generativeai as genai
+from dotenv import load_dotenv
+from loguru import logger
+from metrics import upstream_errors
+
+# Optional google-genai SDK (used by valuesLLM)
+try:
+    from google import genai as genai_sdk
+    GENAI_SDK_AVAILABLE = True
+except ImportError:
+    GENAI_SDK_AVAILABLE = False
+
+load_dotenv()
+
+# Model names, overridable per deployment
+CHAT_MODEL = os.getenv("GEMINI_CHAT_MODEL", "gemini-2.0-flash-exp")
+VISION_MODEL = os.getenv("GEMINI_VISION_MODEL", "gemini-pro-vision")
+VALUES_MODEL = os.getenv("GEMINI_VALUES_MODEL", "gemini-2.5-flash")
+
+# Retry policy for rate-limited or temporarily unavailable calls
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8.0"))
+# HTTP statuses worth retrying: rate limited and service unavailable
+RETRYABLE_STATUS_CODES = {429, 503}
+
+_lock = threading.Lock()
+_configured = False
+_models: Dict[str, "genai.GenerativeModel"] = {}
+_client = None
+
+def _api_key() -> str:
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY not found in environment variables")
+    return api_key
+
+def get_model(model_name: str) -> "genai.GenerativeModel":
+    """
+    Return the process-wide GenerativeModel for a model name.
+
+    The SDK is configured once and each model is built once, so its gRPC
+    channel and connections are kept alive and reused across calls.
+    """
+    global _configured
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+    with _lock:
+        if not _configured:
+            genai.configure(api_key=_api_key())
+            _configured = True
+        model = _models.get(model_name)
+        if model is None:
+            model = genai.GenerativeModel(model_name)
+            _models[model_name] = model
+            logger.info(f"Created Gemini model client for {model_name}")
+        return model
+
+def get_genai_client():
+    """Return the process-wide google-genai Client, created on first use."""
+    global _client
+    if _client is not None:
+        return _client
+    if not GENAI_SDK_AVAILABLE:
+        raise ImportError("google-genai package not available")
+    with _lock:
+        if _client is None:
+            _client = genai_sdk.Client(api_key=_api_key())
+            logger.info("Created google-genai client")
+        return _client
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an SDK error is a rate limit or temporary outage worth retrying."""
+    code = getattr(error, "code", None)
+    try:
+        return int(code) in RETRYABLE_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+def call_with_retry(func: Callable[..., Any], *args, max_retries: Optional[int] = None, **kwargs) -> Any:
+    """
+    Call a blocking SDK function, retrying rate-limit and 503 responses.
+
+    Meant to run on the LLM pool, so backoff sleeps block a pool thread
+    rather than the event loop. Other errors are raised immediately.
+    """
+    max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                upstream_errors.inc(upstream="gemini", kind="failed")
+                raise
+            upstream_errors.inc(upstream="gemini", kind="retried")
+            delay = backoff_delay(attempt)
+            logger.warning(f"Gemini call rate limited or unavailable ({str(e)}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+def reset_clients() -> None:
+    """Drop cached clients, e.g. after changing GEMINI_API_KEY."""
+    global _configured, _client
+    with _lock:
+        _configured = False
+        _models.clear()
+        _client = None
@@ -0,0 +1,89 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+from loguru import logger
+
+# Maximum number of Gemini calls in flight per process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+# Marks the end of a stream_llm queue
+_STREAM_END = object()
+
+def get_llm_executor() -> ThreadPoolExecutor:
+    """Return the bounded thread pool that runs blocking SDK calls."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+        logger.info(f"Created LLM thread pool with {LLM_MAX_CONCURRENCY} workers")
+    return _executor
+
+async def run_llm(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking LLM SDK call on the bounded pool without blocking the event loop.
+
+    Calls beyond LLM_MAX_CONCURRENCY wait in the pool's queue.
+    """
+    loop = asyncio.get_running_loop()
+    # Carry context variables (e.g. the sampled metrics trace) into the pool thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_llm_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+async def stream_llm(func: Callable[..., Iterable[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+    """
+    Iterate a blocking streaming SDK call on the bounded pool, yielding items as they arrive.
+
+    Closing the returned generator (e.g. when the client disconnects) stops
+    consuming the stream after the chunk in flight, which closes the
+    upstream response and frees the pool slot.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def put(item, error=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+        except RuntimeError:
+            # The loop has already been closed
+            cancelled.set()
+
+    def produce():
+        iterator = None
+        try:
+            iterator = iter(func(*args, **kwargs))
+            for item in iterator:
+                if cancelled.is_set():
+                    break
+                put(item)
+        except Exception as e:
+            put(_STREAM_END, e)
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        put(_STREAM_END)
+
+    loop.run_in_executor(get_llm_executor(), produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _STREAM_END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        cancelled.set()
+
+def shutdown_llm_executor() -> None:
+    """Stop the pool, letting in-flight calls finish."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -1,9 +1,18 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Query, Request, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, FileResponse, PlainTextResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime
 import uvicorn
 import os
+import uuid
+import sys
+import secrets
+import asyncio
+import tempfile
 from dotenv import load_dotenv
 from loguru import logger
 
@@ -13,19 +22,57 @@ load_dotenv()
 # Import our modules
 from image_processor import analyze_vegetation_health
 from data_integrator import get_environmental_data
-from risk_engine import calculate_risk
-from database import save_assessment, get_assessment
-from chatLLM import chatLLM
+from risk_engine import calculate_risk, calculate_risk_many
+from database import save_assessment, save_assessments, get_assessment, get_assessments_by_location, ensure_indexes, flush_writes
+from chatLLM import chatLLM_async, chatLLM_stream_async, CHAT_ERROR_PREFIX
+from chat_cache import chat_cache
+from http_client import get_http_client, close_http_client
+from llm_pool import shutdown_llm_executor
+from geo_cache import env_cache
+from vision_cache import vision_cache
+from risk_cache import risk_cache, risk_etag, etag_matches, RISK_CACHE_CONTROL
+from upload_stream import read_upload, persist_upload, UPLOAD_CHUNK_SIZE
+from task_events import task_events, format_sse, TASK_EVENTS_UNKNOWN_TIMEOUT
+from metrics import registry, recent_traces, MetricsMiddleware, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 # Optional Celery import
 try:
-    from tasks import process_image_analysis
+    from celery.result import AsyncResult
+    from celery_app import celery_app, queue_depths
+    from tasks import start_image_analysis
     CELERY_AVAILABLE = True
 except ImportError:
     CELERY_AVAILABLE = False
     logger.warning("Celery not available, running synchronously")
 
-app = FastAPI(title="Drought & Wildfire Risk Assessment API", version="1.0.0")
+# Optional document pipeline (needs pytesseract); model/ holds script-style
+# modules, appended so its main.py never shadows this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "model"))
+try:
+    from documentPipeline import process_document, OUTPUT_FORMATS
+    DOCUMENTS_AVAILABLE = True
+except ImportError:
+    DOCUMENTS_AVAILABLE = False
+    logger.warning("pytesseract not available, document pipeline disabled")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open shared resources on startup and release them on shutdown.
+    """
+    get_http_client()
+    await ensure_indexes()
+    yield
+    await flush_writes()
+    await task_events.close()
+    await close_http_client()
+    shutdown_llm_executor()
+
+# Batch upload limits
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "2000"))
+BATCH_ANALYSIS_CONCURRENCY = int(os.getenv("BATCH_ANALYSIS_CONCURRENCY", "8"))
+
+app = FastAPI(title="Drought & Wildfire Risk Assessment API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -36,8 +83,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency per route; outermost so it times the whole request
+app.add_middleware(MetricsMiddleware)
+
 class UploadResponse(BaseModel):
-    assessment_id: str
+    assessment_id: Optional[str] = None
+    task_id: Optional[str] = None
+    message: str
+
+class TaskStatusResponse(BaseModel):
+    task_id: str
+    status: str
+    assessment_id: Optional[str] = None
+    detail: Optional[str] = None
+
+class BatchUploadResponse(BaseModel):
+    batch_id: str
+    assessment_ids: List[str]
     message: str
 
 class RiskResponse(BaseModel):
@@ -48,9 +110,20 @@ class RiskResponse(BaseModel):
     risk_category: str
     recommendation: str
 
+class NearbyAssessment(BaseModel):
+    assessment_id: str
+    latitude: float
+    longitude: float
+    distance_km: float
+    timestamp: datetime
+    risk_assessment: RiskResponse
+
+# Plant Health Index assumed when a chat request doesn't send one
+DEFAULT_PHI = 0.5
+
 class ChatRequest(BaseModel):
     question: str
-    phi: Optional[float] = 0.5  # Default Plant Health Index
+    phi: Optional[float] = DEFAULT_PHI  # Default Plant Health Index
 
 class ChatResponse(BaseModel):
     response: str
@@ -68,21 +141,19 @@ async def upload_image_and_location(
     if not file:
         raise HTTPException(status_code=400, detail="No file uploaded")
     
+    buffer, digest, size = await read_upload(file)
+    
     try:
-        # Save uploaded file temporarily
-        file_path = f"temp_{file.filename}"
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
         if CELERY_AVAILABLE:
-            # Process asynchronously with Celery
-            task = process_image_analysis.delay(file_path, latitude, longitude)
-            assessment_id = task.id
-            message = "Assessment queued for processing"
+            # Process asynchronously with Celery; the worker needs a file on disk
+            file_path = persist_upload(buffer, digest, file.filename)
+            # Publishing to the broker is blocking I/O, keep it off the event loop
+            task_id = await asyncio.to_thread(start_image_analysis, file_path, latitude, longitude)
+            assessment_id = None
+            message = "Assessment queued for processing; poll /tasks/{task_id} for the assessment id"
         else:
-            # Process synchronously
-            veg_health = await analyze_vegetation_health(file_path)
+            # Process synchronously straight from the upload buffer
+            veg_health = await analyze_vegetation_health(buffer)
             env_data = await get_environmental_data(latitude, longitude)
             risk_result = calculate_risk(veg_health, env_data)
             
@@ -92,56 +163,372 @@ async def upload_image_and_location(
                 "vegetation_health": veg_health,
                 "environmental_data": env_data,
                 "risk_assessment": risk_result,
-                "image_path": file_path
+                "image_sha256": digest
             })
-            
-            # Clean up temp file
-            os.remove(file_path)
+            task_id = None
             message = "Assessment completed successfully"
         
         return UploadResponse(
             assessment_id=assessment_id,
+            task_id=task_id,
             message=message
         )
         
     except Exception as e:
         logger.error(f"Error processing upload: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        buffer.close()
+
+@app.post("/upload/batch", response_model=BatchUploadResponse)
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    latitudes: List[float] = Form(...),
+    longitudes: List[float] = Form(...)
+):
+    """
+    Upload many vegetation images with their locations in one request.
+    
+    The i-th file is paired with the i-th latitude and longitude. Environmental
+    data is fetched once per distinct location, all items are scored together
+    and saved with a single bulk insert.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded")
+    if len(files) != len(latitudes) or len(files) != len(longitudes):
+        raise HTTPException(status_code=400, detail="Each file needs exactly one latitude and longitude")
+    if len(files) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+    
+    try:
+        batch_id = uuid.uuid4().hex
+        semaphore = asyncio.Semaphore(BATCH_ANALYSIS_CONCURRENCY)
+        
+        async def analyze(file: UploadFile) -> float:
+            async with semaphore:
+                buffer, _, _ = await read_upload(file)
+                try:
+                    return await analyze_vegetation_health(buffer)
+                finally:
+                    buffer.close()
+        
+        veg_scores = await asyncio.gather(*[analyze(f) for f in files])
+        
+        # Fetch environmental data once per distinct location
+        item_locations = list(zip(latitudes, longitudes))
+        locations = list(dict.fromkeys(item_locations))
+        env_results = await asyncio.gather(*[get_environmental_data(lat, lon) for lat, lon in locations])
+        env_by_location = dict(zip(locations, env_results))
+        env_data = [env_by_location[location] for location in item_locations]
+        
+        risk_results = calculate_risk_many(veg_scores, env_data)
+        
+        assessment_ids = await save_assessments([
+            {
+                "batch_id": batch_id,
+                "latitude": lat,
+                "longitude": lon,
+                "vegetation_health": veg_health,
+                "environmental_data": env,
+                "risk_assessment": risk_result
+            }
+            for (lat, lon), veg_health, env, risk_result in zip(item_locations, veg_scores, env_data, risk_results)
+        ])
+        
+        logger.info(f"Batch {batch_id}: {len(files)} items, {len(locations)} distinct locations")
+        return BatchUploadResponse(
+            batch_id=batch_id,
+            assessment_ids=assessment_ids,
+            message=f"Batch of {len(assessment_ids)} assessments completed successfully"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing batch upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+async def cache_risk(assessment_id: str) -> None:
+    """
+    Load a worker-written assessment's risk result into this process's cache.
+    
+    Workers cache results in their own process, so the API warms its cache
+    when it sees a task complete, ahead of the client's /risk request.
+    """
+    if not assessment_id or assessment_id in risk_cache:
+        return
+    try:
+        assessment = await get_assessment(assessment_id, fields=["risk_assessment"])
+        if assessment and assessment.get("risk_assessment") is not None:
+            risk_cache.set(assessment_id, assessment["risk_assessment"])
+    except Exception as e:
+        logger.warning(f"Could not cache risk for {assessment_id}: {str(e)}")
+
+# Celery states mapped to the statuses reported by /tasks/{task_id}
+TASK_STATUSES = {
+    "PENDING": "pending",
+    "RECEIVED": "pending",
+    "STARTED": "processing",
+    "RETRY": "processing",
+    "SUCCESS": "completed",
+    "FAILURE": "failed",
+    "REVOKED": "failed",
+}
+
+@app.get("/tasks/{task_id}", response_model=TaskStatusResponse)
+async def get_task_status(task_id: str):
+    """
+    Get the status of a queued assessment.
+    
+    Once the task has completed the response carries the assessment id to use
+    with /risk/{assessment_id}. Unknown task ids report "pending", as Celery
+    cannot tell them apart from queued ones.
+    """
+    if not CELERY_AVAILABLE:
+        raise HTTPException(status_code=404, detail="Task queue not available")
+    
+    try:
+        result = AsyncResult(task_id, app=celery_app)
+        # Reading the result backend is blocking I/O
+        state = await asyncio.to_thread(lambda: result.state)
+        status = TASK_STATUSES.get(state, "pending")
+        
+        if status == "completed":
+            # The worker wrote the assessment, so this process has not cached it yet
+            await cache_risk(result.result)
+            return TaskStatusResponse(task_id=task_id, status=status, assessment_id=result.result)
+        if status == "failed":
+            return TaskStatusResponse(task_id=task_id, status=status, detail=str(result.result))
+        return TaskStatusResponse(task_id=task_id, status=status)
+        
+    except Exception as e:
+        logger.error(f"Error retrieving task status: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+async def finished_task_event(status: str, result: "AsyncResult") -> str:
+    """
+    The terminal event for a task that finished before its stream opened.
+    
+    Used once the task's event history has expired, from its Celery result.
+    """
+    if status == "failed":
+        return format_sse("failed", {"detail": str(result.result)})
+    await cache_risk(result.result)
+    risk = risk_cache.get(result.result)
+    if risk is None:
+        return format_sse("failed", {"detail": "Assessment not found"})
+    return format_sse("completed", {"assessment_id": result.result, "risk": RiskResponse(**risk).model_dump()})
+
+@app.get("/tasks/{task_id}/events")
+async def stream_task_events(task_id: str, request: Request):
+    """
+    Stream a queued assessment's progress as server-sent events.
+    
+    Emits queued, image_scored, environment_fetched and risk_computed as the
+    pipeline stages finish, then either completed (with the assessment id
+    and its RiskResponse) or failed, and closes. Events published before the
+    client connected are replayed first.
+    
+    A task without events is looked up in the result backend: one that
+    finished after its history expired gets its completed or failed event
+    straight away, and an unknown one gets failed once it has been silent
+    for TASK_EVENTS_UNKNOWN_TIMEOUT seconds, instead of keepalives forever.
+    """
+    if not CELERY_AVAILABLE:
+        raise HTTPException(status_code=404, detail="Task queue not available")
+    
+    finished = None
+    deadline = None
+    try:
+        if not await task_events.history(task_id):
+            result = AsyncResult(task_id, app=celery_app)
+            state = await asyncio.to_thread(lambda: result.state)
+            status = TASK_STATUSES.get(state, "pending")
+            if status in ("completed", "failed"):
+                finished = await finished_task_event(status, result)
+            elif state == "PENDING":
+                # Unknown ids are PENDING too; give a queued one time to start
+                deadline = asyncio.get_running_loop().time() + TASK_EVENTS_UNKNOWN_TIMEOUT
+    except Exception as e:
+        logger.error(f"Error retrieving task status: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    async def event_stream():
+        nonlocal deadline
+        if finished is not None:
+            yield finished
+            return
+        async for message in task_events.subscribe(task_id):
+            if await request.is_disconnected():
+                break
+            if message is None:
+                if deadline is not None and asyncio.get_running_loop().time() >= deadline:
+                    yield format_sse("failed", {"detail": "Unknown or expired task"})
+                    break
+                yield ": keepalive\n\n"
+                continue
+            deadline = None
+            data = message["data"]
+            if message["event"] == "completed":
+                risk = RiskResponse(**data["risk"])
+                # The client will not need /risk for this one, but others may
+                risk_cache.set(data["assessment_id"], data["risk"])
+                data = {"assessment_id": data["assessment_id"], "risk": risk.model_dump()}
+            yield format_sse(message["event"], data)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/risk/{assessment_id}", response_model=RiskResponse)
-async def get_risk_assessment(assessment_id: str):
+async def get_risk_assessment(assessment_id: str, request: Request, response: Response):
     """
     Get risk assessment by ID.
+    
+    Assessments never change, so responses carry an immutable ETag and
+    Cache-Control. Repeats are served from the in-process result cache, and
+    a matching If-None-Match gets a 304 once the assessment is known to
+    exist, without a lookup when it is already cached.
     """
+    etag = risk_etag(assessment_id)
+    cache_headers = {"ETag": etag, "Cache-Control": RISK_CACHE_CONTROL}
+    not_modified = etag_matches(request.headers.get("if-none-match"), etag)
+    if not_modified and assessment_id in risk_cache:
+        return Response(status_code=304, headers=cache_headers)
+    
     try:
-        assessment = await get_assessment(assessment_id)
-        if not assessment:
-            raise HTTPException(status_code=404, detail="Assessment not found")
+        risk_assessment = risk_cache.get(assessment_id)
+        if risk_assessment is None:
+            # Only fetch the field RiskResponse serializes
+            assessment = await get_assessment(assessment_id, fields=["risk_assessment"])
+            if not assessment:
+                raise HTTPException(status_code=404, detail="Assessment not found")
+            risk_assessment = assessment["risk_assessment"]
+            risk_cache.set(assessment_id, risk_assessment)
         
-        return RiskResponse(**assessment["risk_assessment"])
+        if not_modified:
+            return Response(status_code=304, headers=cache_headers)
+        response.headers.update(cache_headers)
+        return RiskResponse(**risk_assessment)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving assessment: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/assessments/nearby", response_model=List[NearbyAssessment])
+async def get_nearby_assessments(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=500),
+    sort: str = Query("distance", pattern="^(distance|time)$"),
+    limit: int = Query(50, gt=0, le=500)
+):
+    """
+    Get historical assessments within a radius, nearest or newest first.
+    """
+    assessments = await get_assessments_by_location(latitude, longitude, radius_km, sort_by=sort, limit=limit)
+    return [
+        NearbyAssessment(
+            assessment_id=assessment['_id'],
+            latitude=assessment['latitude'],
+            longitude=assessment['longitude'],
+            distance_km=round(assessment['distance_km'], 3),
+            timestamp=assessment['timestamp'],
+            risk_assessment=RiskResponse(**assessment['risk_assessment'])
+        )
+        for assessment in assessments
+    ]
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat_with_ai(request: ChatRequest):
     """
     Chat with the AI about environmental and plant health topics.
+    
+    Answers are cached per normalized question and PHI band, so repeated
+    questions skip the Gemini call.
     """
+    # An explicit null phi means the same as leaving it out
+    phi = DEFAULT_PHI if request.phi is None else request.phi
     try:
+        cached = chat_cache.get(request.question, phi)
+        if cached is not None:
+            return ChatResponse(response=cached, phi=phi)
+        
         # Use Victor's chatLLM function
-        ai_response = chatLLM(request.phi, request.question)
+        ai_response = await chatLLM_async(phi, request.question)
         
         if not ai_response:
             raise HTTPException(status_code=500, detail="AI response generation failed")
         
-        return ChatResponse(response=ai_response, phi=request.phi)
+        # chatLLM reports failures as text; don't cache those
+        if not ai_response.startswith(CHAT_ERROR_PREFIX):
+            chat_cache.set(request.question, phi, ai_response)
         
+        return ChatResponse(response=ai_response, phi=phi)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in AI chat: {str(e)}")
         raise HTTPException(status_code=500, detail="AI chat service error")
 
+@app.post("/chat/stream")
+async def chat_with_ai_stream(chat_request: ChatRequest, request: Request):
+    """
+    Chat with the AI, streaming the answer as server-sent events.
+    
+    Sends a token event ({"text": ...}) per generated chunk, then done
+    ({"phi": ...}) or error. Generation stops as soon as the client
+    disconnects. Cached answers are sent as a single token event, and
+    completed answers are added to the cache shared with /chat.
+    """
+    phi = DEFAULT_PHI if chat_request.phi is None else chat_request.phi
+    try:
+        cached = chat_cache.get(chat_request.question, phi)
+    except Exception as e:
+        # The cache is an optimization; answer uncached rather than fail
+        logger.error(f"Chat cache lookup failed: {str(e)}")
+        cached = None
+    
+    async def event_stream():
+        if cached is not None:
+            yield format_sse("token", {"text": cached})
+            yield format_sse("done", {"phi": phi})
+            return
+        tokens = chatLLM_stream_async(phi, chat_request.question)
+        chunks = []
+        try:
+            async for text in tokens:
+                if await request.is_disconnected():
+                    logger.info("Chat client disconnected, stopping generation")
+                    break
+                chunks.append(text)
+                yield format_sse("token", {"text": text})
+            else:
+                answer = "".join(chunks)
+                # An empty answer is a failed generation, not one to replay
+                if answer.strip():
+                    try:
+                        chat_cache.set(chat_request.question, phi, answer)
+                    except Exception as e:
+                        logger.error(f"Chat cache update failed: {str(e)}")
+                yield format_sse("done", {"phi": phi})
+        except Exception as e:
+            logger.error(f"Error in AI chat stream: {str(e)}")
+            yield format_sse("error", {"detail": "AI chat service error"})
+        finally:
+            await tokens.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/upload-image")
 async def upload_image(file: UploadFile = File(...)):
     """
@@ -151,8 +538,8 @@ async def upload_image(file: UploadFile = File(...)):
         # Save the uploaded image as input.png in the backend directory
         file_path = "input.png"
         with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                buffer.write(chunk)
         
         return {"message": "Image saved successfully as input.png", "filename": file_path}
         
@@ -160,6 +547,144 @@ async def upload_image(file: UploadFile = File(...)):
         logger.error(f"Error saving image: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to save image")
 
+# Documents converted at once; each holds a few pages and OCR threads
+DOCUMENT_MAX_CONCURRENCY = int(os.getenv("DOCUMENT_MAX_CONCURRENCY", "2"))
+document_slots = asyncio.Semaphore(DOCUMENT_MAX_CONCURRENCY)
+
+@app.post("/documents/dyslexic")
+async def convert_document(
+    file: UploadFile = File(...),
+    format: str = Query("pdf")
+):
+    """
+    Re-render a document's text in the OpenDyslexic font.
+    
+    Accepts a PDF or a (multi-page) image and returns a multi-page PDF or
+    TIFF. Pages stream through OCR and rendering one at a time and are
+    appended to the output as they finish.
+    """
+    if not DOCUMENTS_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Document pipeline not available")
+    if format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(OUTPUT_FORMATS)}")
+    
+    buffer, _, _ = await read_upload(file)
+    fd, output_path = tempfile.mkstemp(suffix=f".{format}")
+    os.close(fd)
+    try:
+        async with document_slots:
+            stats = await asyncio.to_thread(process_document, buffer, output_path, format)
+    except ValueError as e:
+        os.unlink(output_path)
+        raise HTTPException(status_code=415, detail=str(e))
+    except Exception as e:
+        os.unlink(output_path)
+        logger.error(f"Error converting document: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to convert document")
+    finally:
+        buffer.close()
+    
+    if not stats["pages"]:
+        os.unlink(output_path)
+        raise HTTPException(status_code=400, detail="Document has no pages")
+    
+    logger.info(f"Converted {stats['pages']} pages in {stats['seconds']:.1f}s")
+    stem = os.path.splitext(os.path.basename(file.filename or "document"))[0]
+    return FileResponse(
+        output_path,
+        media_type="application/pdf" if format == "pdf" else "image/tiff",
+        filename=f"{stem}-dyslexic.{format}",
+        background=BackgroundTask(os.unlink, output_path)
+    )
+
+def _cache_stats():
+    return {
+        "environmental": env_cache.stats(),
+        "vision": vision_cache.stats(),
+        "risk": risk_cache.stats(),
+        "chat": chat_cache.stats()
+    }
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss counters for the environmental, vision, risk and chat caches.
+    
+    The chat cache also reports similar_hits, answers reused for a
+    paraphrased question.
+    """
+    return _cache_stats()
+
+def _cache_metrics():
+    # The caches already count hits and misses; read them at scrape time
+    # instead of adding a counter to every lookup
+    stats = _cache_stats()
+    results = (("hit", "hits"), ("similar_hit", "similar_hits"), ("miss", "misses"))
+    yield "cache_requests_total", "counter", "Cache lookups by cache and result", [
+        ({"cache": cache, "result": result}, values[key])
+        for cache, values in stats.items() for result, key in results if key in values
+    ]
+    yield "cache_entries", "gauge", "Entries held per cache", [
+        ({"cache": cache}, values["entries"]) for cache, values in stats.items()
+    ]
+
+def _queue_metrics():
+    if not CELERY_AVAILABLE:
+        return
+    yield "celery_queue_depth", "gauge", "Messages waiting per Celery queue", [
+        ({"queue": queue}, depth) for queue, depth in queue_depths().items()
+    ]
+
+registry.register_collector(_cache_metrics)
+registry.register_collector(_queue_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics for this API process.
+    """
+    # Reading queue depth talks to the broker, keep it off the event loop
+    body = await asyncio.to_thread(registry.render)
+    return PlainTextResponse(body, media_type=METRICS_CONTENT_TYPE)
+
+# Shared secret for /admin endpoints and /metrics/spans; they are disabled when unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+def _require_admin(x_admin_token: Optional[str]) -> None:
+    if not ADMIN_TOKEN or not secrets.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@app.get("/metrics/spans")
+async def metrics_spans(
+    limit: int = Query(50, ge=1, le=1000),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Stage spans of the most recent sampled requests (METRICS_SPAN_SAMPLE_RATE).
+    
+    Like the /admin endpoints, requires the X-Admin-Token header.
+    """
+    _require_admin(x_admin_token)
+    return list(recent_traces)[-limit:][::-1]
+
+@app.delete("/admin/chat-cache")
+async def invalidate_chat_cache(
+    question: Optional[str] = Query(None),
+    phi: Optional[float] = Query(None, ge=0, le=1),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Invalidate cached /chat answers.
+    
+    Removes one question (optionally only in one PHI band), a whole PHI band,
+    or, with no parameters, everything. Requires the X-Admin-Token header.
+    """
+    _require_admin(x_admin_token)
+    
+    removed = chat_cache.invalidate(question=question, phi=phi)
+    logger.info(f"Invalidated {removed} chat cache entries")
+    return {"removed": removed, "stats": chat_cache.stats()}
+
 @app.get("/health")
 async def health_check():
     """
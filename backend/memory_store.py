@@ -0,0 +1,219 @@
+import json
+import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from geo_index import GeohashIndex
+
+MEMORY_STORE_MAX_ITEMS = int(os.getenv("MEMORY_STORE_MAX_ITEMS", "100000"))
+# Optional append-only JSON-lines file so restarts don't lose data
+MEMORY_STORE_PATH = os.getenv("MEMORY_STORE_PATH", "")
+
+class AssessmentRecord:
+    """Compact in-memory assessment; the frequently queried fields live in slots."""
+
+    __slots__ = (
+        "assessment_id", "latitude", "longitude", "timestamp",
+        "vegetation_health", "risk_assessment", "environmental_data", "extra"
+    )
+
+    def __init__(self, assessment_id: str, document: Dict[str, Any]):
+        document = dict(document)
+        self.assessment_id = assessment_id
+        self.latitude = document.pop('latitude', None)
+        self.longitude = document.pop('longitude', None)
+        self.timestamp = document.pop('timestamp', None) or datetime.utcnow()
+        self.vegetation_health = document.pop('vegetation_health', None)
+        self.risk_assessment = document.pop('risk_assessment', None)
+        self.environmental_data = document.pop('environmental_data', None)
+        document.pop('_id', None)
+        self.extra = document or None
+
+    def to_document(self, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Rebuild the stored document, optionally limited to the given fields."""
+        document = {
+            '_id': self.assessment_id,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'timestamp': self.timestamp,
+            'vegetation_health': self.vegetation_health,
+            'risk_assessment': self.risk_assessment,
+            'environmental_data': self.environmental_data,
+        }
+        if self.extra:
+            document.update(self.extra)
+        if fields is not None:
+            document = {key: document[key] for key in ['_id', *fields] if key in document}
+        return document
+
+class AssessmentStore:
+    """
+    Embedded assessment store for single-node deployments without MongoDB.
+
+    Keeps at most max_items records in insertion order, evicting the oldest
+    first, with a geohash index for radius queries. If a path is given every
+    write is appended to a JSON-lines log that is replayed on startup and
+    compacted once it grows well past the capacity. A background thread does
+    the file I/O in batches, so inserts never block on disk.
+    """
+
+    def __init__(self, max_items: int = MEMORY_STORE_MAX_ITEMS, path: str = MEMORY_STORE_PATH):
+        self.max_items = max_items
+        self.path = path
+        self._records: "OrderedDict[str, AssessmentRecord]" = OrderedDict()
+        self._geo = GeohashIndex()
+        self._lock = threading.RLock()
+        self._log = None
+        self._log_lines = 0
+        self._log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        if path:
+            self._replay()
+            self._log = open(path, "a", encoding="utf-8")
+            self._writer = threading.Thread(target=self._write_loop, name="memory-store-log", daemon=True)
+            self._writer.start()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def insert(self, document: Dict[str, Any], assessment_id: Optional[str] = None) -> str:
+        """Store a document and return its id."""
+        assessment_id = assessment_id or str(uuid.uuid4())
+        record = AssessmentRecord(assessment_id, document)
+        with self._lock:
+            self._add(record)
+            self._append_log(record)
+        return assessment_id
+
+    def insert_many(self, documents: List[Dict[str, Any]]) -> List[str]:
+        """Store many documents and return their ids in order."""
+        return [self.insert(document) for document in documents]
+
+    def get(self, assessment_id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Return a stored document by id, or None."""
+        with self._lock:
+            record = self._records.get(assessment_id)
+            return record.to_document(fields) if record is not None else None
+
+    def query_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        sort_by: str = "distance",
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Return documents within radius_km with 'distance_km', by distance or newest first."""
+        with self._lock:
+            matches = self._geo.query_radius(latitude, longitude, radius_km)
+            if sort_by == "time":
+                matches.sort(key=lambda item: self._records[item[0]].timestamp, reverse=True)
+            results = []
+            for assessment_id, distance_km in matches[:limit]:
+                document = self._records[assessment_id].to_document()
+                document['distance_km'] = distance_km
+                results.append(document)
+            return results
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every write so far is in the log; False on timeout."""
+        if self._writer is None:
+            return True
+        done = threading.Event()
+        self._log_queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Write out the log and stop the writer thread."""
+        if self._writer is None:
+            return
+        self._log_queue.put(None)
+        self._writer.join()
+        self._writer = None
+        self._log.close()
+
+    def _add(self, record: AssessmentRecord) -> None:
+        if record.assessment_id in self._records:
+            self._remove(record.assessment_id)
+        self._records[record.assessment_id] = record
+        if record.latitude is not None and record.longitude is not None:
+            self._geo.add(record.assessment_id, record.latitude, record.longitude)
+        while len(self._records) > self.max_items:
+            oldest_id = next(iter(self._records))
+            self._remove(oldest_id)
+
+    def _remove(self, assessment_id: str) -> None:
+        self._records.pop(assessment_id)
+        self._geo.remove(assessment_id)
+
+    def _append_log(self, record: AssessmentRecord) -> None:
+        if self._writer is not None:
+            self._log_queue.put(json.dumps(_serialize(record.to_document())))
+
+    def _write_loop(self) -> None:
+        """Drain queued lines in batches: one write and flush per batch."""
+        while True:
+            items = [self._log_queue.get()]
+            try:
+                while True:
+                    items.append(self._log_queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            lines = [item for item in items if isinstance(item, str)]
+            if lines:
+                try:
+                    self._log.write("\n".join(lines) + "\n")
+                    self._log.flush()
+                    self._log_lines += len(lines)
+                    if self._log_lines > 2 * self.max_items:
+                        self._compact()
+                except OSError as e:
+                    logger.error(f"Failed to append {len(lines)} records to memory store log: {str(e)}")
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if any(item is None for item in items):
+                return
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as log:
+            for line in log:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    document = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping corrupt line in memory store log")
+                    continue
+                document['timestamp'] = datetime.fromisoformat(document['timestamp'])
+                self._add(AssessmentRecord(document.pop('_id'), document))
+                self._log_lines += 1
+        logger.info(f"Loaded {len(self._records)} assessments from {self.path}")
+
+    def _compact(self) -> None:
+        """Rewrite the log with only the records still held in memory."""
+        with self._lock:
+            documents = [record.to_document() for record in self._records.values()]
+        tmp_path = f"{self.path}.compact"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for document in documents:
+                out.write(json.dumps(_serialize(document)) + "\n")
+        self._log.close()
+        os.replace(tmp_path, self.path)
+        self._log = open(self.path, "a", encoding="utf-8")
+        self._log_lines = len(documents)
+        logger.info(f"Compacted memory store log to {self._log_lines} records")
+
+def _serialize(document: Dict[str, Any]) -> Dict[str, Any]:
+    document = dict(document)
+    if isinstance(document.get('timestamp'), datetime):
+        document['timestamp'] = document['timestamp'].isoformat()
+    return document
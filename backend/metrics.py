@@ -0,0 +1,286 @@
+import bisect
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from loguru import logger
+
+# Fraction of requests whose stage timings are also kept as a detailed trace
+METRICS_SPAN_SAMPLE_RATE = float(os.getenv("METRICS_SPAN_SAMPLE_RATE", "0"))
+# Sampled traces kept for /metrics/spans
+METRICS_SPAN_BUFFER = int(os.getenv("METRICS_SPAN_BUFFER", "200"))
+# First port of the per-process exporters of Celery workers; process N of a
+# worker's pool listens on METRICS_WORKER_PORT + N (0 disables them)
+METRICS_WORKER_PORT = int(os.getenv("METRICS_WORKER_PORT", "0"))
+METRICS_WORKER_HOST = os.getenv("METRICS_WORKER_HOST", "0.0.0.0")
+
+# Latency buckets in seconds, from cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[Dict[str, str], float]
+# A collector returns (name, type, help, samples) for metrics read at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}"
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with optional labels.
+
+    observe() is a bisect and two additions under a lock, cheap enough to
+    call on every request.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {total!r}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collectors: List[Collector] = []
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Collector) -> None:
+        """Add a function whose metrics are read when /metrics is scraped."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {str(e)}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+stage_duration = registry.histogram(
+    "stage_duration_seconds", "Time spent per processing stage", ("stage",)
+)
+env_source_duration = registry.histogram(
+    "env_source_duration_seconds", "Environmental source lookups by source and outcome", ("source", "status")
+)
+upstream_errors = registry.counter(
+    "upstream_errors_total", "Failed or retried calls to external services", ("upstream", "kind")
+)
+fallbacks = registry.counter(
+    "fallback_total", "Results served from a default or degraded path", ("component", "reason")
+)
+
+class Trace:
+    """Stage spans recorded for one sampled request."""
+
+    __slots__ = ("method", "route", "start", "started_at", "spans")
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.start = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: List[Tuple[str, float, float]] = []
+
+    def to_dict(self, duration: float, status: int) -> Dict[str, Any]:
+        return {
+            "method": self.method,
+            "route": self.route,
+            "status": status,
+            "started_at": self.started_at,
+            "duration_ms": round(duration * 1000, 3),
+            "spans": [
+                {"stage": stage, "offset_ms": round(offset * 1000, 3), "duration_ms": round(elapsed * 1000, 3)}
+                for stage, offset, elapsed in self.spans
+            ],
+        }
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("metrics_trace", default=None)
+recent_traces: "deque[Dict[str, Any]]" = deque(maxlen=METRICS_SPAN_BUFFER)
+
+def record_span(stage: str, start: float, elapsed: float) -> None:
+    """Add a span (perf_counter start, seconds) to the current request's trace, if sampled."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append((stage, start - trace.start, elapsed))
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Record the duration of a block under stage_duration_seconds{stage=...}.
+
+    Inside a sampled request the block is also added to the request's trace.
+    Works as a decorator for synchronous functions.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_duration.observe(elapsed, stage=stage)
+        record_span(stage, start, elapsed)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template.
+
+    Requests that match no route are grouped under "unmatched" so arbitrary
+    paths can't blow up the label set. Streaming responses are timed until
+    the last body chunk is sent.
+    """
+
+    def __init__(self, app, sample_rate: float = METRICS_SPAN_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        trace = None
+        token = None
+        if self.sample_rate and random.random() < self.sample_rate:
+            trace = Trace(scope["method"], scope["path"])
+            token = _current_trace.set(trace)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_duration.observe(elapsed, method=scope["method"], route=route, status=str(status))
+            if trace is not None:
+                _current_trace.reset(token)
+                trace.route = route
+                recent_traces.append(trace.to_dict(elapsed, status))
+
+class _ExporterHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_exporter(port: int, host: str = METRICS_WORKER_HOST) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve this process's registry at http://host:port/metrics from a daemon thread.
+
+    For processes without an API of their own, i.e. Celery workers. Returns
+    None, after logging, if the port can't be bound.
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), _ExporterHandler)
+    except OSError as e:
+        logger.warning(f"Metrics exporter could not listen on {host}:{port}: {str(e)}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    logger.info(f"Serving metrics on {host}:{port}/metrics")
+    return server
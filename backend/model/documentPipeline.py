@@ -0,0 +1,185 @@
+# Streaming document pipeline: pages -> OCR -> dyslexia re-render -> multi-page file
+# Pages are decoded, OCR'd and written one at a time, so memory does not grow
+# with the length of the document.
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple, Union
+from PIL import Image, ImageSequence, TiffImagePlugin, UnidentifiedImageError
+from textReader import OCR_CONFIG, OCRPage, ocr_page
+from imageGenerator import DEFAULT_FACE, render_page
+
+# Optional PDF rasterizer; without it only image documents are accepted
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# Threads running Tesseract; each call is a separate tesseract process,
+# so the threads overlap without holding the GIL
+PIPELINE_OCR_WORKERS = int(os.getenv("PIPELINE_OCR_WORKERS", "2"))
+# Pages decoded or in OCR ahead of the renderer; bounds peak memory
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+# Resolution PDF pages are rasterized at, also recorded in the output
+PIPELINE_DPI = int(os.getenv("PIPELINE_DPI", "150"))
+# Stdin is spooled (it can't seek); beyond this size it goes to a temp file
+PIPELINE_SPOOL_MAX_BYTES = int(os.getenv("PIPELINE_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".gif", ".webp")
+OUTPUT_FORMATS = ("tiff", "pdf")
+
+DocumentSource = Union[str, BinaryIO]
+
+def iter_pages(source: DocumentSource, dpi: int = PIPELINE_DPI) -> Iterator[Image.Image]:
+    """
+    Yield the pages of a document one at a time as RGB images.
+
+    source is a directory of page images (in file name order), a PDF or
+    (multi-page) image file, a binary stream, or "-" for stdin.
+    """
+    if source == "-":
+        with spool_stream(sys.stdin.buffer) as buffer:
+            yield from _iter_stream(buffer, dpi)
+    elif isinstance(source, str) and os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield from _iter_image(os.path.join(source, name))
+    elif isinstance(source, str):
+        with open(source, "rb") as stream:
+            yield from _iter_stream(stream, dpi)
+    else:
+        yield from _iter_stream(source, dpi)
+
+def spool_stream(stream: BinaryIO, max_size: int = PIPELINE_SPOOL_MAX_BYTES) -> BinaryIO:
+    """Copy a non-seekable stream into a spooled temp file, rewound to 0."""
+    buffer = tempfile.SpooledTemporaryFile(max_size=max_size)
+    shutil.copyfileobj(stream, buffer, 1024 * 1024)
+    buffer.seek(0)
+    return buffer
+
+def _iter_stream(stream: BinaryIO, dpi: int) -> Iterator[Image.Image]:
+    is_pdf = stream.read(5) == b"%PDF-"
+    stream.seek(0)
+    if is_pdf:
+        yield from _iter_pdf(stream, dpi)
+    else:
+        yield from _iter_image(stream)
+
+def _iter_image(source: Union[str, BinaryIO]) -> Iterator[Image.Image]:
+    try:
+        image = Image.open(source)
+    except UnidentifiedImageError:
+        raise ValueError("Unsupported document format; expected a PDF or an image")
+    with image:
+        # Frames are decoded on demand; convert() copies the current one out
+        # so nothing else of the file is held in memory
+        for frame in ImageSequence.Iterator(image):
+            yield frame.convert("RGB")
+
+def _iter_pdf(stream: BinaryIO, dpi: int) -> Iterator[Image.Image]:
+    if pdfium is None:
+        raise ValueError("PDF documents require pypdfium2 (pip install pypdfium2)")
+    pdf = pdfium.PdfDocument(stream)
+    try:
+        for index in range(len(pdf)):
+            page = pdf[index]
+            try:
+                yield page.render(scale=dpi / 72).to_pil().convert("RGB")
+            finally:
+                page.close()
+    finally:
+        pdf.close()
+
+def ocr_pages(
+    pages: Iterator[Image.Image],
+    workers: int = PIPELINE_OCR_WORKERS,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    config: str = OCR_CONFIG
+) -> Iterator[Tuple[Image.Image, OCRPage]]:
+    """
+    OCR pages on a thread pool while the caller renders the earlier ones.
+
+    Yields (page, OCRPage) in document order. Pages are pulled from the
+    source only as the queue drains, so at most queue_size pages are in
+    flight however long the document is.
+    """
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr") as pool:
+        for page in pages:
+            pending.append((page, pool.submit(ocr_page, page, config)))
+            if len(pending) >= queue_size:
+                page, future = pending.popleft()
+                yield page, future.result()
+        while pending:
+            page, future = pending.popleft()
+            yield page, future.result()
+
+def output_format(path: str) -> str:
+    """Pick the output format from a file extension (TIFF unless .pdf)."""
+    return "pdf" if path.lower().endswith(".pdf") else "tiff"
+
+class PageWriter:
+    """
+    Append pages to a multi-page TIFF or PDF as they are rendered.
+
+    Each page is written and released immediately; the TIFF is readable
+    after every page, the PDF is extended with an incremental update.
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None, dpi: int = PIPELINE_DPI):
+        self.format = fmt or output_format(path)
+        if self.format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {self.format}")
+        self.path = path
+        self.dpi = dpi
+        self.pages = 0
+        self._tiff = TiffImagePlugin.AppendingTiffWriter(path, True) if self.format == "tiff" else None
+
+    def __enter__(self) -> "PageWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, page: Image.Image) -> None:
+        if self._tiff is not None:
+            page.save(self._tiff, format="TIFF", compression="tiff_deflate", dpi=(self.dpi, self.dpi))
+            self._tiff.newFrame()
+        else:
+            page.save(self.path, format="PDF", append=self.pages > 0, resolution=self.dpi)
+        self.pages += 1
+
+    def close(self) -> None:
+        if self._tiff is not None:
+            self._tiff.close()
+            self._tiff = None
+
+def process_document(
+    source: DocumentSource,
+    output_path: str,
+    fmt: Optional[str] = None,
+    workers: int = PIPELINE_OCR_WORKERS,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    dpi: int = PIPELINE_DPI,
+    face: str = DEFAULT_FACE,
+    config: str = OCR_CONFIG
+) -> Dict[str, float]:
+    """
+    Stream a document through OCR and dyslexia-font re-rendering into a
+    multi-page TIFF or PDF.
+
+    Rendering and writing page n overlaps with OCR of the following pages.
+    Returns the page and paragraph counts and the elapsed seconds.
+    """
+    start = time.perf_counter()
+    paragraphs = 0
+    with PageWriter(output_path, fmt, dpi) as writer:
+        for page, result in ocr_pages(iter_pages(source, dpi), workers, queue_size, config):
+            writer.write(render_page(page, result.paragraphs, face))
+            paragraphs += len(result.paragraphs)
+    return {"pages": writer.pages, "paragraphs": paragraphs, "seconds": time.perf_counter() - start}
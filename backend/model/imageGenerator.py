@@ -1,29 +1,157 @@
 # paragraphs -> format: array of bounding box coordinates and text
 # generate image with provided coordinates with font of opendyslexic
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Sequence, Tuple
 from PIL import Image, ImageDraw, ImageFont
 
+# The OpenDyslexic faces tracked at the repository root; set RENDER_FONT_DIR
+# where that directory isn't next to backend/ (e.g. in the Docker image)
+FONT_DIR = os.getenv("RENDER_FONT_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "open_dyslexic"
+)
+DEFAULT_FACE = "OpenDyslexic-Regular"
+# Font sizes tried when fitting a paragraph into its box
+MIN_FONT_SIZE = int(os.getenv("RENDER_MIN_FONT_SIZE", "8"))
+MAX_FONT_SIZE = int(os.getenv("RENDER_MAX_FONT_SIZE", "72"))
+# Fonts (face, size) and layouts kept per process
+FONT_CACHE_SIZE = int(os.getenv("RENDER_FONT_CACHE_SIZE", "256"))
+LAYOUT_CACHE_SIZE = int(os.getenv("RENDER_LAYOUT_CACHE_SIZE", "4096"))
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(os.cpu_count() or 1)))
 
-def replace_text(image_path: str, paragraphs, output_path="output.png"):
+class Layout:
+    """Font size and wrapped lines chosen for one paragraph box."""
+
+    __slots__ = ("font_size", "lines", "line_height")
+
+    def __init__(self, font_size: int, lines: Tuple[str, ...], line_height: int):
+        self.font_size = font_size
+        self.lines = lines
+        self.line_height = line_height
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def get_font(face: str = DEFAULT_FACE, size: int = 16) -> ImageFont.FreeTypeFont:
+    """Load a font from the bundled faces once per (face, size)."""
+    return ImageFont.truetype(os.path.join(FONT_DIR, f"{face}.otf"), size)
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def wrap_text(text: str, face: str, size: int, max_width: int) -> Tuple[str, ...]:
+    """Greedily wrap text into lines no wider than max_width at the given size."""
+    font = get_font(face, size)
+    space = font.getlength(" ")
+    lines, line, line_width = [], [], 0.0
+    for word in text.split():
+        word_width = font.getlength(word)
+        if line and line_width + space + word_width > max_width:
+            lines.append(" ".join(line))
+            line, line_width = [], 0.0
+        if word_width > max_width:
+            # Break words that don't fit on a line by themselves; the last
+            # piece starts the next line
+            *pieces, word = _split_word(word, font, max_width)
+            lines.extend(pieces)
+            word_width = font.getlength(word)
+        line_width = line_width + space + word_width if line else word_width
+        line.append(word)
+    if line:
+        lines.append(" ".join(line))
+    return tuple(lines)
+
+def _split_word(word: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
+    chunks, chunk = [], ""
+    for char in word:
+        if chunk and font.getlength(chunk + char) > max_width:
+            chunks.append(chunk)
+            chunk = ""
+        chunk += char
+    chunks.append(chunk)
+    return chunks
+
+def line_height(face: str, size: int) -> int:
+    ascent, descent = get_font(face, size).getmetrics()
+    return ascent + descent
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def fit_text(
+    text: str,
+    width: int,
+    height: int,
+    face: str = DEFAULT_FACE,
+    min_size: int = MIN_FONT_SIZE,
+    max_size: int = MAX_FONT_SIZE
+) -> Layout:
     """
-    Takes the original image and a list of (bbox, text) tuples,
-    replaces paragraph areas with new content, and saves result.
+    Find the largest font size at which the wrapped text fits in width x height.
+
+    Binary-searches the size; if even min_size overflows, the lines that fit
+    are kept and the last one is marked with an ellipsis.
     """
-    image = Image.open(image_path)
+    def fits(size: int) -> bool:
+        return len(wrap_text(text, face, size, width)) * line_height(face, size) <= height
+
+    low, high, best = min_size, max_size, None
+    while low <= high:
+        mid = (low + high) // 2
+        if fits(mid):
+            best, low = mid, mid + 1
+        else:
+            high = mid - 1
+
+    if best is not None:
+        return Layout(best, wrap_text(text, face, best, width), line_height(face, best))
+
+    lines = wrap_text(text, face, min_size, width)
+    step = line_height(face, min_size)
+    visible = max(1, height // step)
+    if len(lines) > visible:
+        lines = lines[:visible - 1] + (lines[visible - 1] + " …",)
+    return Layout(min_size, lines, step)
+
+def render_page(image: Image.Image, paragraphs, face: str = DEFAULT_FACE) -> Image.Image:
+    """Blank each paragraph box and redraw its text in the dyslexia font, fitted to the box."""
+    image = image.convert("RGB")
     draw = ImageDraw.Draw(image)
 
     for (x1, y1, x2, y2), text in paragraphs: # coordinates, text
         # Fill the paragraph region with white
         draw.rectangle([x1, y1, x2, y2], fill="white")
 
-        # Example replacement: just put a placeholder
+        layout = fit_text(text, max(1, x2 - x1), max(1, y2 - y1), face)
+        font = get_font(face, layout.font_size)
+        for i, line in enumerate(layout.lines):
+            draw.text((x1, y1 + i * layout.line_height), line, fill="black", font=font)
 
-        # Load dyslexia font
-        dys_font = ImageFont.truetype('backend/model/data/open_dyslexic/OpenDyslexic-Regular.otf')
-        # draw text with custom dyslexia font
-        draw.text((x1, y1), "[REPLACED]", fill="black")
+    return image
 
-        # replace draw that within white rectangle
+def replace_text(image_path: str, paragraphs, output_path="output.png", face: str = DEFAULT_FACE):
+    """
+    Takes the original image and a list of (bbox, text) tuples,
+    replaces paragraph areas with new content, and saves result.
+    """
+    with Image.open(image_path) as image:
+        render_page(image, paragraphs, face).save(output_path)
+    return output_path
+
+def _render_job(job) -> str:
+    image_path, paragraphs, output_path, face = job
+    with Image.open(image_path) as image:
+        render_page(image, paragraphs, face).save(output_path)
+    return output_path
 
-    image.save(output_path)
-    print(f"Output image saved as {output_path}")
\ No newline at end of file
+def render_pages(
+    jobs: Sequence[Tuple[str, list, str]],
+    workers: int = RENDER_WORKERS,
+    face: str = DEFAULT_FACE
+) -> List[str]:
+    """
+    Render many pages on a process pool.
+
+    Each job is (image_path, paragraphs, output_path); returns the output
+    paths in order. Every worker keeps its own font and layout caches warm
+    across the pages it renders.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        return list(pool.map(_render_job, [(*job, face) for job in jobs], chunksize=chunksize))
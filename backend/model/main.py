@@ -1,20 +1,28 @@
-
-from text_reader import extract_paragraphs # from textReader
-from generate_image import replace_text
+import argparse
+import sys
+from documentPipeline import PIPELINE_DPI, PIPELINE_OCR_WORKERS, PIPELINE_QUEUE_SIZE, process_document
 
 def main():
-    input_path = "input.png"
-    output_path = "output.png"
-
-    # Step 1: Extract paragraphs (coords + text)
-    paragraphs = extract_paragraphs(input_path)
+    parser = argparse.ArgumentParser(
+        description="Re-render the text of a document in the OpenDyslexic font, page by page."
+    )
+    parser.add_argument("input", nargs="?", default="input.png",
+                        help="directory of page images, PDF, image/multi-page TIFF, or - for stdin")
+    parser.add_argument("-o", "--output", default="output.tiff",
+                        help="multi-page output file; .pdf writes a PDF, anything else a TIFF")
+    parser.add_argument("--workers", type=int, default=PIPELINE_OCR_WORKERS, help="parallel OCR pages")
+    parser.add_argument("--queue-size", type=int, default=PIPELINE_QUEUE_SIZE, help="pages in flight ahead of rendering")
+    parser.add_argument("--dpi", type=int, default=PIPELINE_DPI, help="PDF rasterization resolution")
+    args = parser.parse_args()
 
-    # Debug print
-    for bbox, text in paragraphs:
-        print(f"Found paragraph at {bbox}: {text}")
+    try:
+        stats = process_document(args.input, args.output, workers=args.workers,
+                                 queue_size=args.queue_size, dpi=args.dpi)
+    except ValueError as e:
+        sys.exit(str(e))
 
-    # Step 2: Replace them in the image
-    replace_text(input_path, paragraphs, output_path)
+    print(f"Wrote {stats['pages']} pages ({stats['paragraphs']} paragraphs) to {args.output} "
+          f"in {stats['seconds']:.1f}s", file=sys.stderr)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
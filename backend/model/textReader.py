@@ -1,27 +1,98 @@
+import os
+import time
+from typing import Dict, List, Tuple, Union
+import numpy as np
 import pytesseract
 from PIL import Image
-from bs4 import BeautifulSoup
 
-def extract_paragraphs(image_path: str):
+# Extra Tesseract command-line options, e.g. "--psm 6"
+OCR_CONFIG = os.getenv("OCR_CONFIG", "")
+
+BBox = Tuple[int, int, int, int]
+Paragraph = Tuple[BBox, str]
+ImageSource = Union[str, Image.Image]
+
+class OCRPage:
+    """Paragraphs found on one page plus time spent per stage in ms."""
+
+    __slots__ = ("paragraphs", "timings")
+
+    def __init__(self, paragraphs: List[Paragraph], timings: Dict[str, float]):
+        self.paragraphs = paragraphs
+        self.timings = timings
+
+def binarize(image: Image.Image) -> Image.Image:
+    """Convert to black-on-white with Otsu's threshold."""
+    gray = np.asarray(image.convert("L"))
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    omega = np.cumsum(hist) / gray.size
+    mu = np.cumsum(hist * np.arange(256)) / gray.size
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mu[-1] * omega - mu) ** 2 / (omega * (1 - omega))
+    threshold = int(np.nanargmax(between)) if np.isfinite(between).any() else 127
+    return Image.fromarray(np.where(gray > threshold, 255, 0).astype(np.uint8))
+
+def parse_tsv(tsv: str) -> List[Paragraph]:
     """
-    Runs OCR on the given image and returns a list of
-    (bbox, text) tuples, where bbox = (x1, y1, x2, y2).
+    Group Tesseract's image_to_data TSV words into paragraphs.
+
+    Returns (bbox, text) per paragraph in reading order; words of every line
+    of a paragraph are joined with single spaces.
     """
-    image = Image.open(image_path)
+    lines = tsv.splitlines()
+    if not lines:
+        return []
+    columns = {name: i for i, name in enumerate(lines[0].split("\t"))}
+    level, page, block, par = columns["level"], columns["page_num"], columns["block_num"], columns["par_num"]
+    left, top, width, height, text_col = columns["left"], columns["top"], columns["width"], columns["height"], columns["text"]
+
+    paragraphs: Dict[Tuple[str, str, str], list] = {}
+    for row in lines[1:]:
+        cols = row.split("\t")
+        # Only word rows (level 5) carry text
+        if len(cols) <= text_col or cols[level] != "5":
+            continue
+        word = cols[text_col].strip()
+        if not word:
+            continue
+        x1, y1 = int(cols[left]), int(cols[top])
+        x2, y2 = x1 + int(cols[width]), y1 + int(cols[height])
+        key = (cols[page], cols[block], cols[par])
+        entry = paragraphs.get(key)
+        if entry is None:
+            paragraphs[key] = [x1, y1, x2, y2, [word]]
+        else:
+            entry[0] = min(entry[0], x1)
+            entry[1] = min(entry[1], y1)
+            entry[2] = max(entry[2], x2)
+            entry[3] = max(entry[3], y2)
+            entry[4].append(word)
 
-    # Get HOCR output (HTML-like)
-    hocr = pytesseract.image_to_pdf_or_hocr(image, extension='hocr')
-    hocr_text = hocr.decode("utf-8")
+    return [((x1, y1, x2, y2), " ".join(words)) for x1, y1, x2, y2, words in paragraphs.values()]
 
-    # Parse HOCR with BeautifulSoup
-    soup = BeautifulSoup(hocr_text, "html.parser")
-    paragraphs = []
+def _load(source: ImageSource) -> Image.Image:
+    return Image.open(source) if isinstance(source, str) else source
 
-    for par in soup.find_all("p", class_="ocr_par"):
-        title = par.get("title")
-        if title and "bbox" in title:
-            bbox_str = title.split("bbox")[1].split(";")[0].strip()
-            x1, y1, x2, y2 = map(int, bbox_str.split())
-            paragraphs.append(((x1, y1, x2, y2), par.get_text(strip=True)))
+def _ocr(binary: Image.Image, config: str) -> Tuple[List[Paragraph], Dict[str, float]]:
+    start = time.perf_counter()
+    tsv = pytesseract.image_to_data(binary, config=config)
+    ocr_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    paragraphs = parse_tsv(tsv)
+    return paragraphs, {"ocr_ms": ocr_ms, "parse_ms": (time.perf_counter() - start) * 1000}
 
-    return paragraphs
\ No newline at end of file
+def ocr_page(source: ImageSource, config: str = OCR_CONFIG) -> OCRPage:
+    """Binarize, OCR and parse one page in the calling process."""
+    start = time.perf_counter()
+    binary = binarize(_load(source))
+    binarize_ms = (time.perf_counter() - start) * 1000
+    paragraphs, timings = _ocr(binary, config)
+    timings["binarize_ms"] = binarize_ms
+    return OCRPage(paragraphs, timings)
+
+def extract_paragraphs(image_path: str):
+    """
+    Runs OCR on the given image and returns a list of
+    (bbox, text) tuples, where bbox = (x1, y1, x2, y2).
+    """
+    return ocr_page(image_path).paragraphs
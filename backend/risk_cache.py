@@ -0,0 +1,71 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+RISK_CACHE_MAX_ENTRIES = int(os.getenv("RISK_CACHE_MAX_ENTRIES", "50000"))
+# Bump when the RiskResponse shape changes so browsers and CDNs refetch
+RISK_ETAG_VERSION = "1"
+RISK_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def risk_etag(assessment_id: str) -> str:
+    """
+    ETag for an assessment's risk result.
+
+    Assessments never change once written, so the id (plus a response-format
+    version) identifies the representation and a matching If-None-Match can
+    be answered without looking anything up.
+    """
+    return f'"risk-{RISK_ETAG_VERSION}-{assessment_id}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+class ImmutableResultCache:
+    """LRU cache for write-once results keyed by assessment id."""
+
+    def __init__(self, max_entries: int = RISK_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(assessment_id)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(assessment_id)
+            self.hits += 1
+            return result
+
+    def __contains__(self, assessment_id: str) -> bool:
+        """Check for an entry without touching the LRU order or hit counters."""
+        with self._lock:
+            return assessment_id in self._entries
+
+    def set(self, assessment_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[assessment_id] = result
+            self._entries.move_to_end(assessment_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+        }
+
+# Process-wide cache of risk_assessment results
+risk_cache = ImmutableResultCache()
@@ -1,6 +1,12 @@
-from typing import Dict, Any
-import math
+from typing import Dict, Any, List
+import numpy as np
+from metrics import timed
 
+# Category labels indexed by the codes returned from calculate_risk_batch
+RISK_CATEGORIES = ("Low", "Medium", "High", "Extreme")
+RISK_THRESHOLDS = np.array([25, 50, 75], dtype=np.float64)
+
+@timed("risk_scoring")
 def calculate_risk(vegetation_health: float, environmental_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Calculate overall risk score combining vegetation health and environmental factors.
@@ -80,3 +86,116 @@ def generate_recommendation(veg_score: float, drought_score: float, fire_score:
         recommendations.append("Conditions are favorable - continue normal maintenance")
     
     return ". ".join(recommendations)
+
+
+def _build_recommendation_table() -> List[str]:
+    """
+    Precompute every recommendation string, indexed by threshold flags.
+
+    Index = (veg_low << 4) | (drought_high << 3) | (fire_high << 2) | category_code
+    """
+    table = []
+    for index in range(32):
+        veg_score = 0 if index & 16 else 100
+        drought_score = 100 if index & 8 else 0
+        fire_score = 100 if index & 4 else 0
+        category = RISK_CATEGORIES[index & 3]
+        table.append(generate_recommendation(veg_score, drought_score, fire_score, category))
+    return table
+
+RECOMMENDATION_TABLE = _build_recommendation_table()
+
+def _round_1dp(values: np.ndarray) -> np.ndarray:
+    """Round to one decimal place exactly like the builtin round(x, 1)."""
+    rounded = np.round(values, 1)
+    # np.round scales by 10 first, which can disagree with the builtin on near-ties
+    scaled = values * 10
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded[i] = round(float(values[i]), 1)
+    return rounded
+
+def calculate_risk_batch(
+    vegetation_health,
+    drought_index,
+    fire_fwi,
+    temperature=None,
+    humidity=None
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized risk scoring over columnar inputs.
+    
+    Takes equal-length arrays and returns a dict of arrays with normalized
+    scores, overall risk, category codes (see RISK_CATEGORIES) and
+    recommendation codes (see RECOMMENDATION_TABLE). Temperature and humidity
+    are accepted for parity with calculate_risk but, like it, do not affect
+    the score. Results match calculate_risk row for row.
+    """
+    veg_score = np.asarray(vegetation_health, dtype=np.float64)
+    drought_index = np.asarray(drought_index, dtype=np.float64)
+    fire_fwi = np.asarray(fire_fwi, dtype=np.float64)
+    
+    drought_score = np.clip((drought_index + 4) * 12.5, 0, 100)
+    fire_score = np.clip((fire_fwi / 30) * 100, 0, 100)
+    overall_risk = (veg_score * 0.4) + (drought_score * 0.3) + (fire_score * 0.3)
+    
+    category_code = np.searchsorted(RISK_THRESHOLDS, overall_risk, side='right').astype(np.int8)
+    recommendation_code = (
+        ((veg_score < 50).astype(np.int8) << 4)
+        | ((drought_score > 50).astype(np.int8) << 3)
+        | ((fire_score > 50).astype(np.int8) << 2)
+        | category_code
+    )
+    
+    return {
+        'vegetation_health': veg_score,
+        'drought_index': drought_index,
+        'fire_fwi': fire_fwi,
+        'drought_score': drought_score,
+        'fire_score': fire_score,
+        'overall_risk_score': _round_1dp(overall_risk),
+        'risk_category_code': category_code,
+        'recommendation_code': recommendation_code
+    }
+
+@timed("risk_scoring")
+def calculate_risk_many(
+    vegetation_health: List[float],
+    environmental_data: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Score many assessments at once, returning the same dicts as calculate_risk.
+    """
+    drought = [env.get('drought', {}) for env in environmental_data]
+    fire = [env.get('fire_weather', {}) for env in environmental_data]
+    weather = [env.get('weather', {}) for env in environmental_data]
+    
+    batch = calculate_risk_batch(
+        vegetation_health,
+        [d.get('index', 2.0) for d in drought],
+        [f.get('fwi', 5.0) for f in fire],
+        [w.get('temperature', 25) for w in weather],
+        [w.get('humidity', 50) for w in weather]
+    )
+    
+    overall = batch['overall_risk_score'].tolist()
+    categories = batch['risk_category_code'].tolist()
+    recommendations = batch['recommendation_code'].tolist()
+    
+    return [
+        {
+            'vegetation_health': vegetation_health[i],
+            'drought_index': {
+                'numeric': drought[i].get('index', 2.0),
+                'categorical': drought[i].get('category', 'Unknown')
+            },
+            'fire_risk_index': {
+                'numeric': fire[i].get('fwi', 5.0),
+                'categorical': fire[i].get('category', 'Unknown')
+            },
+            'overall_risk_score': overall[i],
+            'risk_category': RISK_CATEGORIES[categories[i]],
+            'recommendation': RECOMMENDATION_TABLE[recommendations[i]]
+        }
+        for i in range(len(vegetation_health))
+    ]
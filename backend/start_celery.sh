@@ -1,4 +1,17 @@
 #!/bin/bash
-# Script to start Celery worker
+# Script to start Celery workers: one for the LLM-bound image analysis queue and
+# one for the I/O-bound queue (environmental data, risk scoring, persistence)
 
-celery -A celery_app worker --loglevel=info
+trap 'kill 0' EXIT
+
+LLM_CONCURRENCY="${CELERY_LLM_CONCURRENCY:-4}"
+IO_CONCURRENCY="${CELERY_IO_CONCURRENCY:-16}"
+# Per-process metrics exporters: llm processes from METRICS_WORKER_PORT,
+# io processes right after them (0 or unset disables both)
+LLM_METRICS_PORT="${METRICS_WORKER_PORT:-0}"
+IO_METRICS_PORT=$(( LLM_METRICS_PORT ? LLM_METRICS_PORT + LLM_CONCURRENCY : 0 ))
+
+METRICS_WORKER_PORT="$LLM_METRICS_PORT" celery -A celery_app worker -Q llm -n llm@%h --concurrency="$LLM_CONCURRENCY" --loglevel=info &
+METRICS_WORKER_PORT="$IO_METRICS_PORT" celery -A celery_app worker -Q io -n io@%h --concurrency="$IO_CONCURRENCY" --loglevel=info &
+
+wait
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from loguru import logger
+
+# Optional Redis transport
+try:
+    import redis
+    import redis.asyncio as aioredis
+    REDIS_CLIENT_AVAILABLE = True
+except ImportError:
+    REDIS_CLIENT_AVAILABLE = False
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+# Eager Celery runs tasks inside the API process, so events stay in-process too
+TASK_EVENTS_IN_PROCESS = os.getenv("CELERY_TASK_ALWAYS_EAGER", "false").lower() == "true" or not REDIS_CLIENT_AVAILABLE
+# How long a task's event history is kept for late subscribers, in seconds
+TASK_EVENTS_TTL = int(os.getenv("TASK_EVENTS_TTL", "3600"))
+# Seconds between keepalive ticks on an idle stream
+TASK_EVENTS_KEEPALIVE = float(os.getenv("TASK_EVENTS_KEEPALIVE", "15"))
+# Tasks whose history the in-process transport keeps
+TASK_EVENTS_MAX_TASKS = int(os.getenv("TASK_EVENTS_MAX_TASKS", "10000"))
+# Seconds a stream for a task with no events waits for one before giving up
+TASK_EVENTS_UNKNOWN_TIMEOUT = float(os.getenv("TASK_EVENTS_UNKNOWN_TIMEOUT", "60"))
+
+CHANNEL_PREFIX = "task-events:"
+# Events that end a task's stream
+TERMINAL_EVENTS = {"completed", "failed"}
+
+def channel_name(task_id: str) -> str:
+    return f"{CHANNEL_PREFIX}{task_id}"
+
+def history_key(task_id: str) -> str:
+    return f"{CHANNEL_PREFIX}history:{task_id}"
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class TaskEventHub:
+    """
+    Fan-out of pipeline progress events to subscribers in this process.
+
+    Workers publish each stage to a per-task Redis channel and append it to a
+    short-lived history list. The API process holds a single pattern
+    subscription for all tasks and hands messages to the local subscriber
+    queues, so open streams cost no Redis connections of their own. When
+    Celery runs eagerly (or redis is not installed) events are delivered
+    in-process instead.
+    """
+
+    def __init__(self, in_process: bool = TASK_EVENTS_IN_PROCESS):
+        self.in_process = in_process
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+        self._local_history: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._sync_redis = None
+        self._async_redis = None
+        self._listener: Optional[asyncio.Task] = None
+        self._listening: Optional[asyncio.Event] = None
+
+    def publish(self, task_id: str, event: str, data: Any = None) -> None:
+        """
+        Publish a pipeline event for a task (blocking, used by workers).
+
+        Progress is best effort: failures are logged and never fail the task.
+        """
+        message = {"task_id": task_id, "event": event, "data": data}
+        if self.in_process:
+            with self._lock:
+                self._local_history.setdefault(task_id, []).append(message)
+                self._local_history.move_to_end(task_id)
+                while len(self._local_history) > TASK_EVENTS_MAX_TASKS:
+                    self._local_history.popitem(last=False)
+            self._dispatch(message)
+            return
+        try:
+            if self._sync_redis is None:
+                self._sync_redis = redis.Redis.from_url(REDIS_URL)
+            payload = json.dumps(message)
+            pipe = self._sync_redis.pipeline()
+            pipe.rpush(history_key(task_id), payload)
+            pipe.expire(history_key(task_id), TASK_EVENTS_TTL)
+            pipe.publish(channel_name(task_id), payload)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to publish {event} event for task {task_id}: {str(e)}")
+
+    async def subscribe(self, task_id: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield a task's events, replaying earlier ones first, until a terminal event.
+
+        Yields None every TASK_EVENTS_KEEPALIVE seconds without activity so the
+        caller can send a keepalive and notice disconnected clients.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(task_id, set()).add(subscriber)
+        try:
+            # Listen before reading the history so nothing published in between is lost
+            if not self.in_process:
+                await self._ensure_listener()
+            seen = set()
+            for message in await self.history(task_id):
+                seen.add(message["event"])
+                yield message
+                if message["event"] in TERMINAL_EVENTS:
+                    return
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), TASK_EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                # Each stage is published once, so a repeat is one already replayed
+                if message["event"] in seen:
+                    continue
+                seen.add(message["event"])
+                yield message
+                if message["event"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(task_id)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[task_id]
+
+    async def history(self, task_id: str) -> List[Dict[str, Any]]:
+        """Events published so far for a task, oldest first."""
+        if self.in_process:
+            with self._lock:
+                return list(self._local_history.get(task_id, ()))
+        raw = await self._get_async_redis().lrange(history_key(task_id), 0, -1)
+        return [json.loads(item) for item in raw]
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        """Hand a message to this process's subscribers; safe from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(message["task_id"], ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    def _get_async_redis(self):
+        if self._async_redis is None:
+            self._async_redis = aioredis.from_url(REDIS_URL)
+        return self._async_redis
+
+    async def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listening = asyncio.Event()
+            self._listener = asyncio.create_task(self._listen())
+        await self._listening.wait()
+
+    async def _listen(self) -> None:
+        """Pattern-subscribe to every task channel and dispatch messages until closed."""
+        while True:
+            pubsub = self._get_async_redis().pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                async for item in pubsub.listen():
+                    if item["type"] == "psubscribe":
+                        self._listening.set()
+                    elif item["type"] == "pmessage":
+                        self._dispatch(json.loads(item["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Task event subscription failed, reconnecting: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def close(self) -> None:
+        """Stop the Redis listener and close connections."""
+        if self._listener is not None and not self._listener.done():
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._listener = None
+        if self._async_redis is not None:
+            await self._async_redis.aclose()
+            self._async_redis = None
+
+# Process-wide hub shared by the API and the workers
+task_events = TaskEventHub()
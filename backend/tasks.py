@@ -1,45 +1,224 @@
-from celery_app import celery_app
+from celery_app import celery_app, LLM_RATE_LIMIT, PERSIST_MAX_RETRIES
 from image_processor import analyze_vegetation_health
 from data_integrator import get_environmental_data
 from risk_engine import calculate_risk
-from database import save_assessment
-import os
+from database import save_assessment, flush_writes, is_transient_write_error
+from http_client import close_http_client
+from llm_pool import shutdown_llm_executor
+from upload_stream import prune_uploads, hold_upload, release_upload
+from task_events import task_events
+from celery import chain, chord, group, states
+from celery.signals import worker_process_init, worker_process_shutdown
+from billiard.process import current_process
+from metrics import METRICS_WORKER_PORT, start_exporter
+from celery.result import allow_join_result
+from celery.utils import uuid
+import asyncio
 from loguru import logger
 
-@celery_app.task
-def process_image_analysis(file_path: str, latitude: float, longitude: float):
+# Event loop owned by this worker process, so the shared HTTP client and its
+# pooled connections survive across tasks
+worker_loop = None
+# This process's /metrics exporter, if METRICS_WORKER_PORT is set
+metrics_exporter = None
+
+@worker_process_init.connect
+def init_worker_loop(**kwargs):
+    """Create the per-process event loop when a worker process starts."""
+    global worker_loop
+    worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(worker_loop)
+
+@worker_process_init.connect
+def init_metrics_exporter(**kwargs):
     """
-    Async task to process image analysis and risk assessment.
+    Expose this worker process's stage metrics for Prometheus to scrape.
+
+    Metrics live in the process that records them, so the API's /metrics
+    never sees the stages run here. Pool process N listens on
+    METRICS_WORKER_PORT + N; a replaced process reuses its slot's port.
+    """
+    global metrics_exporter
+    if METRICS_WORKER_PORT:
+        metrics_exporter = start_exporter(METRICS_WORKER_PORT + getattr(current_process(), "index", 0))
+
+@worker_process_shutdown.connect
+def shutdown_worker_loop(**kwargs):
+    """Close the shared HTTP client, the loop, the LLM pool and the metrics exporter when a worker process exits."""
+    global worker_loop
+    if worker_loop is not None:
+        worker_loop.run_until_complete(flush_writes())
+        worker_loop.run_until_complete(close_http_client())
+        worker_loop.close()
+        worker_loop = None
+    shutdown_llm_executor()
+    if metrics_exporter is not None:
+        metrics_exporter.shutdown()
+        metrics_exporter.server_close()
+
+def run_async(coro):
+    """Run a coroutine on this worker's persistent event loop."""
+    global worker_loop
+    if worker_loop is None or worker_loop.is_closed():
+        init_worker_loop()
+    return worker_loop.run_until_complete(coro)
+
+@celery_app.task(name='tasks.analyze_image', rate_limit=LLM_RATE_LIMIT)
+def analyze_image(file_path: str, pipeline_id: str = None) -> float:
+    """Pipeline stage: score vegetation health from the uploaded image (LLM-bound)."""
+    veg_health = run_async(analyze_vegetation_health(file_path))
+    if pipeline_id:
+        task_events.publish(pipeline_id, "image_scored", {"vegetation_health": veg_health})
+    return veg_health
+
+@celery_app.task(name='tasks.fetch_environment')
+def fetch_environment(latitude: float, longitude: float, pipeline_id: str = None) -> dict:
+    """Pipeline stage: gather weather, drought, vegetation and fire data."""
+    env_data = run_async(get_environmental_data(latitude, longitude))
+    if pipeline_id:
+        task_events.publish(pipeline_id, "environment_fetched", {"sources": env_data.get("sources")})
+    return env_data
+
+@celery_app.task(name='tasks.score_risk')
+def score_risk(stage_results: list, pipeline_id: str = None) -> dict:
+    """Pipeline stage: combine the image and environmental results into a risk score."""
+    veg_health, env_data = stage_results
+    risk_result = calculate_risk(veg_health, env_data)
+    if pipeline_id:
+        task_events.publish(pipeline_id, "risk_computed", {
+            "overall_risk_score": risk_result["overall_risk_score"],
+            "risk_category": risk_result["risk_category"],
+        })
+    return {
+        "vegetation_health": veg_health,
+        "environmental_data": env_data,
+        "risk_assessment": risk_result,
+    }
+
+@celery_app.task(name='tasks.persist_assessment', bind=True, max_retries=PERSIST_MAX_RETRIES)
+def persist_assessment(self, scored: dict, latitude: float, longitude: float, file_path: str, pipeline_id: str = None) -> str:
+    """
+    Pipeline stage: save the assessment and return its id.
+
+    The write goes straight to the database rather than through the
+    write-behind batcher, so a failed write fails the stage (after retrying
+    transient errors) instead of completing with an id that doesn't exist.
     """
     try:
-        logger.info(f"Starting async processing for {latitude}, {longitude}")
-        
-        # Analyze vegetation health
-        veg_health = analyze_vegetation_health(file_path)
-        
-        # Get environmental data
-        env_data = get_environmental_data(latitude, longitude)
-        
-        # Calculate risk
-        risk_result = calculate_risk(veg_health, env_data)
-        
-        # Save to database
-        assessment_id = save_assessment({
+        assessment_id = run_async(save_assessment({
             "latitude": latitude,
             "longitude": longitude,
-            "vegetation_health": veg_health,
-            "environmental_data": env_data,
-            "risk_assessment": risk_result,
+            **scored,
             "image_path": file_path
-        })
-        
-        # Clean up temp file
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        
-        logger.info(f"Completed async processing, assessment ID: {assessment_id}")
-        return assessment_id
-        
+        }, batched=False))
     except Exception as e:
-        logger.error(f"Error in async processing: {str(e)}")
+        if is_transient_write_error(e):
+            raise self.retry(exc=e, countdown=min(30, 2 ** self.request.retries))
         raise
+    # The embedded store's log is written in the background; sync it
+    # before reporting the assessment as saved
+    run_async(flush_writes())
+    
+    # Content-addressed uploads may be shared with other queued tasks,
+    # so release this task's hold and expire unheld old ones instead of
+    # deleting this file outright
+    if pipeline_id:
+        release_upload(file_path, pipeline_id)
+    prune_uploads()
+    
+    if pipeline_id:
+        task_events.publish(pipeline_id, "completed", {
+            "assessment_id": assessment_id,
+            "risk": scored["risk_assessment"],
+        })
+    logger.info(f"Completed async processing, assessment ID: {assessment_id}")
+    return assessment_id
+
+@celery_app.task(name='tasks.fail_pipeline')
+def fail_pipeline(request, exc, traceback, task_id: str, file_path: str = None):
+    """
+    Errback for every pipeline stage.
+
+    A failed stage stops the rest of the chain, so the final task would stay
+    PENDING forever; record the failure under its id instead.
+
+    A failed chord header task reports through its own errback and again
+    through the chord body's, so only the first report for a pipeline is
+    acted on. The final stage's own failure is already recorded by Celery
+    when its errback runs.
+    """
+    if request.id != task_id and celery_app.backend.get_state(task_id) == states.FAILURE:
+        logger.info(f"Assessment pipeline {task_id} already failed, ignoring error from {request.task}")
+        return
+    logger.error(f"Assessment pipeline {task_id} failed in {request.task}: {str(exc)}")
+    celery_app.backend.mark_as_failure(task_id, exc, traceback)
+    task_events.publish(task_id, "failed", {"detail": str(exc)})
+    if file_path:
+        release_upload(file_path, task_id)
+
+def build_pipeline(task_id: str, file_path: str, latitude: float, longitude: float):
+    """
+    Build the assessment pipeline whose final stage runs under task_id.
+
+    Image analysis (llm queue) and the environmental fetch (io queue) run in
+    parallel as a chord; risk scoring and persistence follow on the io queue.
+    Every stage reports failures to fail_pipeline under task_id.
+    """
+    on_error = fail_pipeline.s(task_id, file_path)
+    return chain(
+        chord(
+            group(
+                analyze_image.s(file_path, pipeline_id=task_id).on_error(on_error),
+                fetch_environment.s(latitude, longitude, pipeline_id=task_id).on_error(on_error),
+            ),
+            score_risk.s(pipeline_id=task_id).on_error(on_error),
+            app=celery_app,
+        ),
+        persist_assessment.s(latitude, longitude, file_path, pipeline_id=task_id).set(task_id=task_id).on_error(on_error),
+        # Celery's current app is thread-local and this may run in a worker thread
+        app=celery_app,
+    )
+
+def start_image_analysis(file_path: str, latitude: float, longitude: float) -> str:
+    """
+    Queue the assessment pipeline for an uploaded image and return its task id.
+
+    The returned id is that of the final stage, whose result is the
+    assessment id; stage progress is published to task_events under it.
+    """
+    task_id = uuid()
+    # Keep the upload on disk however long the llm queue takes to reach it
+    hold_upload(file_path, task_id)
+    logger.info(f"Queueing assessment pipeline {task_id} for {latitude}, {longitude}")
+    pipeline = build_pipeline(task_id, file_path, latitude, longitude)
+    task_events.publish(task_id, "queued")
+    try:
+        pipeline.apply_async()
+    except Exception:
+        # Eager runs re-raise a failed stage here after its errback has
+        # already recorded the failure under task_id; only broker errors
+        # should fail the upload
+        if not celery_app.conf.task_always_eager:
+            raise
+    return task_id
+
+@celery_app.task(name='tasks.process_image_analysis', bind=True)
+def process_image_analysis(self, file_path: str, latitude: float, longitude: float):
+    """
+    Deprecated single-task entry point, kept for one release.
+
+    Messages queued by older API processes still arrive under this name;
+    the task replaces itself with the staged pipeline, which finishes under
+    the same task id, so callers polling it still get the assessment id.
+    """
+    task_id = self.request.id
+    logger.warning(f"tasks.process_image_analysis is deprecated, forwarding {task_id} to the staged pipeline")
+    hold_upload(file_path, task_id)
+    task_events.publish(task_id, "queued")
+    pipeline = build_pipeline(task_id, file_path, latitude, longitude)
+    if self.request.is_eager:
+        # Eager replacement runs the pipeline inline and joins the chord
+        with allow_join_result():
+            return self.replace(pipeline)
+    # Queues the pipeline and raises Ignore, leaving the result to its final stage
+    return self.replace(pipeline)
@@ -0,0 +1,58 @@
+"""
+Tests for /chat and /chat/stream answer caching, with Gemini replaced by
+fixed answers.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import chat_cache
+import main
+from chat_cache import ChatResponseCache
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "chat_cache", ChatResponseCache())
+    return TestClient(main.app)
+
+def test_chat_accepts_null_phi(client, monkeypatch):
+    async def chatLLM_async(phi, question):
+        return f"answer for {phi}"
+
+    monkeypatch.setattr(main, "chatLLM_async", chatLLM_async)
+
+    for _ in range(2):
+        response = client.post("/chat", json={"question": "Why is my grass yellow?", "phi": None})
+        assert response.status_code == 200
+        assert response.json() == {"response": f"answer for {main.DEFAULT_PHI}", "phi": main.DEFAULT_PHI}
+    assert main.chat_cache.hits == 1
+
+def test_chat_stream_accepts_null_phi_and_skips_empty_answers(client, monkeypatch):
+    async def chatLLM_stream_async(phi, question):
+        for text in ("", " \n"):
+            yield text
+
+    monkeypatch.setattr(main, "chatLLM_stream_async", chatLLM_stream_async)
+
+    response = client.post("/chat/stream", json={"question": "Why is my grass yellow?", "phi": None})
+    assert response.status_code == 200
+    assert f'event: done\ndata: {{"phi": {main.DEFAULT_PHI}}}' in response.text
+    assert main.chat_cache.get("Why is my grass yellow?", main.DEFAULT_PHI) is None
+
+def test_similar_lookup_skips_expired_best_match(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(chat_cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    cache = ChatResponseCache(ttl=60, similarity=0.5)
+
+    cache.set("Why is my grass yellow?", 0.5, "stale")
+    now[0] += 30
+    cache.set("Why is all my grass yellow?", 0.5, "fresh")
+    now[0] += 45
+
+    # The closest paraphrase has expired; the live one behind it still answers
+    assert cache.get("Why is my grass so yellow?", 0.5) == "fresh"
+    assert cache.similar_hits == 1
+    assert list(cache._entries) == [(2, "why is all my grass yellow")]
+    assert all((2, "why is my grass yellow") not in keys for keys in cache._index.values())
@@ -0,0 +1,55 @@
+"""
+Tests for provider response handling and the shared HTTP client.
+"""
+
+import asyncio
+
+import httpx
+
+import data_integrator
+import http_client
+from geo_cache import GeoTileCache
+
+def serve(monkeypatch, handler):
+    """Route provider calls to handler and give each test an empty geo cache."""
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(data_integrator, "get_http_client", lambda: client)
+    monkeypatch.setattr(data_integrator, "env_cache", GeoTileCache(use_redis=False))
+
+def test_non_200_success_falls_back_and_is_not_cached(monkeypatch):
+    statuses = [204, 200]
+
+    def handler(request):
+        status = statuses.pop(0) if "open-meteo" in request.url.host else 200
+        if status == 204:
+            return httpx.Response(204)
+        return httpx.Response(200, json={"current": {"temperature_2m": 31, "relative_humidity_2m": 12}})
+
+    serve(monkeypatch, handler)
+
+    first = asyncio.run(data_integrator.get_environmental_data(10.0, 20.0))
+    assert first["sources"]["weather"] == "fallback"
+    assert first["weather"] == data_integrator.FALLBACK_DATA["weather"]
+
+    second = asyncio.run(data_integrator.get_environmental_data(10.0, 20.0))
+    assert second["sources"]["weather"] == "live"
+    assert second["weather"]["temperature"] == 31
+
+def test_error_status_falls_back(monkeypatch):
+    serve(monkeypatch, lambda request: httpx.Response(503))
+    data = asyncio.run(data_integrator.get_environmental_data(10.0, 20.0))
+    assert data["sources"]["weather"] == "fallback"
+    assert data["sources"]["vegetation"] == "fallback"
+
+def test_client_from_a_finished_loop_is_dropped(monkeypatch):
+    monkeypatch.setattr(http_client, "_client", None)
+    monkeypatch.setattr(http_client, "_client_loop", None)
+
+    async def current():
+        return http_client.get_http_client()
+
+    first = asyncio.run(current())
+    second = asyncio.run(current())
+    assert second is not first
+    assert http_client._client is second
+    asyncio.run(second.aclose())
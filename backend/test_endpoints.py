@@ -0,0 +1,110 @@
+"""
+Tests for /risk caching headers, /upload/batch validation and the admin
+token on /metrics/spans.
+
+Assessments go to the in-memory store, so MongoDB is not needed.
+"""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import database
+import main
+from memory_store import AssessmentStore
+from risk_cache import RISK_CACHE_CONTROL, ImmutableResultCache
+from risk_engine import calculate_risk
+
+ENVIRONMENTAL_DATA = {
+    "weather": {"temperature": 34, "humidity": 18},
+    "drought": {"index": 3.5, "category": "Severe"},
+    "fire_weather": {"fwi": 22.0, "category": "High"},
+}
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.png"), "rb") as image:
+    TEST_IMAGE = image.read()
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(database, "MONGODB_AVAILABLE", False)
+    monkeypatch.setattr(database, "memory_store", AssessmentStore(path=""), raising=False)
+    monkeypatch.setattr(main, "risk_cache", ImmutableResultCache())
+    with TestClient(main.app) as client:
+        yield client
+
+def saved_assessment() -> tuple:
+    risk = calculate_risk(40.0, ENVIRONMENTAL_DATA)
+    assessment_id = database.memory_store.insert({
+        "latitude": 37.77,
+        "longitude": -122.42,
+        "vegetation_health": 40.0,
+        "environmental_data": ENVIRONMENTAL_DATA,
+        "risk_assessment": risk,
+    })
+    return assessment_id, risk
+
+def test_risk_carries_immutable_cache_headers(client, monkeypatch):
+    assessment_id, risk = saved_assessment()
+
+    response = client.get(f"/risk/{assessment_id}")
+    assert response.status_code == 200
+    assert response.json()["overall_risk_score"] == risk["overall_risk_score"]
+    assert response.json()["risk_category"] == risk["risk_category"]
+    assert response.headers["cache-control"] == RISK_CACHE_CONTROL
+    etag = response.headers["etag"]
+
+    # Served from the result cache the second time, with the store emptied
+    monkeypatch.setattr(database, "memory_store", AssessmentStore(path=""))
+    again = client.get(f"/risk/{assessment_id}")
+    assert again.status_code == 200 and again.headers["etag"] == etag
+
+def test_risk_if_none_match_returns_304(client):
+    assessment_id, _ = saved_assessment()
+    etag = client.get(f"/risk/{assessment_id}").headers["etag"]
+
+    response = client.get(f"/risk/{assessment_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == RISK_CACHE_CONTROL
+
+def test_risk_if_none_match_for_uncached_assessment_checks_it_exists(client, monkeypatch):
+    assessment_id, _ = saved_assessment()
+    etag = client.get(f"/risk/{assessment_id}").headers["etag"]
+    monkeypatch.setattr(main, "risk_cache", ImmutableResultCache())
+
+    assert client.get(f"/risk/{assessment_id}", headers={"If-None-Match": etag}).status_code == 304
+    # A guessed ETag for an id that doesn't exist is not a 304
+    missing = "0" * 24
+    missing_etag = main.risk_etag(missing)
+    assert client.get(f"/risk/{missing}", headers={"If-None-Match": missing_etag}).status_code == 404
+
+def test_risk_unknown_id_returns_404(client):
+    response = client.get(f"/risk/{'0' * 24}")
+    assert response.status_code == 404
+    assert "etag" not in response.headers
+
+@pytest.mark.parametrize("latitudes, longitudes", [
+    (["37.77"], ["-122.42", "-122.43"]),
+    (["37.77", "37.78"], ["-122.42"]),
+    (["37.77", "37.78", "37.79"], ["-122.42", "-122.43", "-122.44"]),
+])
+def test_upload_batch_rejects_mismatched_coordinates(client, latitudes, longitudes):
+    response = client.post(
+        "/upload/batch",
+        files=[("files", (f"{i}.png", TEST_IMAGE, "image/png")) for i in range(2)],
+        data={"latitudes": latitudes, "longitudes": longitudes},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Each file needs exactly one latitude and longitude"
+
+def test_metrics_spans_requires_admin_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "")
+    assert client.get("/metrics/spans").status_code == 403
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    assert client.get("/metrics/spans").status_code == 403
+    assert client.get("/metrics/spans", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    response = client.get("/metrics/spans", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200 and isinstance(response.json(), list)
@@ -0,0 +1,103 @@
+"""
+Tests for the geo tile cache: shared in-flight fetches, failures, TTLs and
+tile keys.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import geo_cache
+from geo_cache import GeoTileCache, tile_key
+
+def counting_fetch(value, delay=0.01):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return dict(value)
+
+    return fetch, calls
+
+def test_concurrent_callers_share_one_fetch():
+    cache = GeoTileCache(use_redis=False)
+    fetch, calls = counting_fetch({"temperature": 20})
+
+    async def main():
+        # Different points in the same tile
+        return await asyncio.gather(*[
+            cache.get_or_fetch("weather", 37.7712 + i * 1e-4, -122.4191, fetch) for i in range(20)
+        ])
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert [value for value, _ in results] == [{"temperature": 20}] * 20
+    assert not any(cached for _, cached in results)
+    assert not cache._inflight
+    # Each caller gets its own copy
+    results[0][0]["temperature"] = 99
+    assert results[1][0]["temperature"] == 20
+
+    value, cached = asyncio.run(cache.get_or_fetch("weather", 37.7712, -122.4191, fetch))
+    assert cached and value == {"temperature": 20} and len(calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_failed_fetch_does_not_poison_the_tile():
+    cache = GeoTileCache(use_redis=False)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream down")
+        return {"index": 1.5}
+
+    async def main():
+        failures = await asyncio.gather(
+            *[cache.get_or_fetch("drought", 10.0, 20.0, flaky) for _ in range(5)],
+            return_exceptions=True,
+        )
+        return failures, await cache.get_or_fetch("drought", 10.0, 20.0, flaky)
+
+    failures, (value, cached) = asyncio.run(main())
+    # Every waiter on the failed fetch sees its error, none of it is cached
+    assert all(isinstance(error, RuntimeError) for error in failures)
+    assert value == {"index": 1.5} and not cached
+    assert len(attempts) == 2
+    assert not cache._inflight
+
+def test_waiter_timeout_does_not_cancel_the_fetch():
+    cache = GeoTileCache(use_redis=False)
+    fetch, calls = counting_fetch({"fwi": 4.0}, delay=0.05)
+
+    async def main():
+        slow = asyncio.ensure_future(cache.get_or_fetch("fire_weather", 1.0, 2.0, fetch))
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.get_or_fetch("fire_weather", 1.0, 2.0, fetch), 0.01)
+        return await slow
+
+    assert asyncio.run(main()) == ({"fwi": 4.0}, False)
+    assert len(calls) == 1
+
+def test_entries_expire_after_their_source_ttl(monkeypatch):
+    now = [1000.0]
+    # Only the cache's clock; the event loop keeps the real one
+    monkeypatch.setattr(geo_cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    cache = GeoTileCache(use_redis=False)
+    fetch, calls = counting_fetch({"temperature": 20})
+
+    asyncio.run(cache.get_or_fetch("weather", 0.0, 0.0, fetch))
+    now[0] += geo_cache.SOURCE_TTLS["weather"] - 1
+    assert asyncio.run(cache.get_or_fetch("weather", 0.0, 0.0, fetch))[1]
+    now[0] += 2
+    assert not asyncio.run(cache.get_or_fetch("weather", 0.0, 0.0, fetch))[1]
+    assert len(calls) == 2
+
+def test_tile_key_floors_negative_coordinates():
+    # Truncation toward zero would put -0.005 and 0.005 in the same tile
+    assert tile_key("weather", -0.005, 0.0) != tile_key("weather", 0.005, 0.0)
+    assert tile_key("weather", -0.005, -0.005) == tile_key("weather", -0.001, -0.009)
+    assert tile_key("weather", 37.771, -122.419) == tile_key("weather", 37.779, -122.411)
@@ -0,0 +1,76 @@
+"""
+Tests for the geohash radius index against a brute-force haversine filter.
+"""
+
+import random
+
+import pytest
+
+from geo_index import GeohashIndex, covering_cells, haversine_km
+
+def brute_force(points, latitude, longitude, radius_km):
+    return {
+        key for key, (lat, lon) in points.items()
+        if haversine_km(latitude, longitude, lat, lon) <= radius_km
+    }
+
+def scatter(rng, center_lat, center_lon, spread, count):
+    """Points around a centre, wrapped across the antimeridian and clamped at the poles."""
+    points = {}
+    for i in range(count):
+        lat = min(90.0, max(-90.0, center_lat + rng.uniform(-spread, spread)))
+        lon = (center_lon + rng.uniform(-spread, spread) + 180.0) % 360.0 - 180.0
+        points[i] = (lat, lon)
+    return points
+
+@pytest.mark.parametrize("center_lat, center_lon", [
+    (37.77, -122.42),   # mid-latitude
+    (0.0, 179.95),      # antimeridian, east side
+    (-12.0, -179.99),   # antimeridian, west side
+    (89.9, 45.0),       # north pole
+    (-89.5, -170.0),    # south pole
+    (78.0, 10.0),       # high latitude, where longitude cells shrink
+])
+@pytest.mark.parametrize("radius_km", [0.5, 3, 25, 150, 900, 6000])
+def test_query_radius_matches_brute_force(center_lat, center_lon, radius_km):
+    rng = random.Random(f"{center_lat},{center_lon},{radius_km}")
+    spread = min(60.0, radius_km / 40)
+    points = scatter(rng, center_lat, center_lon, spread, 400)
+    index = GeohashIndex()
+    for key, (lat, lon) in points.items():
+        index.add(key, lat, lon)
+
+    for _ in range(10):
+        lat, lon = next(iter(scatter(rng, center_lat, center_lon, spread / 2, 1).values()))
+        results = index.query_radius(lat, lon, radius_km)
+        assert {key for key, _ in results} == brute_force(points, lat, lon, radius_km)
+        distances = [distance for _, distance in results]
+        assert distances == sorted(distances)
+
+def test_neighbours_across_the_antimeridian():
+    index = GeohashIndex()
+    index.add("east", 10.0, 179.99)
+    index.add("west", 10.0, -179.99)
+    assert [key for key, _ in index.query_radius(10.0, -179.995, 5)] == ["west", "east"]
+
+def test_neighbours_across_the_pole():
+    index = GeohashIndex()
+    index.add("near", 89.99, 0.0)
+    index.add("far side", 89.99, 180.0)
+    assert {key for key, _ in index.query_radius(89.99, 0.0, 5)} == {"near", "far side"}
+
+def test_large_radius_scans_everything():
+    assert covering_cells(0.0, 0.0, 8000) == (0, set())
+    index = GeohashIndex()
+    index.add("sydney", -33.87, 151.21)
+    index.add("london", 51.51, -0.13)
+    assert [key for key, _ in index.query_radius(-37.81, 144.96, 8000)] == ["sydney"]
+
+def test_remove_drops_every_cell():
+    index = GeohashIndex()
+    index.add("a", 48.85, 2.35)
+    index.add("a", 40.71, -74.0)
+    assert index.query_radius(48.85, 2.35, 10) == []
+    index.remove("a")
+    assert len(index) == 0
+    assert all(not cells for cells in index._cells)
@@ -0,0 +1,33 @@
+"""
+Tests for when the local vegetation index may answer without the LLM.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from PIL import Image
+
+import image_processor
+from vision_cache import VisionCache
+
+def score(monkeypatch, color):
+    """Score a solid-colour image with a stub model; return (score, model calls)."""
+    calls = []
+
+    async def fake_run_llm(call, generate, parts):
+        calls.append(parts)
+        return SimpleNamespace(text="Score: 12\nExplanation: dry lawn")
+
+    monkeypatch.setattr(image_processor, "vision_cache", VisionCache())
+    monkeypatch.setattr(image_processor, "get_model", lambda name: SimpleNamespace(generate_content=None))
+    monkeypatch.setattr(image_processor, "run_llm", fake_run_llm)
+    result = asyncio.run(image_processor._score_image(Image.new("RGB", (64, 64), color)))
+    return result, len(calls)
+
+def test_green_scene_is_scored_locally(monkeypatch):
+    assert score(monkeypatch, (40, 160, 40)) == (100.0, 0)
+
+def test_low_green_scene_goes_to_the_llm(monkeypatch):
+    # A confident local 0 could be dead grass or not vegetation at all
+    for color in [(128, 128, 128), (150, 110, 60), (20, 20, 200)]:
+        assert score(monkeypatch, color) == (12.0, 1)
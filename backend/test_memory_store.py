@@ -0,0 +1,85 @@
+"""
+Tests for the embedded assessment store: radius queries, eviction and the
+JSON-lines log.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from geo_index import haversine_km
+from memory_store import AssessmentStore
+
+def document(latitude, longitude, minutes=0, **fields):
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "timestamp": datetime(2026, 1, 1) + timedelta(minutes=minutes),
+        "risk_assessment": {"overall_risk_score": minutes},
+        **fields,
+    }
+
+def test_query_radius_matches_brute_force():
+    rng = random.Random(7)
+    store = AssessmentStore(path="")
+    points = {}
+    for i in range(500):
+        lat, lon = 37 + rng.uniform(-2, 2), -122 + rng.uniform(-2, 2)
+        points[store.insert(document(lat, lon, i))] = (lat, lon)
+
+    for radius_km in (5, 40, 150):
+        lat, lon = 37 + rng.uniform(-1, 1), -122 + rng.uniform(-1, 1)
+        expected = {
+            key for key, (plat, plon) in points.items()
+            if haversine_km(lat, lon, plat, plon) <= radius_km
+        }
+        results = store.query_radius(lat, lon, radius_km, limit=len(points))
+        assert {result["_id"] for result in results} == expected
+        assert all(abs(result["distance_km"] - haversine_km(lat, lon, result["latitude"], result["longitude"])) < 1e-9
+                   for result in results)
+
+        newest = store.query_radius(lat, lon, radius_km, sort_by="time", limit=5)
+        timestamps = [result["timestamp"] for result in newest]
+        assert timestamps == sorted(timestamps, reverse=True)
+
+def test_eviction_drops_index_entries():
+    store = AssessmentStore(max_items=3, path="")
+    ids = [store.insert(document(10.0, 20.0 + i * 0.001, i)) for i in range(5)]
+
+    assert len(store) == 3
+    assert store.get(ids[0]) is None and store.get(ids[1]) is None
+    assert len(store._geo) == 3
+    assert {result["_id"] for result in store.query_radius(10.0, 20.0, 10)} == set(ids[2:])
+
+def test_log_round_trip(tmp_path):
+    path = str(tmp_path / "assessments.jsonl")
+    store = AssessmentStore(path=path)
+    ids = [store.insert(document(-33.87, 151.21 + i * 0.01, i, image_sha256=f"sha{i}")) for i in range(3)]
+    assert store.flush(timeout=5)
+    written = [store.get(assessment_id) for assessment_id in ids]
+    store.close()
+
+    reopened = AssessmentStore(path=path)
+    try:
+        assert [reopened.get(assessment_id) for assessment_id in ids] == written
+        assert {result["_id"] for result in reopened.query_radius(-33.87, 151.21, 10)} == set(ids)
+    finally:
+        reopened.close()
+
+def test_log_compaction_keeps_only_held_records(tmp_path):
+    path = tmp_path / "assessments.jsonl"
+    store = AssessmentStore(max_items=2, path=str(path))
+    ids = []
+    for i in range(12):
+        ids.append(store.insert(document(0.0, 0.0, i)))
+        # One batch per insert, so the writer gets to compact along the way
+        assert store.flush(timeout=5)
+    store.close()
+
+    # Compaction rewrites the log whenever it exceeds twice the capacity
+    assert len(path.read_text().splitlines()) <= 2 * store.max_items
+    reopened = AssessmentStore(max_items=2, path=str(path))
+    try:
+        assert len(reopened) == 2
+        assert [reopened.get(assessment_id)["_id"] for assessment_id in ids[-2:]] == ids[-2:]
+    finally:
+        reopened.close()
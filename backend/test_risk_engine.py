@@ -0,0 +1,58 @@
+"""
+Tests that the vectorized risk scoring matches the scalar calculate_risk.
+"""
+
+import numpy as np
+
+from risk_engine import (
+    RECOMMENDATION_TABLE,
+    RISK_CATEGORIES,
+    calculate_risk,
+    calculate_risk_batch,
+    calculate_risk_many,
+)
+
+def environment(drought_index, fwi, temperature=25.0, humidity=50.0):
+    return {
+        'weather': {'temperature': temperature, 'humidity': humidity},
+        'drought': {'index': drought_index, 'category': 'Moderate'},
+        'fire_weather': {'fwi': fwi, 'category': 'Low'}
+    }
+
+def rows(count, seed=0):
+    rng = np.random.default_rng(seed)
+    veg = np.round(rng.uniform(0, 100, count), 2).tolist()
+    drought = np.round(rng.uniform(-6, 6, count), 2).tolist()
+    fwi = np.round(rng.uniform(0, 40, count), 2).tolist()
+    # Every threshold exactly: veg 50, drought score 50 (index 0) and fire
+    # score 50 (fwi 15), alone and together, plus overall scores landing on
+    # 25/50/75 and on rounding ties
+    for v, d, f in [
+        (50, 0, 15), (50, 2, 5), (40, 0, 30), (60, -4, 15),
+        (0, 0, 15), (62.5, 0, 0), (100, 4, 30), (12.5, 0, 15),
+        (50.125, 0, 15), (0.125, -4, 0), (49.99, 0.01, 15.01),
+    ]:
+        veg.append(v)
+        drought.append(d)
+        fwi.append(f)
+    return veg, drought, fwi
+
+def test_batch_matches_scalar_row_for_row():
+    veg, drought, fwi = rows(5000)
+    batch = calculate_risk_batch(veg, drought, fwi)
+
+    for i, (v, d, f) in enumerate(zip(veg, drought, fwi)):
+        expected = calculate_risk(v, environment(d, f))
+        assert batch['overall_risk_score'][i] == expected['overall_risk_score'], (v, d, f)
+        assert RISK_CATEGORIES[batch['risk_category_code'][i]] == expected['risk_category'], (v, d, f)
+        assert RECOMMENDATION_TABLE[batch['recommendation_code'][i]] == expected['recommendation'], (v, d, f)
+
+def test_many_returns_scalar_dicts():
+    veg, drought, fwi = rows(500, seed=1)
+    envs = [environment(d, f) for d, f in zip(drought, fwi)]
+    assert calculate_risk_many(veg, envs) == [calculate_risk(v, env) for v, env in zip(veg, envs)]
+
+def test_many_uses_scalar_defaults_for_missing_data():
+    envs = [{}, {'drought': {'index': 0}}, {'fire_weather': {'fwi': 15}}]
+    veg = [50, 50, 50]
+    assert calculate_risk_many(veg, envs) == [calculate_risk(v, env) for v, env in zip(veg, envs)]
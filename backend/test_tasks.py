@@ -0,0 +1,171 @@
+"""
+Tests for the queued assessment pipeline.
+
+Celery runs eagerly (see conftest.py) and assessments go to the in-memory
+store, so neither Redis nor MongoDB is needed. The Gemini and
+environmental API calls are replaced with fixed results.
+"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import database
+import main
+import task_events as task_events_module
+import tasks
+from memory_store import AssessmentStore
+from task_events import task_events
+from upload_stream import HOLD_SUFFIX
+
+ENVIRONMENTAL_DATA = {
+    "weather": {"temperature": 34, "humidity": 18},
+    "drought": {"index": 3.5},
+    "vegetation": {"ndvi": 0.3},
+    "fire_weather": {"fwi": 22.0},
+    "sources": {"weather": "live", "drought": "live", "vegetation": "live", "fire_weather": "live"},
+}
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.png"), "rb") as image:
+    TEST_IMAGE = image.read()
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(database, "MONGODB_AVAILABLE", False)
+    monkeypatch.setattr(database, "memory_store", AssessmentStore(), raising=False)
+
+    async def analyze_vegetation_health(file_path):
+        return 0.25
+
+    async def get_environmental_data(latitude, longitude):
+        return dict(ENVIRONMENTAL_DATA)
+
+    monkeypatch.setattr(tasks, "analyze_vegetation_health", analyze_vegetation_health)
+    monkeypatch.setattr(tasks, "get_environmental_data", get_environmental_data)
+    with TestClient(main.app) as client:
+        yield client
+
+def upload(client) -> str:
+    response = client.post(
+        "/upload",
+        files={"file": ("test.png", TEST_IMAGE, "image/png")},
+        data={"latitude": "37.77", "longitude": "-122.42"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["assessment_id"] is None
+    assert body["task_id"]
+    return body["task_id"]
+
+def events(task_id: str):
+    return [message["event"] for message in task_events._local_history[task_id]]
+
+def holds():
+    return [name for name in os.listdir(os.environ["UPLOAD_DIR"]) if name.endswith(HOLD_SUFFIX)]
+
+def test_upload_completes_with_assessment_id(client):
+    task_id = upload(client)
+
+    response = client.get(f"/tasks/{task_id}")
+    assert response.status_code == 200
+    status = response.json()
+    assert status["task_id"] == task_id
+    assert status["status"] == "completed"
+    assert status["assessment_id"]
+
+    # The id reported by the final stage is a stored assessment
+    assert tasks.persist_assessment.AsyncResult(task_id).state == "SUCCESS"
+    risk = client.get(f"/risk/{status['assessment_id']}")
+    assert risk.status_code == 200
+    assert risk.json()["vegetation_health"] == 0.25
+
+def test_pipeline_runs_every_stage(client):
+    task_id = upload(client)
+
+    # Both chord branches finish before scoring, and persistence comes last
+    history = events(task_id)
+    assert history[0] == "queued"
+    assert sorted(history[1:3]) == ["environment_fetched", "image_scored"]
+    assert history[3:] == ["risk_computed", "completed"]
+    assert task_id not in "".join(holds())
+
+def test_failed_stage_marks_task_failed(client, monkeypatch):
+    async def analyze_vegetation_health(file_path):
+        raise RuntimeError("vision model unavailable")
+
+    monkeypatch.setattr(tasks, "analyze_vegetation_health", analyze_vegetation_health)
+    task_id = upload(client)
+
+    status = client.get(f"/tasks/{task_id}").json()
+    assert status["status"] == "failed"
+    assert "vision model unavailable" in status["detail"]
+    # The other chord branch may still finish, but nothing after it runs
+    history = events(task_id)
+    assert "failed" in history
+    assert "risk_computed" not in history and "completed" not in history
+    assert task_id not in "".join(holds())
+
+def test_repeated_errbacks_report_one_failure(client, monkeypatch):
+    released = []
+    monkeypatch.setattr(tasks, "release_upload", lambda file_path, task_id: released.append(task_id))
+    task_id = "pipeline-with-failed-header"
+    header = SimpleNamespace(id="header-task", task="tasks.analyze_image")
+
+    # A chord header failure reaches both its own errback and the chord body's
+    for _ in range(2):
+        tasks.fail_pipeline(header, RuntimeError("vision model unavailable"), None, task_id, "upload.png")
+
+    assert events(task_id) == ["failed"]
+    assert released == [task_id]
+    assert tasks.persist_assessment.AsyncResult(task_id).state == "FAILURE"
+
+def test_final_stage_failure_is_reported(client, monkeypatch):
+    async def save_assessment(assessment_data, batched=True):
+        raise ValueError("document too large")
+
+    monkeypatch.setattr(tasks, "save_assessment", save_assessment)
+    task_id = upload(client)
+
+    assert client.get(f"/tasks/{task_id}").json()["status"] == "failed"
+    assert events(task_id).count("failed") == 1
+    assert "completed" not in events(task_id)
+    assert task_id not in "".join(holds())
+
+def test_deprecated_task_forwards_to_pipeline(client, tmp_path):
+    image_path = tmp_path / "legacy.png"
+    image_path.write_bytes(TEST_IMAGE)
+
+    result = tasks.process_image_analysis.delay(str(image_path), 37.77, -122.42)
+
+    # The legacy task id still resolves to the assessment id
+    status = client.get(f"/tasks/{result.id}").json()
+    assert status["status"] == "completed"
+    assert client.get(f"/risk/{status['assessment_id']}").status_code == 200
+    assert events(result.id)[-1] == "completed"
+
+def stream(client, task_id: str) -> str:
+    with client.stream("GET", f"/tasks/{task_id}/events") as response:
+        assert response.status_code == 200
+        return response.read().decode()
+
+def test_event_stream_replays_finished_task(client):
+    task_id = upload(client)
+    assessment_id = client.get(f"/tasks/{task_id}").json()["assessment_id"]
+
+    assert "event: completed" in stream(client, task_id)
+
+    # Once the event history has expired the outcome comes from Celery
+    del task_events._local_history[task_id]
+    body = stream(client, task_id)
+    assert body.startswith("event: completed")
+    assert assessment_id in body
+
+def test_event_stream_closes_for_unknown_task(client, monkeypatch):
+    monkeypatch.setattr(task_events_module, "TASK_EVENTS_KEEPALIVE", 0.05)
+    monkeypatch.setattr(main, "TASK_EVENTS_UNKNOWN_TIMEOUT", 0.1)
+
+    body = stream(client, "no-such-task")
+    assert body.rstrip().endswith('data: {"detail": "Unknown or expired task"}')
+    assert "event: failed" in body
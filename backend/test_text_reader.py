@@ -0,0 +1,50 @@
+"""
+Tests for grouping Tesseract TSV output into paragraphs.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "model"))
+
+from textReader import parse_tsv
+
+HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+
+def tsv(*rows):
+    return "\n".join([HEADER, *("\t".join(str(col) for col in row) for row in rows)]) + "\n"
+
+def test_words_are_grouped_by_block_and_paragraph():
+    output = tsv(
+        # Page, block, paragraph and line rows carry no text (conf -1)
+        (1, 1, 0, 0, 0, 0, 0, 0, 1240, 1754, -1, ""),
+        (2, 1, 1, 0, 0, 0, 80, 80, 600, 80, -1, ""),
+        (3, 1, 1, 1, 0, 0, 80, 80, 600, 80, -1, ""),
+        (4, 1, 1, 1, 1, 0, 80, 80, 600, 30, -1, ""),
+        (5, 1, 1, 1, 1, 1, 80, 80, 120, 30, 96.5, "Dry"),
+        (5, 1, 1, 1, 1, 2, 210, 82, 90, 28, 91.0, "soil"),
+        # Second line of the same paragraph
+        (4, 1, 1, 1, 2, 0, 80, 120, 500, 40, -1, ""),
+        (5, 1, 1, 1, 2, 1, 80, 120, 200, 40, 88.2, "needs"),
+        (5, 1, 1, 1, 2, 2, 290, 121, 140, 39, 90.4, "water"),
+        # Blank words come back with conf -1 and are dropped
+        (5, 1, 1, 1, 2, 3, 440, 121, 10, 39, -1, " "),
+        # Second paragraph of the block
+        (3, 1, 1, 2, 0, 0, 80, 200, 300, 30, -1, ""),
+        (5, 1, 1, 2, 1, 1, 80, 200, 300, 30, 93.0, "Irrigate."),
+        # Another block
+        (2, 1, 2, 0, 0, 0, 700, 80, 200, 30, -1, ""),
+        (5, 1, 2, 1, 1, 1, 700, 80, 200, 30, 95.1, "Notes"),
+    )
+
+    assert parse_tsv(output) == [
+        ((80, 80, 430, 160), "Dry soil needs water"),
+        ((80, 200, 380, 230), "Irrigate."),
+        ((700, 80, 900, 110), "Notes"),
+    ]
+
+def test_empty_and_truncated_output():
+    assert parse_tsv("") == []
+    assert parse_tsv(HEADER + "\n") == []
+    # A word row cut off before its text column is skipped
+    assert parse_tsv(tsv((5, 1, 1, 1, 1, 1, 0, 0, 10, 10, 90))) == []
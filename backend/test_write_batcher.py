@@ -0,0 +1,155 @@
+"""
+Tests for the write-behind batcher against a fake collection whose
+insert_many fails in scripted ways.
+"""
+
+import asyncio
+
+from bson import json_util
+from pymongo.errors import BulkWriteError, ConnectionFailure
+
+from write_batcher import DUPLICATE_KEY_ERROR, WriteBatcher
+
+VALIDATION_ERROR = 121
+NOT_WRITABLE_PRIMARY = 10107
+
+class FakeCollection:
+    """Records written documents; each call's outcome comes from a script."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+        self.written = []
+
+    async def insert_many(self, batch, ordered=True):
+        self.calls.append([document["n"] for document in batch])
+        outcome = self.outcomes.pop(0) if self.outcomes else None
+        if callable(outcome):
+            outcome = outcome(batch)
+        if isinstance(outcome, BulkWriteError):
+            failed = {error["index"] for error in outcome.details["writeErrors"]}
+            self.written.extend(document for i, document in enumerate(batch) if i not in failed)
+            raise outcome
+        if outcome is not None:
+            raise outcome
+        self.written.extend(batch)
+
+def bulk_error(*errors):
+    return BulkWriteError({
+        "writeErrors": [{"index": index, "code": code, "errmsg": "failed"} for index, code in errors],
+        "writeConcernErrors": [],
+    })
+
+def run(collection, scenario, **options):
+    async def main():
+        batcher = WriteBatcher(collection, max_batch=10, flush_interval=60, **options)
+        try:
+            return await scenario(batcher)
+        finally:
+            batcher._cancel_timer()
+    return asyncio.run(main())
+
+def add(batcher, *numbers):
+    return [batcher.add({"n": n}) for n in numbers]
+
+def test_transient_failure_is_retried_in_order():
+    collection = FakeCollection(ConnectionFailure("primary stepped down"))
+
+    async def scenario(batcher):
+        ids = add(batcher, 1, 2)
+        await batcher.flush()
+        # Still readable while waiting for the retry
+        assert all(batcher.get_pending(document["_id"]) for document in batcher._queue)
+        add(batcher, 3)
+        await batcher.flush()
+        return batcher, ids
+
+    batcher, ids = run(collection, scenario)
+    assert collection.calls == [[1, 2], [1, 2, 3]]
+    assert [document["n"] for document in collection.written] == [1, 2, 3]
+    assert batcher.dropped == 0
+    assert not batcher._pending and not batcher._attempts
+
+def test_bulk_write_errors_split_transient_permanent_and_duplicates(tmp_path):
+    dead_letters = tmp_path / "dead.jsonl"
+    collection = FakeCollection(bulk_error(
+        (0, DUPLICATE_KEY_ERROR), (1, VALIDATION_ERROR), (2, NOT_WRITABLE_PRIMARY)
+    ))
+
+    async def scenario(batcher):
+        ids = add(batcher, 0, 1, 2, 3)
+        await batcher.flush()
+        return batcher, ids
+
+    batcher, ids = run(collection, scenario, dead_letter_path=str(dead_letters))
+    # 0 was written by an earlier attempt, 3 now; 1 is rejected for good; 2 waits for a retry
+    assert [document["n"] for document in batcher._queue] == [2]
+    assert [str(key) for key in batcher._pending] == [ids[2]]
+    assert batcher.dropped == 1
+    dropped = [json_util.loads(line) for line in dead_letters.read_text().splitlines()]
+    assert [(str(document["_id"]), document["n"]) for document in dropped] == [(ids[1], 1)]
+
+def test_non_bulk_error_is_isolated_by_single_writes(tmp_path):
+    dead_letters = tmp_path / "dead.jsonl"
+
+    def too_large(batch):
+        if any(document["n"] == 2 for document in batch):
+            return ValueError("document too large")
+        return None
+
+    collection = FakeCollection(*[too_large] * 4)
+
+    async def scenario(batcher):
+        add(batcher, 1, 2, 3)
+        await batcher.flush()
+        return batcher
+
+    batcher = run(collection, scenario, dead_letter_path=str(dead_letters))
+    assert collection.calls == [[1, 2, 3], [1], [2], [3]]
+    assert [document["n"] for document in collection.written] == [1, 3]
+    assert batcher.dropped == 1 and not batcher._queue and not batcher._pending
+    assert json_util.loads(dead_letters.read_text())["n"] == 2
+
+def test_attempt_budget_dead_letters_after_max_attempts(tmp_path):
+    dead_letters = tmp_path / "dead.jsonl"
+    collection = FakeCollection(*[ConnectionFailure("down")] * 5)
+
+    async def scenario(batcher):
+        add(batcher, 1)
+        for _ in range(3):
+            await batcher.flush()
+        return batcher
+
+    batcher = run(collection, scenario, max_attempts=3, dead_letter_path=str(dead_letters))
+    assert collection.calls == [[1], [1], [1]]
+    assert batcher.dropped == 1
+    assert not batcher._queue and not batcher._pending and not batcher._attempts
+    assert len(dead_letters.read_text().splitlines()) == 1
+
+def test_backoff_timer_retries_without_another_add():
+    collection = FakeCollection(ConnectionFailure("down"), ConnectionFailure("down"))
+
+    async def scenario(batcher):
+        add(batcher, 1)
+        await batcher.flush()
+        # retry_delay, then twice that, then the write succeeds
+        await asyncio.sleep(0.2)
+        return batcher
+
+    batcher = run(collection, scenario, retry_delay=0.02)
+    assert collection.calls == [[1], [1], [1]]
+    assert [document["n"] for document in collection.written] == [1]
+    assert not batcher._pending
+
+def test_close_dead_letters_what_it_cannot_write(tmp_path):
+    dead_letters = tmp_path / "dead.jsonl"
+    collection = FakeCollection(*[ConnectionFailure("down")] * 5)
+
+    async def scenario(batcher):
+        add(batcher, 1, 2)
+        await batcher.close(rounds=0)
+        return batcher
+
+    batcher = run(collection, scenario, dead_letter_path=str(dead_letters))
+    assert batcher.dropped == 2 and not batcher._queue and not batcher._pending
+    assert len(dead_letters.read_text().splitlines()) == 2
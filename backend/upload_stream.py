@@ -0,0 +1,133 @@
+import hashlib
+import os
+import tempfile
+import time
+from typing import BinaryIO, Tuple
+from fastapi import HTTPException, UploadFile
+from loguru import logger
+
+# Streaming ingest settings
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_SPOOL_MAX_BYTES = int(os.getenv("UPLOAD_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Where uploads handed to Celery are stored, named by content hash
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "drought_fire_uploads"))
+UPLOAD_RETENTION_SECONDS = int(os.getenv("UPLOAD_RETENTION_SECONDS", "3600"))
+# Queued tasks hold their upload until they finish; a hold older than this
+# belongs to a lost task and no longer protects the file
+UPLOAD_HOLD_MAX_SECONDS = int(os.getenv("UPLOAD_HOLD_MAX_SECONDS", str(7 * 24 * 3600)))
+HOLD_SUFFIX = ".hold"
+
+async def read_upload(file: UploadFile) -> Tuple[BinaryIO, str, int]:
+    """
+    Stream an upload into a spooled buffer in fixed-size chunks.
+
+    Small uploads stay in memory, larger ones roll over to an anonymous temp
+    file, so peak memory per upload is bounded by UPLOAD_SPOOL_MAX_BYTES.
+    Returns (buffer rewound to 0, sha256 hex digest, size in bytes).
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_BYTES)
+    digest = hashlib.sha256()
+    size = 0
+
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > UPLOAD_MAX_BYTES:
+            buffer.close()
+            raise HTTPException(status_code=413, detail=f"Upload exceeds {UPLOAD_MAX_BYTES} bytes")
+        digest.update(chunk)
+        buffer.write(chunk)
+
+    buffer.seek(0)
+    return buffer, digest.hexdigest(), size
+
+def persist_upload(buffer: BinaryIO, digest: str, filename: str = "") -> str:
+    """
+    Write a buffered upload to UPLOAD_DIR under its content hash.
+
+    Identical content maps to the same file, so concurrent uploads never
+    overwrite each other with different data. Returns the file path.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    extension = os.path.splitext(filename or "")[1].lower()
+    file_path = os.path.join(UPLOAD_DIR, f"{digest}{extension}")
+
+    if os.path.exists(file_path):
+        # Refresh mtime so pruning keeps it until this task has run
+        os.utime(file_path)
+        return file_path
+
+    # Write to a unique temp name first, then atomically move into place
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".part")
+    with os.fdopen(fd, "wb") as out:
+        buffer.seek(0)
+        while True:
+            chunk = buffer.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            out.write(chunk)
+    os.replace(tmp_path, file_path)
+    return file_path
+
+def _hold_path(file_path: str, task_id: str) -> str:
+    return f"{file_path}.{task_id}{HOLD_SUFFIX}"
+
+def hold_upload(file_path: str, task_id: str) -> None:
+    """Keep a persisted upload from being pruned until task_id releases it."""
+    with open(_hold_path(file_path, task_id), "w"):
+        pass
+
+def release_upload(file_path: str, task_id: str) -> None:
+    """Drop task_id's hold on an upload; it is pruned once unheld and old."""
+    try:
+        os.remove(_hold_path(file_path, task_id))
+    except FileNotFoundError:
+        pass
+
+def prune_uploads(max_age_seconds: int = UPLOAD_RETENTION_SECONDS) -> int:
+    """
+    Remove persisted uploads older than max_age_seconds that no task holds.
+
+    Content-addressed files can be shared by several queued tasks, so they are
+    aged out rather than deleted when the first task finishes. Files still
+    held by a queued task are kept however old they are, so a backed-up llm
+    queue never loses its images.
+    """
+    if not os.path.isdir(UPLOAD_DIR):
+        return 0
+
+    now = time.time()
+    entries = [entry for entry in os.scandir(UPLOAD_DIR) if entry.is_file()]
+    held = set()
+    for entry in entries:
+        if not entry.name.endswith(HOLD_SUFFIX):
+            continue
+        try:
+            if entry.stat().st_mtime < now - UPLOAD_HOLD_MAX_SECONDS:
+                logger.warning(f"Dropping stale upload hold {entry.name}")
+                os.remove(entry.path)
+            else:
+                # <digest><ext>.<task_id>.hold
+                held.add(entry.name[:-len(HOLD_SUFFIX)].rsplit(".", 1)[0])
+        except FileNotFoundError:
+            pass
+
+    cutoff = now - max_age_seconds
+    removed = 0
+    for entry in entries:
+        if entry.name.endswith(HOLD_SUFFIX) or entry.name in held:
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+
+    if removed:
+        logger.info(f"Pruned {removed} expired uploads from {UPLOAD_DIR}")
+    return removed
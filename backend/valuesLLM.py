@@ -1,7 +1,46 @@
-import os
+import io
 import json
+import os
 import re
-from google import genai  # Updated import
+import sys
+from typing import BinaryIO, List, Literal, Union
+from pydantic import BaseModel, Field, TypeAdapter
+from loguru import logger
+from image_preprocess import preprocess_image, encode_image, log_preprocess_stats
+from llm_clients import get_genai_client, call_with_retry, VALUES_MODEL
+
+# Optional google-genai SDK; get_genai_client() raises before types is needed
+try:
+    from google.genai import types
+except ImportError:
+    types = None
+
+# Total image bytes sent inline per request; larger batches go through the File API
+INLINE_MAX_BYTES = int(os.getenv("VALUES_INLINE_MAX_BYTES", str(15 * 1024 * 1024)))
+
+ATTRIBUTES_PROMPT = """
+Given this image of a plant, output the following attributes in JSON format:
+
+1. predicted_ndvi: float (-1 to 1)
+2. leaf_area_index: float (0 to 10)
+3. chlorophyll_content: float (0 to 100)
+4. water_stress: float (0 to 1, where 0 = healthy, 1 = severe stress)
+5. pest_disease_risk: float (0 to 1, where 0 = none, 1 = high risk)
+6. growth_stage: string (seedling, vegetative, flowering, fruiting)
+7. canopy_density: float (0 to 1)
+"""
+
+class PlantAttributes(BaseModel):
+    """Plant attributes estimated from one image."""
+    predicted_ndvi: float = Field(..., ge=-1, le=1)
+    leaf_area_index: float = Field(..., ge=0, le=10)
+    chlorophyll_content: float = Field(..., ge=0, le=100)
+    water_stress: float = Field(..., ge=0, le=1)
+    pest_disease_risk: float = Field(..., ge=0, le=1)
+    growth_stage: Literal["seedling", "vegetative", "flowering", "fruiting"]
+    canopy_density: float = Field(..., ge=0, le=1)
+
+_attributes_list = TypeAdapter(List[PlantAttributes])
 
 def clean_gemini_json(raw_output):
     """
@@ -15,70 +54,82 @@ def clean_gemini_json(raw_output):
     # Strip leading/trailing whitespace and newlines
     return cleaned.strip()
 
-def chatLLM_image(image_path):
-    prompt = """
-Given this image of a plant, output the following attributes in JSON format:
+def prepare_image_bytes(image_source: Union[str, BinaryIO]) -> bytes:
+    """Downsample and JPEG-encode an image with the shared preprocessor."""
+    prepared = preprocess_image(image_source)
+    image_bytes = encode_image(prepared.image, prepared.stats)
+    log_preprocess_stats("Plant image", prepared.stats)
+    return image_bytes
 
-1. predicted_ndvi: float (-1 to 1)
-2. leaf_area_index: float (0 to 10)
-3. chlorophyll_content: float (0 to 100)
-4. water_stress: float (0 to 1, where 0 = healthy, 1 = severe stress)
-5. pest_disease_risk: float (0 to 1, where 0 = none, 1 = high risk)
-6. growth_stage: string (seedling, vegetative, flowering, fruiting)
-7. canopy_density: float (0 to 1)
-"""
+def _image_parts(client, images: List[bytes]) -> list:
+    """
+    Build the image parts for a request.
+
+    Preprocessed images are small, so they are sent inline in the same
+    request; only if a batch would exceed INLINE_MAX_BYTES are the remaining
+    images uploaded through the File API first.
+    """
+    parts = []
+    inline_bytes = 0
+    for image_bytes in images:
+        if inline_bytes + len(image_bytes) <= INLINE_MAX_BYTES:
+            parts.append(types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg"))
+            inline_bytes += len(image_bytes)
+        else:
+            parts.append(call_with_retry(
+                client.files.upload, file=io.BytesIO(image_bytes), config={'mime_type': 'image/jpeg'}
+            ))
+    return parts
+
+def chatLLM_images(image_sources: List[Union[str, BinaryIO]]) -> List[PlantAttributes]:
+    """
+    Estimate plant attributes for several images with one Gemini request.
+
+    The images go into a single multi-part prompt and the model is asked for
+    a JSON array in the same order, validated against PlantAttributes.
+    Raises pydantic.ValidationError if the reply doesn't match the schema.
+    """
+    if not image_sources:
+        return []
+    client = get_genai_client()
+    images = [prepare_image_bytes(source) for source in image_sources]
 
-    # Load API key from .env.example
-    env = {}
-    with open(".env.example") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            key, value = line.split("=", 1)
-            env[key] = value
-
-    client = genai.Client(api_key=env["GEMINI_API_KEY"])
-
-    # 1️⃣ Upload the image
-    uploaded_file = client.files.upload(file=image_path)
-
-    # 2️⃣ Send a prompt referencing the uploaded file
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=[
-            uploaded_file,  # Include the uploaded image
-            f"""
+    contents = []
+    for index, part in enumerate(_image_parts(client, images), start=1):
+        contents.extend([f"Image {index}:", part])
+    contents.append(f"""
             You are an expert agronomist.
-            {prompt}
+            {ATTRIBUTES_PROMPT}
+            There are {len(images)} images. Return a JSON array with one object per image, in order.
             Provide the output as raw JSON only, without any markdown formatting.
-            """
-        ]
+            """)
+
+    response = call_with_retry(
+        client.models.generate_content,
+        model=VALUES_MODEL,
+        contents=contents,
+        config=types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=list[PlantAttributes],
+        )
     )
 
-    # 3️⃣ Parse output
-    if response.candidates:
-        candidate = response.candidates[0]
-        if candidate.content and candidate.content.parts:
-            text_output = candidate.content.parts[0].text.strip()
-            cleaned_json_str = clean_gemini_json(text_output)
-            try:
-                plant_data = json.loads(cleaned_json_str)
-                return plant_data
-            except json.JSONDecodeError:
-                print("Could not parse JSON. Raw output:", text_output)
-                return {"raw_output": text_output}
-    else:
-        print("No candidates found.")
-
-# Example usage
-plant_attributes = chatLLM_image("input.png")
-print(plant_attributes)
-
-# Optionally save
-with open("plant_attributes.json", "w") as f:
-    json.dump(plant_attributes, f)
-
-
-#calling the function will put the stuff in plant_attributes.json
-#it takes from input.png, so your camera should put an image in input.png
\ No newline at end of file
+    attributes = _attributes_list.validate_json(clean_gemini_json(response.text or ""))
+    if len(attributes) != len(images):
+        raise ValueError(f"Expected attributes for {len(images)} images, got {len(attributes)}")
+    return attributes
+
+def chatLLM_image(image_source: Union[str, BinaryIO]) -> PlantAttributes:
+    """Estimate plant attributes for one image."""
+    return chatLLM_images([image_source])[0]
+
+if __name__ == "__main__":
+    # Example usage: python valuesLLM.py input.png [more.png ...]
+    paths = sys.argv[1:] or ["input.png"]
+    results = chatLLM_images(paths)
+    for path, attributes in zip(paths, results):
+        logger.info(f"{path}: {attributes.model_dump()}")
+
+    # Saves the first image's attributes to plant_attributes.json
+    with open("plant_attributes.json", "w") as f:
+        json.dump(results[0].model_dump(), f)
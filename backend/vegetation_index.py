@@ -0,0 +1,64 @@
+import os
+from typing import Any, Dict
+import numpy as np
+from PIL import Image
+
+# Longest edge the image is reduced to before computing indices
+LOCAL_INDEX_MAX_EDGE = int(os.getenv("LOCAL_INDEX_MAX_EDGE", "256"))
+# Grid used for patchiness statistics
+PATCH_GRID = 8
+# Excess-green threshold for counting a pixel as green vegetation
+EXG_GREEN_THRESHOLD = 0.05
+# Mean GLI treated as fully green; healthy turf typically sits around 0.1-0.3
+GLI_FULL_GREEN = 0.25
+
+def compute_vegetation_indices(image: Image.Image) -> Dict[str, Any]:
+    """
+    Compute visible-band vegetation indices from an RGB photo.
+
+    Returns the mean ExG, VARI and GLI, the green-pixel fraction, patchiness
+    (spread of green fraction across a grid of blocks), a 0-100 health score
+    on the same scale as the Gemini prompt and a 0-1 confidence.
+    """
+    small = image.convert("RGB")
+    small.thumbnail((LOCAL_INDEX_MAX_EDGE, LOCAL_INDEX_MAX_EDGE))
+    pixels = np.asarray(small, dtype=np.float32) / 255.0
+    r, g, b = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+
+    total = r + g + b + 1e-6
+    rn, gn, bn = r / total, g / total, b / total
+    exg = 2 * gn - rn - bn
+    vari = np.clip((g - r) / (g + r - b + 1e-6), -1, 1)
+    gli = (2 * g - r - b) / (2 * g + r + b + 1e-6)
+
+    green_mask = (exg > EXG_GREEN_THRESHOLD) & (g > r)
+    green_fraction = float(green_mask.mean())
+    mean_gli = float(gli.mean())
+
+    # Spread of green fraction across blocks: uniform turf ~0, patchy/dead spots higher
+    height, width = green_mask.shape
+    rows = np.array_split(np.arange(height), min(PATCH_GRID, height))
+    cols = np.array_split(np.arange(width), min(PATCH_GRID, width))
+    block_fractions = np.array([
+        green_mask[np.ix_(row, col)].mean() for row in rows for col in cols
+    ])
+    patchiness = float(block_fractions.std())
+
+    greenness = float(np.clip(mean_gli / GLI_FULL_GREEN, 0, 1))
+    score = 100 * (0.6 * green_fraction + 0.4 * greenness)
+
+    # Confidence is low for mid-range scores, patchy scenes and badly exposed photos
+    brightness = float(pixels.mean())
+    exposure = 1.0 if 0.1 <= brightness <= 0.9 else 0.3
+    confidence = (abs(score - 50) / 50) * (1 - min(1.0, 2 * patchiness)) * exposure
+
+    return {
+        'exg': float(exg.mean()),
+        'vari': float(vari.mean()),
+        'gli': mean_gli,
+        'green_fraction': green_fraction,
+        'patchiness': patchiness,
+        'brightness': brightness,
+        'score': round(float(score), 1),
+        'confidence': round(float(confidence), 3),
+    }
@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from PIL import Image
+from loguru import logger
+
+VISION_CACHE_MAX_ENTRIES = int(os.getenv("VISION_CACHE_MAX_ENTRIES", "4096"))
+# Maximum Hamming distance between the structural hashes of two images with the
+# same colour signature for them to count as the same image (0 = exact only)
+VISION_CACHE_MAX_DISTANCE = int(os.getenv("VISION_CACHE_MAX_DISTANCE", "0"))
+# Optional SQLite file for a persistent tier, e.g. vision_cache.sqlite3
+VISION_CACHE_PATH = os.getenv("VISION_CACHE_PATH", "")
+
+# Bits of the fingerprint holding the structural difference hash; the colour
+# signature sits above them
+DHASH_BITS = 64
+# Histogram bins per RGB channel and bits per bin in the colour signature
+COLOR_BINS = 4
+COLOR_LEVELS = 15
+
+def image_fingerprint(image: Image.Image) -> int:
+    """
+    Fingerprint a normalized image by structure and colour.
+
+    The low 64 bits are a difference hash: the image is reduced to 9x8
+    grayscale and each bit records whether a pixel is brighter than its right
+    neighbour, so re-encoding, resizing and EXIF changes map to the same or a
+    very close value. Luminance alone can't tell a green scene from the same
+    scene browned off, and the cached value is a greenness score, so the bits
+    above hold a coarse per-channel colour histogram that must match too.
+    """
+    return (_color_signature(image) << DHASH_BITS) | _dhash(image)
+
+def _color_signature(image: Image.Image) -> int:
+    # 4 bins per channel, each the share of pixels quantized to 4 bits
+    histogram = image.convert("RGB").resize((32, 32), Image.Resampling.BILINEAR).histogram()
+    pixels = 32 * 32
+    bin_width = 256 // COLOR_BINS
+    signature = 0
+    for channel in range(3):
+        levels = histogram[channel * 256:(channel + 1) * 256]
+        for start in range(0, 256, bin_width):
+            share = sum(levels[start:start + bin_width]) / pixels
+            signature = (signature << 4) | round(share * COLOR_LEVELS)
+    return signature
+
+def _dhash(image: Image.Image) -> int:
+    small = image.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+    fingerprint = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            fingerprint = (fingerprint << 1) | (1 if left > right else 0)
+    return fingerprint
+
+class VisionCache:
+    """
+    Cache of parsed vision results keyed by image fingerprint and prompt version.
+
+    An in-process LRU serves hits; an optional SQLite file keeps results across
+    restarts.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = VISION_CACHE_MAX_ENTRIES,
+        max_distance: int = VISION_CACHE_MAX_DISTANCE,
+        path: str = VISION_CACHE_PATH
+    ):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                # Fingerprints exceed SQLite's 64-bit integers, so store them as hex
+                "CREATE TABLE IF NOT EXISTS vision_results_v2 ("
+                "fingerprint TEXT, prompt_version TEXT, result TEXT, "
+                "PRIMARY KEY (fingerprint, prompt_version))"
+            )
+            self._db.commit()
+            logger.info(f"Vision cache persistent tier at {path}")
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint: int, prompt_version: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for an image fingerprint, or None."""
+        key = (fingerprint, prompt_version)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None and self.max_distance > 0:
+                result = self._nearest(fingerprint, prompt_version)
+            if result is not None:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+        result = self._get_persistent(fingerprint, prompt_version)
+        with self._lock:
+            if result is not None:
+                self.hits += 1
+                self._store(key, result)
+            else:
+                self.misses += 1
+        return result
+
+    def set(self, fingerprint: int, prompt_version: str, result: Dict[str, Any]) -> None:
+        """Store a parsed result in every tier."""
+        with self._lock:
+            self._store((fingerprint, prompt_version), result)
+        if self._db is not None:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO vision_results_v2 VALUES (?, ?, ?)",
+                    (format(fingerprint, "x"), prompt_version, json.dumps(result))
+                )
+                self._db.commit()
+
+    def _store(self, key: tuple, result: Dict[str, Any]) -> None:
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _nearest(self, fingerprint: int, prompt_version: str) -> Optional[Dict[str, Any]]:
+        best = None
+        best_distance = self.max_distance + 1
+        color = fingerprint >> DHASH_BITS
+        for (other, version), result in self._entries.items():
+            # Only structure may differ; a different colour is a different image
+            if version != prompt_version or other >> DHASH_BITS != color:
+                continue
+            distance = (fingerprint ^ other).bit_count()
+            if distance < best_distance:
+                best, best_distance = result, distance
+        return best
+
+    def _get_persistent(self, fingerprint: int, prompt_version: str) -> Optional[Dict[str, Any]]:
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM vision_results_v2 WHERE fingerprint = ? AND prompt_version = ?",
+                (format(fingerprint, "x"), prompt_version)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+            'persistent': self._db is not None,
+        }
+
+# Process-wide cache instance
+vision_cache = VisionCache()
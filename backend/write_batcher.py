@@ -0,0 +1,190 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
+from loguru import logger
+from metrics import timed, upstream_errors
+
+# MongoDB duplicate key error: the document was already written by an earlier attempt
+DUPLICATE_KEY_ERROR = 11000
+# Per-document write error codes worth retrying (elections, shutdowns, timeouts);
+# anything else, e.g. validation or size errors, fails the same way every time
+TRANSIENT_WRITE_ERRORS = {6, 7, 50, 89, 91, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436}
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed insert_many may succeed if simply retried."""
+    if isinstance(error, ConnectionFailure):
+        return True
+    return isinstance(error, PyMongoError) and error.has_error_label("RetryableWriteError")
+
+class WriteBatcher:
+    """
+    Write-behind batcher that groups inserts into insert_many calls.
+
+    Ids are assigned client-side so add() can return them immediately.
+    Pending documents stay readable through get_pending() until they have been
+    written. Transient failures are requeued with exponential backoff up to
+    max_attempts per document; documents that fail permanently or run out of
+    attempts are logged and appended to dead_letter_path, if set.
+    """
+
+    def __init__(
+        self,
+        collection,
+        max_batch: int,
+        flush_interval: float,
+        max_attempts: int = 8,
+        retry_delay: float = 0.5,
+        max_retry_delay: float = 30.0,
+        dead_letter_path: str = ""
+    ):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.dead_letter_path = dead_letter_path
+        self.dropped = 0
+        self._queue: List[Dict[str, Any]] = []
+        self._pending: "OrderedDict[ObjectId, Dict[str, Any]]" = OrderedDict()
+        self._attempts: Dict[ObjectId, int] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+    def add(self, document: Dict[str, Any]) -> str:
+        """Queue a document for insertion and return its id."""
+        document['_id'] = ObjectId()
+        self._queue.append(document)
+        self._pending[document['_id']] = document
+        if len(self._queue) >= self.max_batch:
+            asyncio.ensure_future(self.flush())
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.ensure_future(self._flush_later(self.flush_interval))
+        return str(document['_id'])
+
+    def get_pending(self, assessment_id: ObjectId) -> Optional[Dict[str, Any]]:
+        """Return a queued document that has not been written yet."""
+        return self._pending.get(assessment_id)
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write every document queued so far, one insert_many per max_batch."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            queued, self._queue = self._queue, []
+            retry = []
+            for start in range(0, len(queued), self.max_batch):
+                retry.extend(await self._write(queued[start:start + self.max_batch]))
+
+            retry = await self._count_attempts(retry)
+            if retry:
+                # Requeue at the front so ordering is preserved on the next flush
+                self._queue[:0] = retry
+                attempts = max(self._attempts[document['_id']] for document in retry)
+                delay = min(self.max_retry_delay, self.retry_delay * 2 ** (attempts - 1))
+                # The backoff replaces any pending flush timer, which may be
+                # the task running this flush
+                if self._timer is not asyncio.current_task():
+                    self._cancel_timer()
+                self._timer = asyncio.ensure_future(self._flush_later(delay))
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert one batch and return the documents that need to be retried."""
+        failed: Dict[int, bool] = {}
+        try:
+            with timed("db_flush"):
+                await self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            upstream_errors.inc(upstream="mongodb", kind="error")
+            for error in e.details.get('writeErrors', []):
+                if error.get('code') != DUPLICATE_KEY_ERROR:
+                    failed[error['index']] = error.get('code') in TRANSIENT_WRITE_ERRORS
+            if e.details.get('writeConcernErrors'):
+                # Inserted but not confirmed; a retry is a duplicate key at worst
+                failed.update({i: True for i in range(len(batch)) if i not in failed})
+            logger.error(f"Batched insert failed for {len(failed)} of {len(batch)} documents: {str(e)}")
+        except Exception as e:
+            upstream_errors.inc(upstream="mongodb", kind="error")
+            if not is_transient(e) and len(batch) > 1:
+                # One bad document fails the whole call (e.g. too large to
+                # encode); write them one by one to isolate it
+                logger.error(f"Batched insert of {len(batch)} documents failed, retrying individually: {str(e)}")
+                retry = []
+                for document in batch:
+                    retry.extend(await self._write([document]))
+                return retry
+            failed = {i: is_transient(e) for i in range(len(batch))}
+            logger.error(f"Batched insert failed for {len(batch)} documents: {str(e)}")
+
+        permanent = [document for i, document in enumerate(batch) if failed.get(i) is False]
+        if permanent:
+            await self._dead_letter(permanent, "rejected by MongoDB")
+
+        for i, document in enumerate(batch):
+            if i not in failed:
+                self._pending.pop(document['_id'], None)
+                self._attempts.pop(document['_id'], None)
+        logger.debug(f"Flushed {len(batch) - len(failed)} assessments with insert_many")
+        return [document for i, document in enumerate(batch) if failed.get(i)]
+
+    async def _count_attempts(self, retry: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Charge one attempt to each failed document; drop those out of attempts."""
+        keep, exhausted = [], []
+        for document in retry:
+            attempts = self._attempts.get(document['_id'], 0) + 1
+            self._attempts[document['_id']] = attempts
+            (exhausted if attempts >= self.max_attempts else keep).append(document)
+        if exhausted:
+            await self._dead_letter(exhausted, f"still failing after {self.max_attempts} attempts")
+        return keep
+
+    async def _dead_letter(self, documents: List[Dict[str, Any]], reason: str) -> None:
+        """Give up on documents: log them and append them to the dead-letter file."""
+        for document in documents:
+            self._pending.pop(document['_id'], None)
+            self._attempts.pop(document['_id'], None)
+        self.dropped += len(documents)
+        upstream_errors.inc(len(documents), upstream="mongodb", kind="dropped")
+        ids = ", ".join(str(document['_id']) for document in documents)
+        logger.error(f"Dropping {len(documents)} assessments ({reason}): {ids}")
+        if self.dead_letter_path:
+            lines = "".join(json_util.dumps(document) + "\n" for document in documents)
+            try:
+                await asyncio.to_thread(_append, self.dead_letter_path, lines)
+            except OSError as e:
+                logger.error(f"Could not write dead-letter file {self.dead_letter_path}: {str(e)}")
+
+    async def close(self, rounds: int = 3) -> None:
+        """
+        Cancel the pending timer and write everything still queued.
+
+        Failed documents get up to `rounds` more flushes, a second apart;
+        whatever is still unwritten after that is dead-lettered rather than
+        silently lost.
+        """
+        for attempt in range(rounds + 1):
+            if attempt:
+                await asyncio.sleep(1.0)
+            self._cancel_timer()
+            await self.flush()
+            # Retries are driven from here now, not by the backoff timer
+            self._cancel_timer()
+            if not self._queue:
+                break
+        if self._queue:
+            remaining, self._queue = self._queue, []
+            await self._dead_letter(remaining, "unwritten at shutdown")
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+
+def _append(path: str, text: str) -> None:
+    with open(path, "a", encoding="utf-8") as out:
+        out.write(text)
@@ -1,15 +1,62 @@
-import React from "react";
+import React, { useState } from "react";
 import Header from "./components/Header";
 import Hero from "./components/Hero";
 import Interaction from "./components/Interaction";
+import AssessmentForm from "./components/AssessmentForm";
+import Results, { fromRiskResponse } from "./components/Results";
 import "./App.css";
 
+const API_URL = "/api";
+
 function App() {
+  const [taskId, setTaskId] = useState(null);
+  const [results, setResults] = useState(null);
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState(null);
+
+  const handleSubmit = async (formData) => {
+    setTaskId(null);
+    setResults(null);
+    setError(null);
+    setLoading(true);
+
+    try {
+      const res = await fetch(`${API_URL}/upload`, {
+        method: "POST",
+        body: formData,
+      });
+      if (!res.ok) throw new Error(`Upload failed: ${res.status}`);
+      const upload = await res.json();
+
+      if (upload.task_id) {
+        // Queued: Results follows the task's progress stream
+        setTaskId(upload.task_id);
+      } else {
+        // Processed synchronously (no task queue on the server)
+        const risk = await fetch(`${API_URL}/risk/${upload.assessment_id}`);
+        if (!risk.ok) throw new Error(`Fetching results failed: ${risk.status}`);
+        setResults(fromRiskResponse(await risk.json()));
+      }
+    } catch (err) {
+      console.error("Error submitting assessment:", err);
+      setError("Unable to analyze this image right now. Please try again.");
+    } finally {
+      setLoading(false);
+    }
+  };
+
   return (
     <div className="App">
       <Header />
       <Hero />
       <Interaction />
+      <AssessmentForm onSubmit={handleSubmit} loading={loading} error={error} />
+      <Results
+        data={results}
+        loading={loading}
+        taskId={taskId}
+        apiUrl={API_URL}
+      />
     </div>
   );
 }
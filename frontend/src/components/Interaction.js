@@ -16,26 +16,63 @@ const Interaction = () => {
   // Fixed PHI - will be calculated by ML model later
   const plantHealthIndex = 0.5; // Placeholder until ML integration
 
+  // Appends streamed text to the last conversation entry
+  const appendToLastResponse = (text) => {
+    setAiResponses((prev) => {
+      const last = prev[prev.length - 1];
+      return [...prev.slice(0, -1), { ...last, response: last.response + text }];
+    });
+  };
+
   const handleAddQuestion = async () => {
     if (currentQuestion.trim()) {
       const newQuestion = currentQuestion.trim();
       setQuestions([...questions, newQuestion]);
       setCurrentQuestion("");
       setIsLoading(true);
+      setAiResponses((prev) => [
+        ...prev,
+        { question: newQuestion, response: "", isImageCapture: false },
+      ]);
 
-      // Demo: Wait 3 seconds then show preset response
-      setTimeout(() => {
-        setAiResponses((prev) => [
-          ...prev,
-          {
-            question: newQuestion,
-            response:
-              "Photosynthesis is the essential process where plants, algae, and some bacteria use sunlight, water, and carbon dioxide to create their own food (sugars) and release oxygen as a byproduct.",
-            isImageCapture: false,
-          },
-        ]);
+      try {
+        // Render the answer as it is generated instead of waiting for all of it
+        const res = await fetch("/api/chat/stream", {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ question: newQuestion, phi: plantHealthIndex }),
+        });
+        if (!res.ok) throw new Error(`Chat request failed: ${res.status}`);
+
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        for (;;) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          const events = buffer.split("\n\n");
+          buffer = events.pop();
+          events.forEach((raw) => {
+            const event = raw.match(/^event: (.*)$/m)?.[1];
+            const data = raw.match(/^data: (.*)$/m)?.[1];
+            if (event === "token") {
+              appendToLastResponse(JSON.parse(data).text);
+            } else if (event === "error") {
+              appendToLastResponse(
+                "\n\nI'm experiencing technical difficulties. Please try again later."
+              );
+            }
+          });
+        }
+      } catch (error) {
+        console.error("Error asking AI:", error);
+        appendToLastResponse(
+          "I'm experiencing technical difficulties. Please try again later."
+        );
+      } finally {
         setIsLoading(false);
-      }, 3000);
+      }
     }
   };
 
@@ -8,8 +8,46 @@ import {
   Wind,
   Flame,
 } from "lucide-react";
+import { useTaskEvents } from "../hooks/useTaskEvents";
+
+const STAGE_LABELS = {
+  queued: "Queued",
+  image_scored: "Vegetation image scored",
+  environment_fetched: "Environmental data fetched",
+  risk_computed: "Risk computed",
+};
+
+// Maps a RiskResponse (from /risk or the task stream) onto the shape rendered below
+export const fromRiskResponse = (risk) => ({
+  ...risk,
+  risk_level: risk.risk_category,
+  recommendations: { overall: risk.recommendation },
+});
+
+const Results = ({ data, loading, taskId, apiUrl }) => {
+  const { stages, result, error } = useTaskEvents(data ? null : taskId, apiUrl);
+
+  if (taskId && !data) {
+    if (error) {
+      return (
+        <section className="results">
+          <div className="container">
+            <div className="loading-results">
+              <AlertTriangle />
+              <h3>Assessment failed</h3>
+              <p>{error}</p>
+            </div>
+          </div>
+        </section>
+      );
+    }
+    if (result) {
+      data = fromRiskResponse(result.risk);
+    } else {
+      loading = true;
+    }
+  }
 
-const Results = ({ data, loading }) => {
   if (loading) {
     return (
       <section className="results">
@@ -18,6 +56,15 @@ const Results = ({ data, loading }) => {
             <div className="spinner"></div>
             <h3>Analyzing your data...</h3>
             <p>This may take a moment as we process environmental factors.</p>
+            {stages.length > 0 && (
+              <ul className="stage-progress">
+                {stages.map((stage) => (
+                  <li key={stage}>
+                    <CheckCircle /> {STAGE_LABELS[stage]}
+                  </li>
+                ))}
+              </ul>
+            )}
           </div>
         </div>
       </section>
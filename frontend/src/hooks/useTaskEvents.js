@@ -0,0 +1,53 @@
+import { useEffect, useState } from "react";
+
+const STAGES = [
+  "queued",
+  "image_scored",
+  "environment_fetched",
+  "risk_computed",
+];
+
+// Subscribes to /tasks/{taskId}/events instead of polling for the result
+export const useTaskEvents = (taskId, apiUrl = "/api") => {
+  const [stages, setStages] = useState([]);
+  const [result, setResult] = useState(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    if (!taskId) return undefined;
+
+    setStages([]);
+    setResult(null);
+    setError(null);
+
+    const source = new EventSource(`${apiUrl}/tasks/${taskId}/events`);
+
+    STAGES.forEach((stage) => {
+      source.addEventListener(stage, () => {
+        setStages((done) => (done.includes(stage) ? done : [...done, stage]));
+      });
+    });
+
+    source.addEventListener("completed", (event) => {
+      setResult(JSON.parse(event.data));
+      source.close();
+    });
+
+    source.addEventListener("failed", (event) => {
+      setError(JSON.parse(event.data).detail || "Assessment failed");
+      source.close();
+    });
+
+    // Dropped connections are retried by EventSource; a refused one
+    // (e.g. a 404) closes the source for good
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        setError("Lost track of this assessment");
+      }
+    };
+
+    return () => source.close();
+  }, [taskId, apiUrl]);
+
+  return { stages, result, error };
+};